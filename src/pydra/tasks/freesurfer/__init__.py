@@ -23,9 +23,28 @@ Task definitions for surface processing utilities are available under the :mod:`
 
 >>> from pydra.tasks.freesurfer import mris
 
+4. Execution Utilities
+
+Execution backends and helpers are available under the :mod:`engine` namespace.
+
+>>> from pydra.tasks.freesurfer import engine
+
+5. File Formats
+
+Native readers and writers for FreeSurfer's file formats are available under the :mod:`io` namespace.
+
+>>> from pydra.tasks.freesurfer import io
+
+Native implementations of simple invocations of FreeSurfer's tools are available under the :mod:`native` namespace.
+
+>>> from pydra.tasks.freesurfer import native
+
+.. automodule:: pydra.tasks.freesurfer.engine
 .. automodule:: pydra.tasks.freesurfer.gtmseg
+.. automodule:: pydra.tasks.freesurfer.io
 .. automodule:: pydra.tasks.freesurfer.mri
 .. automodule:: pydra.tasks.freesurfer.mris
+.. automodule:: pydra.tasks.freesurfer.native
 .. automodule:: pydra.tasks.freesurfer.recon_all
 .. automodule:: pydra.tasks.freesurfer.tkregister2
 """
@@ -0,0 +1,52 @@
+"""
+CPU
+===
+
+CPU budget of the current process, without dependencies on the rest of the package,
+so that readers and writers of :mod:`~pydra.tasks.freesurfer.io` may size their thread pools
+without importing :mod:`~pydra.tasks.freesurfer.engine`.
+
+>>> get_thread_budget(concurrent_tasks=1) >= 1
+True
+"""
+
+from __future__ import annotations
+
+__all__ = ["get_cpu_budget", "get_cpu_quota", "get_thread_budget"]
+
+import contextlib
+import math
+import os
+from pathlib import Path
+
+
+def get_cpu_quota(cgroup_root: os.PathLike = "/sys/fs/cgroup") -> float | None:
+    """Return the CPU quota of the current cgroup, in number of CPUs, if any."""
+    cgroup_root = Path(cgroup_root)
+    # cgroup v2: "<quota> <period>" or "max <period>".
+    with contextlib.suppress(OSError, ValueError):
+        quota, period = (cgroup_root / "cpu.max").read_text().split()
+        return None if quota == "max" else int(quota) / int(period)
+    # cgroup v1: a negative quota means unlimited.
+    with contextlib.suppress(OSError, ValueError):
+        quota = int((cgroup_root / "cpu" / "cpu.cfs_quota_us").read_text())
+        period = int((cgroup_root / "cpu" / "cpu.cfs_period_us").read_text())
+        return None if quota < 0 else quota / period
+    return None
+
+
+def get_cpu_budget(cgroup_root: os.PathLike = "/sys/fs/cgroup") -> int:
+    """Return the number of CPUs usable by the current process."""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    quota = get_cpu_quota(cgroup_root)
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+def get_thread_budget(concurrent_tasks: int = 1, cgroup_root: os.PathLike = "/sys/fs/cgroup") -> int:
+    """Return the number of threads available to each of the concurrently running tasks."""
+    return max(1, get_cpu_budget(cgroup_root) // max(1, concurrent_tasks))
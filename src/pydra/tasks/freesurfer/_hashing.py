@@ -0,0 +1,40 @@
+"""
+Hashing
+=======
+
+Fastest hash function available on the host, without dependencies on the rest of the package,
+so that native engines may cache their arrays without importing :mod:`~pydra.tasks.freesurfer.engine`.
+
+>>> name, hasher = get_hasher()
+>>> name in {"blake3", "xxh3", "blake2b"}
+True
+"""
+
+from __future__ import annotations
+
+__all__ = ["get_hasher"]
+
+import functools
+import hashlib
+
+
+def _get_hashers():
+    try:
+        import blake3
+
+        yield "blake3", blake3.blake3
+    except ImportError:
+        pass
+    try:
+        import xxhash
+
+        yield "xxh3", xxhash.xxh3_128
+    except ImportError:
+        pass
+    yield "blake2b", functools.partial(hashlib.blake2b, digest_size=32)
+
+
+@functools.lru_cache(maxsize=None)
+def get_hasher():
+    """Return the name and constructor of the fastest available hash function."""
+    return next(_get_hashers())
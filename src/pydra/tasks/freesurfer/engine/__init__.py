@@ -0,0 +1,61 @@
+"""
+Execution Utilities
+===================
+
+Execution backends and helpers for running FreeSurfer tasks at scale.
+
+>>> from pydra.tasks.freesurfer.engine import AsyncWorker, Local, ResourceAwareSlurmWorker
+
+.. automodule:: pydra.tasks.freesurfer.engine.cache
+.. automodule:: pydra.tasks.freesurfer.engine.canonical
+.. automodule:: pydra.tasks.freesurfer.engine.dryrun
+.. automodule:: pydra.tasks.freesurfer.engine.environments
+.. automodule:: pydra.tasks.freesurfer.engine.hashing
+.. automodule:: pydra.tasks.freesurfer.engine.limits
+.. automodule:: pydra.tasks.freesurfer.engine.resources
+.. automodule:: pydra.tasks.freesurfer.engine.store
+.. automodule:: pydra.tasks.freesurfer.engine.threads
+.. automodule:: pydra.tasks.freesurfer.engine.watchdog
+.. automodule:: pydra.tasks.freesurfer.engine.workers
+"""
+
+from pydra.tasks.freesurfer.engine.cache import CacheManager
+from pydra.tasks.freesurfer.engine.canonical import canonicalize
+from pydra.tasks.freesurfer.engine.dryrun import DryRunReport, dry_run
+from pydra.tasks.freesurfer.engine.environments import InProcess, Local
+from pydra.tasks.freesurfer.engine.limits import LimitExceeded, Limits
+from pydra.tasks.freesurfer.engine.resources import (
+    ResourceAwareSlurmWorker,
+    ResourceAwareWorker,
+    ResourceProfile,
+    Resources,
+    get_resource_profile,
+    get_resources,
+)
+from pydra.tasks.freesurfer.engine.store import ResultStore
+from pydra.tasks.freesurfer.engine.threads import SlotRegistry, get_thread_budget
+from pydra.tasks.freesurfer.engine.watchdog import FatalLogMessage, Watchdog
+from pydra.tasks.freesurfer.engine.workers import AsyncWorker
+
+__all__ = [
+    "AsyncWorker",
+    "CacheManager",
+    "DryRunReport",
+    "FatalLogMessage",
+    "InProcess",
+    "LimitExceeded",
+    "Limits",
+    "Local",
+    "ResourceAwareSlurmWorker",
+    "ResourceAwareWorker",
+    "ResourceProfile",
+    "Resources",
+    "ResultStore",
+    "SlotRegistry",
+    "Watchdog",
+    "canonicalize",
+    "dry_run",
+    "get_resource_profile",
+    "get_resources",
+    "get_thread_budget",
+]
@@ -0,0 +1,258 @@
+"""
+Cache
+=====
+
+Size-bounded eviction of the pydra cache for FreeSurfer tasks.
+
+Pydra keeps every task output in its cache directory forever.
+A :class:`CacheManager` tracks the size and last access time of the cache entries created by this package's tasks,
+and evicts the least recently used ones above a byte budget:
+
+>>> manager = CacheManager("/path/to/cache", budget=500 * 2**30)
+
+Pydra does not record cache hits, and file systems mounted with ``noatime`` or ``relatime``
+do not record reads reliably, so accesses are recorded explicitly as the modification time of result files.
+:func:`track_accesses` installs a pre-run hook recording every run, hit or miss, whichever the worker,
+on a task or on the nodes of a workflow, as :meth:`CacheManager.pinned` does.
+The :class:`~.workers.AsyncWorker` records the runs of any task, and :meth:`CacheManager.touch` a single access.
+Entries of running tasks and entries pinned by running workflows are never evicted.
+Sizes are recorded in an index, so that only new or modified entries are walked,
+which makes eviction cheap enough to run at every workflow start:
+
+>>> with manager.pinned(workflow):  # doctest: +SKIP
+...     manager.evict()
+...     submitter(workflow)
+"""
+
+from __future__ import annotations
+
+__all__ = ["CacheEntry", "CacheManager", "record_access", "track_accesses"]
+
+import contextlib
+import functools
+import importlib
+import json
+import os
+import pkgutil
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable
+
+import attr
+from attrs import define
+from filelock import SoftFileLock
+
+from pydra.engine.core import TaskBase, is_workflow
+from pydra.engine.specs import LazyField
+from pydra.tasks.freesurfer.engine.threads import is_alive
+
+INDEX_NAME = ".freesurfer-cache.json"
+
+PINS_NAME = ".freesurfer-pins"
+
+#: Result file of a cache entry, whose modification time records the last access to the entry.
+RESULT_NAME = "_result.pklz"
+
+
+@functools.lru_cache(maxsize=None)
+def get_task_names() -> frozenset[str]:
+    """Return the names of the task definitions provided by this package."""
+    import pydra.tasks.freesurfer as package
+
+    for module in pkgutil.walk_packages(package.__path__, prefix=f"{package.__name__}."):
+        if ".tests" not in module.name:
+            importlib.import_module(module.name)
+
+    def subclasses(cls):
+        for subclass in cls.__subclasses__():
+            yield subclass
+            yield from subclasses(subclass)
+
+    # Function tasks, such as ExtractROIs, are managed along with shell tasks.
+    return frozenset(cls.__name__ for cls in subclasses(TaskBase) if cls.__module__.startswith(package.__name__))
+
+
+def record_access(output_dir: os.PathLike):
+    """Record an access to the cache entry of an output directory, if its task has run."""
+    with contextlib.suppress(FileNotFoundError):
+        os.utime(Path(output_dir) / RESULT_NAME)
+
+
+def _record_access_hook(pre_run, task: TaskBase):
+    # Pydra calls the pre-run hook before looking up the cache, from any worker.
+    record_access(task.output_dir)
+    pre_run(task)
+
+
+def _get_tasks(runnable: TaskBase) -> Iterable[TaskBase]:
+    yield runnable
+    if is_workflow(runnable):
+        for node in runnable.graph.nodes:
+            yield from _get_tasks(node)
+
+
+def track_accesses(runnable: TaskBase):
+    """Record every run of a task, or of the nodes of a workflow, as an access to its cache entry."""
+    for task in _get_tasks(runnable):
+        pre_run = task.hooks.pre_run
+        if not (isinstance(pre_run, functools.partial) and pre_run.func is _record_access_hook):
+            # A partial of a module-level function, picklable for workers running tasks in other processes.
+            task.hooks.pre_run = functools.partial(_record_access_hook, pre_run)
+
+
+@define(frozen=True)
+class CacheEntry:
+    """An entry of the pydra cache, with its size in bytes and last access time in seconds since the epoch."""
+
+    path: Path
+
+    size: int
+
+    last_access: float
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+
+def _get_size(path: Path) -> int:
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            with contextlib.suppress(FileNotFoundError):
+                size += os.lstat(os.path.join(dirpath, filename)).st_blocks * 512
+    return size
+
+
+class CacheManager:
+    """Least recently used eviction of the cache entries of FreeSurfer tasks.
+
+    Parameters
+    ----------
+    cache_dir : path-like
+        Pydra cache directory.
+    budget : int
+        Maximum size in bytes of the cache entries of FreeSurfer tasks.
+    task_names : iterable of str, optional
+        Names of the tasks whose entries are managed. Defaults to the tasks provided by this package.
+    """
+
+    def __init__(self, cache_dir: os.PathLike, budget: int, task_names: Iterable[str] | None = None):
+        self.cache_dir = Path(cache_dir)
+        self.budget = budget
+        self.task_names = frozenset(task_names) if task_names is not None else get_task_names()
+
+    @property
+    def index_path(self) -> Path:
+        return self.cache_dir / INDEX_NAME
+
+    @property
+    def pins_dir(self) -> Path:
+        return self.cache_dir / PINS_NAME
+
+    def _is_managed(self, name: str) -> bool:
+        task_name, _, checksum = name.rpartition("_")
+        return bool(checksum) and task_name in self.task_names
+
+    def _read_index(self) -> dict:
+        try:
+            return json.loads(self.index_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_index(self, index: dict):
+        tmp_path = self.index_path.with_name(f"{INDEX_NAME}.{uuid.uuid4().hex}")
+        tmp_path.write_text(json.dumps(index))
+        os.replace(tmp_path, self.index_path)
+
+    def entries(self) -> list[CacheEntry]:
+        """Return the managed cache entries, refreshing the index for new or modified entries."""
+        if not self.cache_dir.exists():
+            return []
+        with SoftFileLock(self.cache_dir / f"{INDEX_NAME}.lock"):
+            index = self._read_index()
+            entries, updated = [], {}
+            for item in os.scandir(self.cache_dir):
+                if not (item.is_dir(follow_symlinks=False) and self._is_managed(item.name)):
+                    continue
+                stat = item.stat(follow_symlinks=False)
+                record = index.get(item.name)
+                if record is None or record["mtime"] != stat.st_mtime_ns:
+                    record = {"mtime": stat.st_mtime_ns, "size": _get_size(Path(item.path)), "access": 0.0}
+                with contextlib.suppress(FileNotFoundError):
+                    record["access"] = max(record["access"], os.stat(Path(item.path) / RESULT_NAME).st_mtime)
+                record["access"] = max(record["access"], stat.st_mtime_ns / 1e9)
+                updated[item.name] = record
+                entries.append(CacheEntry(Path(item.path), record["size"], record["access"]))
+            self._write_index(updated)
+        return entries
+
+    def touch(self, task: TaskBase):
+        """Record an access to the cache entry of a task."""
+        record_access(self.cache_dir / task.checksum)
+
+    @contextlib.contextmanager
+    def pinned(self, runnable: TaskBase | None = None, names: Iterable[str] = ()):
+        """Pin cache entries for the duration of the context.
+
+        Pins the entries of the given names, the entries of a task or of the nodes of a workflow
+        whose checksum is known beforehand, and any entry written or accessed while the pin is held,
+        accesses of the task or workflow being tracked with :func:`track_accesses`.
+        """
+        names = set(names)
+        if runnable is not None:
+            track_accesses(runnable)
+            for task in _get_tasks(runnable):
+                # Checksums are unknown beforehand for nodes depending on upstream outputs or workflow inputs.
+                if any(isinstance(value, LazyField) for value in attr.asdict(task.inputs, recurse=False).values()):
+                    continue
+                names.update(task.checksum_states() if task.state else [task.checksum])
+        self.pins_dir.mkdir(parents=True, exist_ok=True)
+        pin = self.pins_dir / f"{os.getpid()}-{uuid.uuid4().hex}.json"
+        pin.write_text(json.dumps({"names": sorted(names), "since": time.time()}))
+        try:
+            yield pin
+        finally:
+            pin.unlink()
+
+    def _get_pins(self) -> tuple[set[str], float]:
+        names, since = set(), float("inf")
+        for pin in self.pins_dir.glob("*.json") if self.pins_dir.exists() else ():
+            if not is_alive(int(pin.name.split("-", 1)[0])):
+                with contextlib.suppress(FileNotFoundError):
+                    pin.unlink()
+                continue
+            with contextlib.suppress(FileNotFoundError, ValueError):
+                record = json.loads(pin.read_text())
+                names.update(record["names"])
+                since = min(since, record["since"])
+        return names, since
+
+    def is_pinned(self, entry: CacheEntry, pins: tuple[set[str], float] | None = None) -> bool:
+        """Whether an entry is referenced by a running task or workflow."""
+        names, since = pins or self._get_pins()
+        if entry.name in names or entry.last_access >= since:
+            return True
+        # Pydra holds a lock file next to the entry of a running task.
+        return (self.cache_dir / f"{entry.name}.lock").exists()
+
+    def evict(self) -> list[CacheEntry]:
+        """Evict the least recently used entries until the cache fits within the budget.
+
+        Returns the evicted entries.
+        """
+        entries = sorted(self.entries(), key=lambda entry: entry.last_access)
+        total = sum(entry.size for entry in entries)
+        pins = self._get_pins()
+        evicted = []
+        for entry in entries:
+            if total <= self.budget:
+                break
+            if self.is_pinned(entry, pins):
+                continue
+            shutil.rmtree(entry.path, ignore_errors=True)
+            total -= entry.size
+            evicted.append(entry)
+        return evicted
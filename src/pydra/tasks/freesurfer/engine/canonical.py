@@ -0,0 +1,133 @@
+"""
+Canonical Inputs
+================
+
+Canonical form of the inputs of FreeSurfer tasks.
+
+Equivalent invocations of a tool may be specified in many ways,
+each hashing differently and thus missing pydra's cache and the result store:
+
+- paths written relative to the working directory rather than absolute,
+  or with the subjects directory inlined as ``$SUBJECTS_DIR``,
+- the subjects directory taken from the environment rather than passed explicitly,
+- flags explicitly disabled, or options set to the documented default of the tool,
+- tuples rather than lists, or integers rather than floats.
+
+:func:`canonicalize` rewrites the inputs of a task, or of every node of a workflow, to their canonical form
+before submission:
+
+>>> from pydra.tasks.freesurfer.mri.label2vol import Label2Vol
+>>> task = Label2Vol(
+...     label_file="lh.label",
+...     template_volume="$SUBJECTS_DIR/sub-01/mri/orig.mgz",
+...     subjects_dir="/data/subjects",
+...     projection=("frac", 0, 1, 0.1),
+... )
+>>> _ = canonicalize(task)
+>>> task.inputs.template_volume
+'/data/subjects/sub-01/mri/orig.mgz'
+>>> task.inputs.projection
+['frac', 0.0, 1.0, 0.1]
+"""
+
+from __future__ import annotations
+
+__all__ = ["DOCUMENTED_DEFAULTS", "canonicalize", "get_canonical_inputs"]
+
+import os
+import typing as ty
+
+import attrs
+
+from pydra.engine.core import TaskBase, is_workflow
+from pydra.engine.helpers import ensure_list
+from pydra.engine.specs import LazyField
+
+#: Options set to their documented default value are left unset, by task and input name.
+DOCUMENTED_DEFAULTS = {
+    "Binarize": {"mask_threshold": 0.5},
+    "GTMSeg": {"upsampling_factor": 2},
+}
+
+
+def _is_path_type(tp) -> bool:
+    if tp in (os.PathLike, "PathLike", "os.PathLike"):
+        return True
+    return any(map(_is_path_type, ty.get_args(tp)))
+
+
+def _is_output(field: attrs.Attribute) -> bool:
+    return "output_file_template" in field.metadata or field.name.startswith("output_")
+
+
+def _coerce(value, tp):
+    # Integers given for floats, and tuples given for sequences.
+    if tp is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        args = ty.get_args(tp)
+        if ty.get_origin(tp) is tuple and len(args) == len(value) and Ellipsis not in args:
+            return [_coerce(item, arg) for item, arg in zip(value, args)]
+        item_type = args[0] if args else None
+        return [_coerce(item, item_type) for item in value]
+    return value
+
+
+def _canonical_path(value, subjects_dir: str | None):
+    if not isinstance(value, (str, os.PathLike)):
+        return value
+    path = os.fspath(value)
+    if subjects_dir is not None:
+        path = path.replace("${SUBJECTS_DIR}", subjects_dir).replace("$SUBJECTS_DIR", subjects_dir)
+    path = os.path.expanduser(path)
+    # Paths relative to a subject directory are left as is.
+    if not os.path.isabs(path) and os.path.exists(path):
+        path = os.path.abspath(path)
+    return os.path.normpath(path) if os.path.isabs(path) else path
+
+
+def get_canonical_inputs(task: TaskBase) -> dict[str, ty.Any]:
+    """Return the inputs of a task which differ from their canonical form, with their canonical values."""
+    inputs = task.inputs
+    fields = attrs.fields_dict(type(inputs))
+    defaults = DOCUMENTED_DEFAULTS.get(type(task).__name__, {})
+    subjects_dir = getattr(inputs, "subjects_dir", None) or os.getenv("SUBJECTS_DIR")
+    if isinstance(subjects_dir, LazyField):
+        subjects_dir = None
+    subjects_dir = os.path.abspath(subjects_dir) if subjects_dir else None
+    changes = {}
+    for name, field in fields.items():
+        value = getattr(inputs, name)
+        if name.startswith("_") or value is attrs.NOTHING or isinstance(value, LazyField):
+            continue
+        canonical = _coerce(value, field.type)
+        if name == "subjects_dir":
+            canonical = subjects_dir
+        elif _is_path_type(field.type) and not _is_output(field):
+            if isinstance(canonical, list):
+                canonical = [_canonical_path(item, subjects_dir) for item in canonical]
+            else:
+                canonical = _canonical_path(canonical, subjects_dir)
+        if field.default is attrs.NOTHING and name in defaults and canonical == defaults[name]:
+            canonical = attrs.NOTHING
+        elif canonical is False and field.default is attrs.NOTHING and not (
+            "formatter" in field.metadata or field.metadata.get("mandatory")
+        ):
+            # Disabled flags are not rendered on the command line.
+            canonical = attrs.NOTHING
+        if repr(canonical) != repr(value):
+            changes[name] = canonical
+    if "subjects_dir" in fields and getattr(inputs, "subjects_dir") is attrs.NOTHING and subjects_dir:
+        changes["subjects_dir"] = subjects_dir
+    return changes
+
+
+def canonicalize(runnable: TaskBase) -> TaskBase:
+    """Rewrite the inputs of a task, or of the nodes of a workflow, to their canonical form in place."""
+    for task in runnable.graph.nodes if is_workflow(runnable) else ensure_list(runnable):
+        if is_workflow(task):
+            canonicalize(task)
+            continue
+        for name, value in get_canonical_inputs(task).items():
+            setattr(task.inputs, name, value)
+    return runnable
@@ -0,0 +1,209 @@
+"""
+Dry Run
+=======
+
+Predict which tasks of a workflow will run before submitting it.
+
+:func:`dry_run` computes the checksum of every task and probes the pydra cache, and optionally a result store,
+without executing anything.
+Tasks depending on the outputs of cached tasks are resolved from the cached results,
+whereas tasks depending on the outputs of tasks yet to run are reported as blocked.
+State elements of a split workflow are probed in parallel:
+
+>>> report = dry_run(workflow, cache_locations=["/path/to/cache"])  # doctest: +SKIP
+>>> report.by_class()  # doctest: +SKIP
+{'ReconAll': {'hit': 19873, 'miss': 127}, 'GTMSeg': {'hit': 19873, 'blocked': 127}}
+>>> report.core_hours  # doctest: +SKIP
+3302.0
+
+The resubmission list holds the inputs of the state elements with tasks to run,
+to split a new workflow over these elements only:
+
+>>> report.resubmission()  # doctest: +SKIP
+[{'subject_id': 'sub-0042'}, ...]
+"""
+
+from __future__ import annotations
+
+__all__ = ["DryRunEntry", "DryRunReport", "dry_run"]
+
+import collections
+import os
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from typing import Iterable
+
+import attrs
+from attrs import define, field
+
+from pydra.engine.core import TaskBase, is_workflow
+from pydra.engine.helpers import load_result
+from pydra.tasks.freesurfer.engine.resources import Resources, get_resource_profile, get_resources
+from pydra.tasks.freesurfer.engine.store import ResultStore
+
+#: Statuses of tasks which will be executed.
+RUN_STATUSES = ("miss", "blocked")
+
+
+@define(frozen=True)
+class DryRunEntry:
+    """The predicted outcome of a task.
+
+    Attributes
+    ----------
+    name : str
+        Dotted path of the task within the submitted runnable.
+    task_class : str
+        Name of the task definition.
+    status : str
+        ``"hit"`` if cached, ``"store"`` if restored from the result store, ``"miss"`` if it will run,
+        or ``"blocked"`` if it depends on a task which will run.
+    checksum : str or None
+        Checksum of the task, unknown for blocked tasks.
+    resources : Resources
+        Resources requested by the task.
+    state : dict
+        Inputs of the state element of the submitted runnable this task belongs to.
+    """
+
+    name: str
+
+    task_class: str
+
+    status: str
+
+    checksum: str | None
+
+    resources: Resources
+
+    state: dict = field(factory=dict)
+
+    @property
+    def core_hours(self) -> float:
+        return self.resources.cores * self.resources.wall_time / 60
+
+
+@define
+class DryRunReport:
+    """The predicted outcomes of the tasks of a runnable."""
+
+    entries: list[DryRunEntry] = field(factory=list)
+
+    def count(self, *statuses: str) -> int:
+        """Return the number of tasks with any of the given statuses."""
+        return sum(entry.status in statuses for entry in self.entries)
+
+    @property
+    def hits(self) -> int:
+        return self.count("hit", "store")
+
+    @property
+    def misses(self) -> int:
+        return self.count(*RUN_STATUSES)
+
+    @property
+    def core_hours(self) -> float:
+        """Predicted core-hours of the tasks which will run."""
+        return sum(entry.core_hours for entry in self.entries if entry.status in RUN_STATUSES)
+
+    def by_class(self) -> dict[str, dict[str, int]]:
+        """Return the number of tasks by task class and status."""
+        counts = collections.defaultdict(collections.Counter)
+        for entry in self.entries:
+            counts[entry.task_class][entry.status] += 1
+        return {name: dict(counter) for name, counter in counts.items()}
+
+    def resubmission(self) -> list[dict]:
+        """Return the inputs of the state elements with tasks to run, without duplicates."""
+        states = {}
+        for entry in self.entries:
+            if entry.status in RUN_STATUSES:
+                states.setdefault(repr(sorted(entry.state.items())), entry.state)
+        return list(states.values())
+
+
+def _expand(runnable: TaskBase) -> list[tuple[dict, TaskBase]]:
+    # Mirrors the state expansion of pydra's submitter, without pickling.
+    runnable.state.prepare_states(runnable.inputs, cont_dim=runnable.cont_dim)
+    runnable.state.prepare_inputs()
+    elements = []
+    for ind in range(len(runnable.state.states_val)):
+        inputs = runnable.get_input_el(ind)
+        element = deepcopy(runnable)
+        element.inputs = attrs.evolve(element.inputs, **inputs)
+        element._pre_split = True
+        element.state = None
+        elements.append((inputs, element))
+    return elements
+
+
+def _get_blocked(runnable: TaskBase, name: str, state: dict) -> list[DryRunEntry]:
+    if is_workflow(runnable):
+        return [entry for node in runnable.graph.nodes for entry in _get_blocked(node, f"{name}.{node.name}", state)]
+    resources = get_resource_profile(runnable).resolve(runnable.inputs)
+    return [DryRunEntry(name, type(runnable).__name__, "blocked", None, resources, state)]
+
+
+def _probe_task(task: TaskBase, store: ResultStore | None, name: str, state: dict) -> DryRunEntry:
+    checksum = task.checksum
+    result = load_result(checksum, task.cache_locations)
+    if result is not None and not result.errored:
+        status = "hit"
+    elif store is not None and (key := store.get_key(task)) is not None and store.get_entry(key).exists():
+        status = "store"
+    else:
+        status = "miss"
+    return DryRunEntry(name, type(task).__name__, status, checksum, get_resources(task), state)
+
+
+def _probe(runnable: TaskBase, store: ResultStore | None, name: str, state: dict) -> list[DryRunEntry]:
+    if runnable.state is not None:
+        return [
+            entry
+            for inputs, element in _expand(runnable)
+            for entry in _probe(element, store, name, state or inputs)
+        ]
+    if not is_workflow(runnable):
+        return [_probe_task(runnable, store, name, state)]
+    runnable._connect_and_propagate_to_tasks(override_task_caches=True)
+    entries = []
+    for node in runnable.graph_sorted:
+        try:
+            node.inputs.retrieve_values(runnable)
+        except Exception:
+            # Upstream results are missing, so the checksum of the node is unknown.
+            entries += _get_blocked(node, f"{name}.{node.name}", state)
+            continue
+        entries += _probe(node, store, f"{name}.{node.name}", state)
+    return entries
+
+
+def dry_run(
+    runnable: TaskBase,
+    cache_locations: Iterable[os.PathLike] | None = None,
+    store: ResultStore | None = None,
+    max_workers: int | None = None,
+) -> DryRunReport:
+    """Predict which tasks of a runnable will be served from the cache and which will run.
+
+    Parameters
+    ----------
+    runnable : TaskBase
+        Task or workflow to probe, which is left untouched.
+    cache_locations : iterable of path-like, optional
+        Additional cache locations, as given to the submitter.
+    store : ResultStore, optional
+        Result store looked up for tasks missing from the cache.
+    max_workers : int, optional
+        Maximum number of state elements probed in parallel.
+    """
+    runnable = deepcopy(runnable)
+    if cache_locations is not None:
+        runnable.cache_locations = cache_locations
+    if runnable.state is None:
+        return DryRunReport(_probe(runnable, store, runnable.name, {}))
+    with ThreadPoolExecutor(max_workers) as executor:
+        futures = [
+            executor.submit(_probe, element, store, runnable.name, inputs) for inputs, element in _expand(runnable)
+        ]
+        return DryRunReport([entry for future in futures for entry in future.result()])
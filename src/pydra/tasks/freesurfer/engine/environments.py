@@ -0,0 +1,132 @@
+"""
+Environments
+============
+
+Execution environments for FreeSurfer's command-line tools.
+
+The :class:`Local` environment runs tasks on the host like pydra's native environment,
+with the thread budget of each task resolved at execution time
+so that concurrently running tasks never oversubscribe the host:
+
+>>> from pydra.tasks.freesurfer.recon_all import ReconAll
+>>> task = ReconAll(subject_id="sub-01", environment=Local())
+
+Hard limits may be set explicitly, or derived from the resource profile of each task:
+
+>>> from pydra.tasks.freesurfer.engine.limits import Limits
+>>> task = ReconAll(subject_id="sub-01", environment=Local(limits=Limits(wall_time=2880)))
+>>> task = ReconAll(subject_id="sub-01", environment=Local(limits_from_profile=True))
+
+Outputs of deterministic tasks may be shared across workflows with a result store, see :mod:`~.store`.
+
+The :class:`InProcess` environment runs invocations implemented natively in the Python process,
+and the others like :class:`Local`, see :mod:`pydra.tasks.freesurfer.native`:
+
+>>> task = ReconAll(subject_id="sub-01", environment=InProcess())
+"""
+
+from __future__ import annotations
+
+__all__ = ["InProcess", "Local"]
+
+import os
+from pathlib import Path
+
+from pydra.engine.environments import Native
+from pydra.engine.task import ShellCommandTask
+from pydra.tasks.freesurfer.engine.limits import Limits, run_process
+from pydra.tasks.freesurfer.engine.resources import get_resources
+from pydra.tasks.freesurfer.engine.store import ResultStore
+from pydra.tasks.freesurfer.engine.threads import SlotRegistry, apply_thread_budget, get_thread_budget
+from pydra.tasks.freesurfer.engine.watchdog import Watchdog
+from pydra.tasks.freesurfer.native import Unsupported, get_engine
+
+
+def make_output(task: ShellCommandTask, args, return_code: int, stdout: bytes, stderr: bytes) -> dict:
+    """Build the output of a shell task, raising on a non-zero return code."""
+    output = {"return_code": return_code, "stdout": stdout.decode("utf-8"), "stderr": stderr.decode("utf-8")}
+    if task.strip:
+        output["stdout"] = output["stdout"].strip()
+    if output["return_code"]:
+        msg = f"Error running '{task.name}' task with {args}:"
+        if output["stderr"]:
+            msg += "\n\nstderr:\n" + output["stderr"]
+        if output["stdout"]:
+            msg += "\n\nstdout:\n" + output["stdout"]
+        raise RuntimeError(msg)
+    return output
+
+
+class Local(Native):
+    """Native environment with automatic thread budgeting and hard limits.
+
+    Parameters
+    ----------
+    slots_dir : path-like, optional
+        Directory registering the tasks running on the host, see :class:`~.threads.SlotRegistry`.
+    limits : Limits, optional
+        Hard limits applied to every task.
+    limits_from_profile : bool
+        Derive hard limits from the resource profile of each task, unless set explicitly.
+    watchdog : bool
+        Terminate tasks as soon as their output reports a known fatal error, see :mod:`~.watchdog`.
+    store : ResultStore, optional
+        Restore the outputs of deterministic tasks from a shared store, and publish them after execution.
+    """
+
+    def __init__(
+        self,
+        slots_dir: os.PathLike | None = None,
+        limits: Limits | None = None,
+        limits_from_profile: bool = False,
+        watchdog: bool = True,
+        store: ResultStore | None = None,
+    ):
+        self.slots = SlotRegistry(slots_dir)
+        self.limits = limits
+        self.limits_from_profile = limits_from_profile
+        self.watchdog = watchdog
+        self.store = store
+
+    def get_limits(self, task: ShellCommandTask) -> Limits | None:
+        """Return the hard limits applied to a task."""
+        if self.limits is None and self.limits_from_profile:
+            return Limits.from_resources(get_resources(task))
+        return self.limits
+
+    def execute(self, task: ShellCommandTask) -> dict:
+        # Tasks are executed from their output directory.
+        output_dir = Path.cwd()
+        key = self.store.get_key(task) if self.store is not None else None
+        if key is not None:
+            output = self.store.restore(key, task, output_dir)
+            if output is not None:
+                return output
+        limits = self.get_limits(task)
+        watchdog = Watchdog.for_executable(task.inputs.executable) if self.watchdog else None
+        with self.slots.acquire():
+            env = apply_thread_budget(task, get_thread_budget(concurrent_tasks=self.slots.count()))
+            args = task.command_args()
+            return_code, stdout, stderr = run_process(args, limits=limits, env=env, watchdog=watchdog)
+        output = make_output(task, args, return_code, stdout, stderr)
+        if key is not None:
+            self.store.publish(key, task, output_dir, output)
+        return output
+
+
+class InProcess(Local):
+    """Local environment running natively implemented invocations in the Python process.
+
+    Native engines run under the thread budget of the host, and invocations they do not implement
+    run FreeSurfer's binaries as in the :class:`Local` environment, with the same parameters.
+    """
+
+    def execute(self, task: ShellCommandTask) -> dict:
+        engine = get_engine(task)
+        if engine is not None:
+            with self.slots.acquire():
+                try:
+                    return engine(task, get_thread_budget(concurrent_tasks=self.slots.count()))
+                except Unsupported:
+                    pass
+        return super().execute(task)
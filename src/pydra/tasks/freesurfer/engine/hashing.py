@@ -0,0 +1,55 @@
+"""
+Hashing
+=======
+
+Fast content hashing of input files.
+
+Files are hashed in chunks with BLAKE3 or XXH3 when the ``blake3`` or ``xxhash`` packages are installed,
+and with BLAKE2b from the standard library otherwise.
+Digests are prefixed with the name of the algorithm, so that they never collide across hosts
+with different packages installed:
+
+>>> file_digest(__file__)  # doctest: +ELLIPSIS
+'...:...'
+
+Digests shared across hosts, such as the keys of a result store, are computed with a fixed algorithm instead:
+
+>>> file_digest(__file__, algorithm="sha256")  # doctest: +ELLIPSIS
+'sha256:...'
+"""
+
+from __future__ import annotations
+
+__all__ = ["file_digest", "get_hasher"]
+
+import functools
+import hashlib
+import os
+
+from pydra.tasks.freesurfer._hashing import get_hasher
+
+#: Size of the chunks read from files being hashed.
+CHUNK_SIZE = 2**22
+
+
+@functools.lru_cache(maxsize=4096)
+def _file_digest(path: str, size: int, mtime_ns: int, algorithm: str | None) -> str:
+    name, hasher = (algorithm, functools.partial(hashlib.new, algorithm)) if algorithm else get_hasher()
+    digest = hasher()
+    with open(path, "rb") as f:
+        buffer = bytearray(CHUNK_SIZE)
+        view = memoryview(buffer)
+        for n in iter(lambda: f.readinto(buffer), 0):
+            digest.update(view[:n])
+    return f"{name}:{digest.hexdigest()}"
+
+
+def file_digest(path: os.PathLike, algorithm: str | None = None) -> str:
+    """Return the digest of a file's content.
+
+    Digests are computed with the fastest available hash function, or with the given algorithm of :mod:`hashlib`,
+    and memoized by path, size and modification time.
+    """
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    return _file_digest(path, stat.st_size, stat.st_mtime_ns, algorithm)
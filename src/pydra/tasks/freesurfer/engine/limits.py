@@ -0,0 +1,288 @@
+"""
+Limits
+======
+
+Hard wall-time and memory limits for FreeSurfer's command-line tools.
+
+Commands run in their own process group, so that the whole group is terminated
+when a limit is breached, and any process left behind is reclaimed once the command exits.
+
+Memory is limited for the whole command, children included, with a cgroup v2 child group
+where the current cgroup is delegated to the user, as by systemd's ``Delegate=yes``:
+the current process then joins a leaf of its cgroup, which may only delegate the memory controller without processes,
+provided that it is the only process of its cgroup, as in a service but not in a login session or a shared job step.
+Otherwise a warning is logged, and memory is limited per process, each process of the command being allowed
+the whole limit of private writable memory (``RLIMIT_DATA``), file mappings and reserved address space excluded.
+
+Commands are started through ``/bin/sh``, which joins the child group or sets the limit before executing them,
+so that no Python code runs between fork and exec while reader threads run.
+
+A breach is reported as a :class:`LimitExceeded` error classified by its reason:
+
+>>> Limits(wall_time=60, memory=4096)
+Limits(wall_time=60, memory=4096)
+>>> Limits.from_resources(Resources(cores=1, memory=1024, wall_time=10))
+Limits(wall_time=20, memory=2048)
+"""
+
+from __future__ import annotations
+
+__all__ = ["LimitExceeded", "Limits", "run_process"]
+
+import contextlib
+import functools
+import logging
+import os
+import re
+import signal
+import subprocess
+import threading
+import uuid
+from pathlib import Path
+from typing import Mapping, Sequence
+
+from attrs import define
+
+from pydra.tasks.freesurfer.engine.resources import Resources
+from pydra.tasks.freesurfer.engine.watchdog import FatalLogMessage, Watchdog
+
+logger = logging.getLogger(__name__)
+
+#: Multiplier applied to profiled resources to obtain hard limits.
+LIMITS_MARGIN = 2
+
+#: Delay in seconds between terminating and killing a process group.
+KILL_DELAY = 10
+
+#: Error messages printed by tools failing to allocate memory.
+OUT_OF_MEMORY_PATTERN = re.compile(r"Cannot allocate memory|std::bad_alloc|[Oo]ut of memory|could not alloc|MemoryError")
+
+
+class LimitExceeded(RuntimeError):
+    """A command breached one of its limits.
+
+    Attributes
+    ----------
+    reason : str
+        Either ``"wall_time"`` or ``"memory"``.
+    """
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+@define(frozen=True, kw_only=True)
+class Limits:
+    """Hard limits of a command, with wall time in minutes and memory in MiB."""
+
+    wall_time: float | None = None
+
+    memory: int | None = None
+
+    @classmethod
+    def from_resources(cls, resources: Resources, margin: float = LIMITS_MARGIN) -> Limits:
+        """Derive limits from the resources requested by a task."""
+        return cls(wall_time=int(resources.wall_time * margin), memory=int(resources.memory * margin))
+
+
+#: Name of the leaf cgroup the current process joins, for its cgroup to delegate the memory controller.
+LEAF_CGROUP = "pydra-freesurfer"
+
+
+def _delegate_memory(cgroup_dir: Path) -> Path | None:
+    subtree_control = cgroup_dir / "cgroup.subtree_control"
+    if "memory" in subtree_control.read_text().split():
+        return cgroup_dir
+    if "memory" not in (cgroup_dir / "cgroup.controllers").read_text().split():
+        logger.warning("Memory controller is not available to cgroup %s", cgroup_dir)
+        return None
+    # Cgroups other than the root may not both hold processes and delegate controllers to their children,
+    # hence the current process joins a leaf, provided that it is the only process of its cgroup.
+    pid = str(os.getpid())
+    others = set((cgroup_dir / "cgroup.procs").read_text().split()) - {pid}
+    if others:
+        logger.warning("Cgroup %s holds other processes and cannot delegate the memory controller", cgroup_dir)
+        return None
+    leaf = cgroup_dir / LEAF_CGROUP
+    leaf.mkdir(exist_ok=True)
+    try:
+        (leaf / "cgroup.procs").write_text(pid)
+        subtree_control.write_text("+memory")
+    except OSError as e:
+        # Processes may have joined the cgroup meanwhile, or the cgroup may not be delegated to the user.
+        with contextlib.suppress(OSError):
+            (cgroup_dir / "cgroup.procs").write_text(pid)
+        with contextlib.suppress(OSError):
+            leaf.rmdir()
+        logger.warning("Cannot delegate the memory controller of cgroup %s: %s", cgroup_dir, e)
+        return None
+    return cgroup_dir
+
+
+@functools.lru_cache(maxsize=None)
+def _get_cgroup_dir(root: Path = Path("/sys/fs/cgroup")) -> Path | None:
+    # Only cgroup v2 exposes a single unified hierarchy, as "0::<path>".
+    try:
+        for line in Path("/proc/self/cgroup").read_text().splitlines():
+            if line.startswith("0::"):
+                cgroup_dir = root / line[3:].strip().lstrip("/")
+                if cgroup_dir.name == LEAF_CGROUP:
+                    cgroup_dir = cgroup_dir.parent
+                cgroup_dir = _delegate_memory(cgroup_dir)
+                break
+        else:
+            cgroup_dir = None
+            logger.warning("Cgroup v2 is not available")
+    except OSError as e:
+        cgroup_dir = None
+        logger.warning("Cgroup v2 is not available: %s", e)
+    if cgroup_dir is None:
+        logger.warning("Memory limits are enforced per process, and not for commands as a whole")
+    return cgroup_dir
+
+
+@contextlib.contextmanager
+def _memory_cgroup(memory: int | None):
+    cgroup_dir = _get_cgroup_dir() if memory else None
+    if cgroup_dir is None:
+        yield None
+        return
+    child = cgroup_dir / f"pydra-freesurfer-{uuid.uuid4().hex}"
+    try:
+        child.mkdir()
+        (child / "memory.max").write_text(str(memory * 2**20))
+        if (child / "memory.swap.max").exists():
+            (child / "memory.swap.max").write_text("0")
+    except OSError as e:
+        with contextlib.suppress(OSError):
+            child.rmdir()
+        logger.warning("Cannot create cgroup %s, memory is limited per process: %s", child, e)
+        yield None
+        return
+    try:
+        yield child
+    finally:
+        with contextlib.suppress(OSError):
+            (child / "cgroup.kill").write_text("1")
+        with contextlib.suppress(OSError):
+            child.rmdir()
+
+
+def _oom_killed(cgroup: Path | None) -> bool:
+    if cgroup is None:
+        return False
+    with contextlib.suppress(OSError, ValueError):
+        for line in (cgroup / "memory.events").read_text().splitlines():
+            key, value = line.split()
+            if key == "oom_kill" and int(value):
+                return True
+    return False
+
+
+def _kill_group(pgid: int, sig: int = signal.SIGKILL):
+    with contextlib.suppress(ProcessLookupError, PermissionError):
+        os.killpg(pgid, sig)
+
+
+def _read_stream(stream, chunks: list, on_line=None):
+    pending = b""
+    for chunk in iter(lambda: stream.read1(2**16), b""):
+        chunks.append(chunk)
+        if on_line is not None:
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                on_line(line.decode("utf-8", "replace"))
+    if on_line is not None and pending:
+        on_line(pending.decode("utf-8", "replace"))
+    stream.close()
+
+
+def run_process(
+    args: Sequence[str],
+    limits: Limits | None = None,
+    env: Mapping[str, str] | None = None,
+    cwd: os.PathLike | None = None,
+    watchdog: Watchdog | None = None,
+) -> tuple[int, bytes, bytes]:
+    """Run a command in its own process group within limits.
+
+    Returns the return code, standard output and standard error of the command.
+    Raises :class:`LimitExceeded` if the command breached one of its limits,
+    or :class:`~.watchdog.FatalLogMessage` if its output reported a fatal error to the watchdog.
+    """
+    limits = limits or Limits()
+    with _memory_cgroup(limits.memory) as cgroup:
+        command = list(args)
+        if cgroup is not None:
+            # The shell moves itself into the child group, then executes the command.
+            command = ["/bin/sh", "-c", 'echo 0 > "$1" && shift && exec "$@"', "sh", str(cgroup / "cgroup.procs")]
+            command += args
+        elif limits.memory:
+            command = ["/bin/sh", "-c", 'ulimit -d "$1" && shift && exec "$@"', "sh", str(limits.memory * 2**10)]
+            command += args
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            cwd=cwd,
+            start_new_session=True,
+        )
+        fatal, timers = [], []
+        lock = threading.Lock()
+
+        def on_line(line: str):
+            match = watchdog.scan(line)
+            with lock:
+                if match is None or fatal:
+                    return
+                fatal.append(match)
+            # Terminate the command at once, then kill it if it lingers.
+            _kill_group(process.pid, signal.SIGTERM)
+            timer = threading.Timer(KILL_DELAY, _kill_group, args=(process.pid,))
+            timer.daemon = True
+            timer.start()
+            timers.append(timer)
+
+        on_line = on_line if watchdog is not None else None
+        stdout, stderr = [], []
+        readers = [
+            threading.Thread(target=_read_stream, args=(process.stdout, stdout, on_line), daemon=True),
+            threading.Thread(target=_read_stream, args=(process.stderr, stderr, on_line), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        timeout = limits.wall_time * 60 if limits.wall_time else None
+        timed_out = False
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            _kill_group(process.pid, signal.SIGTERM)
+            try:
+                process.wait(timeout=KILL_DELAY)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        finally:
+            # Reclaim any process left behind in the group, which may also hold the output streams open.
+            _kill_group(process.pid)
+            for reader in readers:
+                reader.join()
+            for timer in timers:
+                timer.cancel()
+        stdout, stderr = b"".join(stdout), b"".join(stderr)
+        # Memory breaches are classified first, as tools failing to allocate memory also report it to the watchdog.
+        if limits.memory and (
+            _oom_killed(cgroup)
+            or any(match.reason == "out_of_memory" for match in fatal)
+            or (process.returncode and OUT_OF_MEMORY_PATTERN.search((stdout + stderr).decode("utf-8", "replace")))
+        ):
+            raise LimitExceeded("memory", f"Command exceeded its memory limit of {limits.memory} MiB: {args}")
+        if fatal:
+            (match,) = fatal
+            raise FatalLogMessage(match.reason, match.line, f"Command reported a fatal error ({match.reason}): {args}")
+        if timed_out:
+            raise LimitExceeded("wall_time", f"Command exceeded its wall time of {limits.wall_time} minutes: {args}")
+    return process.returncode, stdout, stderr
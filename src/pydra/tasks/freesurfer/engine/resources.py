@@ -0,0 +1,231 @@
+"""
+Resources
+=========
+
+Resource profiles declared by task definitions.
+
+FreeSurfer's tools have very different footprints, from seconds and megabytes for ``mri_binarize``
+to hours and gigabytes for ``recon-all``. Each task definition declares a default :class:`ResourceProfile`,
+which is resolved against the task's inputs into concrete :class:`Resources`:
+
+>>> from pydra.tasks.freesurfer.mri.robust_template import RobustTemplate
+>>> task = RobustTemplate(input_volumes=["tp1.mgz", "tp2.mgz", "tp3.mgz"])
+>>> get_resources(task)
+Resources(cores=1, memory=6656, wall_time=120, scratch=3072)
+
+Profiles may be overridden per deployment with a JSON file mapping task names to profile fields,
+pointed to by the ``PYDRA_FREESURFER_RESOURCES`` environment variable::
+
+    {"ReconAll": {"memory": 12288, "wall_time": 2880}}
+
+The workers defined here use the resolved resources to pack jobs on the local host
+or to request them from SLURM.
+"""
+
+from __future__ import annotations
+
+__all__ = [
+    "ResourceProfile",
+    "Resources",
+    "get_resource_profile",
+    "get_resources",
+    "ResourceAwareWorker",
+    "ResourceAwareSlurmWorker",
+]
+
+import asyncio
+import json
+import os
+from collections.abc import Sized
+from typing import Mapping
+
+from attrs import NOTHING, define, evolve, fields
+
+from pydra.engine.core import TaskBase
+from pydra.engine.workers import ConcurrentFuturesWorker, SlurmWorker
+
+RESOURCES_ENVVAR = "PYDRA_FREESURFER_RESOURCES"
+
+
+@define(frozen=True, kw_only=True)
+class Resources:
+    """Resources requested by a task.
+
+    Memory and scratch space are expressed in MiB, wall time in minutes.
+    """
+
+    cores: int = 1
+
+    memory: int = 512
+
+    wall_time: int = 10
+
+    scratch: int = 0
+
+    @property
+    def sbatch_directives(self) -> list[str]:
+        """Equivalent ``#SBATCH`` directives."""
+        directives = [
+            f"#SBATCH --cpus-per-task={self.cores}",
+            f"#SBATCH --mem={self.memory}M",
+            f"#SBATCH --time={self.wall_time}",
+        ]
+        if self.scratch:
+            directives.append(f"#SBATCH --tmp={self.scratch}M")
+        return directives
+
+
+@define(frozen=True, kw_only=True)
+class ResourceProfile(Resources):
+    """Default resources of a task definition, scaled by its inputs.
+
+    Parameters
+    ----------
+    threads_input : str, optional
+        Input setting the number of threads used by the tool, which overrides the number of cores.
+    scaling_input : str, optional
+        Sequence input whose length scales memory, wall time and scratch space.
+    memory_per_item : int
+        Additional memory per item of the scaling input.
+    wall_time_per_item : int
+        Additional wall time per item of the scaling input.
+    scratch_per_item : int
+        Additional scratch space per item of the scaling input.
+    """
+
+    threads_input: str | None = None
+
+    scaling_input: str | None = None
+
+    memory_per_item: int = 0
+
+    wall_time_per_item: int = 0
+
+    scratch_per_item: int = 0
+
+    def resolve(self, inputs) -> Resources:
+        """Resolve the profile against a task's inputs."""
+        cores = self.cores
+        if self.threads_input:
+            num_threads = getattr(inputs, self.threads_input, NOTHING)
+            if isinstance(num_threads, int) and num_threads > 0:
+                cores = num_threads
+        num_items = 0
+        if self.scaling_input:
+            items = getattr(inputs, self.scaling_input, NOTHING)
+            if isinstance(items, Sized) and not isinstance(items, str):
+                num_items = len(items)
+        return Resources(
+            cores=cores,
+            memory=self.memory + num_items * self.memory_per_item,
+            wall_time=self.wall_time + num_items * self.wall_time_per_item,
+            scratch=self.scratch + num_items * self.scratch_per_item,
+        )
+
+
+def _load_overrides() -> Mapping[str, Mapping[str, int]]:
+    path = os.getenv(RESOURCES_ENVVAR)
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def get_resource_profile(task: TaskBase, overrides: Mapping[str, Mapping[str, int]] | None = None) -> ResourceProfile:
+    """Return the resource profile of a task, with deployment overrides applied.
+
+    Overrides are looked up by task class name,
+    from the given mapping or from the file pointed to by ``PYDRA_FREESURFER_RESOURCES``.
+    """
+    profile = getattr(task, "resource_profile", None) or ResourceProfile()
+    if overrides is None:
+        overrides = _load_overrides()
+    override = overrides.get(type(task).__name__, {})
+    unknown = set(override) - {f.name for f in fields(ResourceProfile)}
+    if unknown:
+        raise ValueError(f"Unknown resource fields for {type(task).__name__}: {', '.join(sorted(unknown))}")
+    return evolve(profile, **override)
+
+
+def get_resources(task: TaskBase, overrides: Mapping[str, Mapping[str, int]] | None = None) -> Resources:
+    """Return the resources requested by a task given its inputs."""
+    return get_resource_profile(task, overrides=overrides).resolve(task.inputs)
+
+
+def _get_runnable_resources(runnable) -> Resources:
+    if isinstance(runnable, TaskBase):
+        return get_resources(runnable)
+    # Resolve against the inputs of the specific state element.
+    ind, _, task = runnable
+    inputs = evolve(task.inputs, **task.get_input_el(ind))
+    return get_resource_profile(task).resolve(inputs)
+
+
+class ResourceAwareWorker(ConcurrentFuturesWorker):
+    """A concurrent futures worker packing tasks according to their resources.
+
+    Tasks are admitted as long as the sum of their requested cores and memory fits within the host's capacity.
+    A task requesting more than the capacity of the host runs alone.
+
+    Parameters
+    ----------
+    n_procs : int, optional
+        Number of cores available to the worker. Defaults to the number of available CPUs.
+    memory : int, optional
+        Memory available to the worker in MiB. Defaults to the physical memory of the host.
+    """
+
+    plugin_name = "freesurfer-cf"
+
+    def __init__(self, n_procs: int | None = None, memory: int | None = None):
+        super().__init__(n_procs=n_procs)
+        self.memory = memory or os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2**20
+        self._used_cores = 0
+        self._used_memory = 0
+        self._condition = None
+
+    @property
+    def condition(self) -> asyncio.Condition:
+        # Created lazily to bind to the running event loop.
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _fits(self, resources: Resources) -> bool:
+        if not (self._used_cores or self._used_memory):
+            return True
+        return (
+            self._used_cores + resources.cores <= self.n_procs and self._used_memory + resources.memory <= self.memory
+        )
+
+    async def exec_as_coro(self, runnable, rerun=False, environment=None):
+        """Run a task (coroutine wrapper), once enough resources are available."""
+        resources = _get_runnable_resources(runnable)
+        async with self.condition:
+            await self.condition.wait_for(lambda: self._fits(resources))
+            self._used_cores += resources.cores
+            self._used_memory += resources.memory
+        try:
+            return await super().exec_as_coro(runnable, rerun=rerun, environment=environment)
+        finally:
+            async with self.condition:
+                self._used_cores -= resources.cores
+                self._used_memory -= resources.memory
+                self.condition.notify_all()
+
+
+class ResourceAwareSlurmWorker(SlurmWorker):
+    """A SLURM worker requesting resources according to each task's profile.
+
+    Resources are written as ``#SBATCH`` directives in the batch script,
+    so that arguments passed explicitly with ``sbatch_args`` take precedence.
+    """
+
+    plugin_name = "freesurfer-slurm"
+
+    def _prepare_runscripts(self, task, interpreter="/bin/sh", rerun=False):
+        script_dir, batchscript = super()._prepare_runscripts(task, interpreter=interpreter, rerun=rerun)
+        shebang, _, body = batchscript.read_text().partition("\n")
+        directives = _get_runnable_resources(task).sbatch_directives
+        batchscript.write_text("\n".join([shebang, *directives, body]))
+        return script_dir, batchscript
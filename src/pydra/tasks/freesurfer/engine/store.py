@@ -0,0 +1,266 @@
+"""
+Store
+=====
+
+Content-addressed result store shared across workflows and projects.
+
+Pydra caches results per cache directory, so expensive tools are run again by every project,
+even though tools such as ``gtmseg`` or ``mri_robust_template`` always produce the same outputs given the same inputs.
+A :class:`ResultStore` keeps the outputs of these deterministic tasks
+under a key derived from the content of their input files and the canonical form of their other inputs
+(see :mod:`~.canonical`):
+
+>>> from pydra.tasks.freesurfer.engine import Local
+>>> from pydra.tasks.freesurfer.gtmseg import GTMSeg
+>>> store = ResultStore("/path/to/store")
+>>> task = GTMSeg(subject_id="sub-01", generate_segmentation=True, environment=Local(store=store))
+
+The :class:`~.environments.Local` environment looks up the store before executing a task,
+and publishes the outputs of the task to the store afterwards.
+Entries are staged in a temporary directory then renamed into place,
+so that concurrent writers never expose partial entries, and the first complete entry wins.
+
+Keys are computed with a fixed hash function, so that hosts with different hashing packages installed
+share the same entries.
+Every file of the output directory is stored, in subdirectories too,
+but tasks writing outputs outside of their output directory, as given by absolute paths, are not stored.
+
+Only tasks listed in :data:`DETERMINISTIC_TASKS` are stored:
+
+>>> store.supports(task)
+True
+"""
+
+from __future__ import annotations
+
+__all__ = ["DETERMINISTIC_TASKS", "ResultStore", "StoreSpec"]
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Iterable
+
+import attrs
+from attrs import define
+
+from pydra.engine.task import ShellCommandTask
+from pydra.tasks.freesurfer.engine.canonical import get_canonical_inputs
+from pydra.tasks.freesurfer.engine.hashing import file_digest
+from pydra.tasks.freesurfer.engine.threads import THREAD_INPUTS
+
+MANIFEST_NAME = "manifest.json"
+
+#: Hash function of the keys and of the digests of input files, the same on every host.
+KEY_ALGORITHM = "sha256"
+
+#: Inputs which never change the outputs of a task.
+IGNORED_INPUTS = ("subjects_dir", *THREAD_INPUTS)
+
+
+def _no_files(inputs) -> tuple:
+    return ()
+
+
+@define(frozen=True)
+class StoreSpec:
+    """Files of a subjects directory read and written by a deterministic task.
+
+    Parameters
+    ----------
+    subject_inputs : callable
+        Return the files read by the task given its inputs, relative to the subjects directory.
+    subject_outputs : callable
+        Return the files written by the task given its inputs, relative to the subjects directory.
+    """
+
+    subject_inputs: Callable[..., Iterable[str]] = _no_files
+
+    subject_outputs: Callable[..., Iterable[str]] = _no_files
+
+
+def _gtmseg_inputs(inputs) -> list[str]:
+    subject = inputs.subject_id
+    files = [f"{subject}/mri/{name}" for name in ("orig.mgz", "nu.mgz", "aseg.mgz", "aparc+aseg.mgz")]
+    files += [f"{subject}/surf/{hemi}.{surface}" for hemi in ("lh", "rh") for surface in ("white", "pial")]
+    if inputs.head_segmentation:
+        files.append(f"{subject}/mri/{inputs.head_segmentation}")
+    elif inputs.generate_segmentation is False:
+        files.append(f"{subject}/mri/apas+head.mgz")
+    return files
+
+
+def _gtmseg_outputs(inputs) -> list[str]:
+    stem = re.sub(r"\.(?:mgz|mgh|nii|nii\.gz)$", "", inputs.output_volume)
+    files = [f"{inputs.subject_id}/mri/{name}" for name in (inputs.output_volume, f"{stem}.ctab", f"{stem}.lta")]
+    if inputs.generate_segmentation is True:
+        files.append(f"{inputs.subject_id}/mri/apas+head.mgz")
+    return files
+
+
+def _coreg_inputs(inputs) -> list[str]:
+    return [f"{inputs.subject_id}/mri/aparc+aseg.mgz"] if inputs.subject_id else []
+
+
+def _catrain_inputs(inputs) -> list[str]:
+    annotation = os.fspath(inputs.annotation_file)
+    annotation = annotation if annotation.endswith(".annot") else f"{annotation}.annot"
+    files = []
+    for subject in inputs.subject_ids:
+        files += [
+            f"{subject}/surf/{inputs.hemisphere}.{inputs.canonical_surface}",
+            f"{subject}/surf/{inputs.hemisphere}.{inputs.original_surface}",
+            f"{subject}/label/{inputs.hemisphere}.{annotation}",
+        ]
+    return files
+
+
+#: Deterministic tasks, by name, with the files of the subjects directory they read and write.
+DETERMINISTIC_TASKS = {
+    "GTMSeg": StoreSpec(subject_inputs=_gtmseg_inputs, subject_outputs=_gtmseg_outputs),
+    "Coreg": StoreSpec(subject_inputs=_coreg_inputs),
+    "RobustRegister": StoreSpec(),
+    "RobustTemplate": StoreSpec(),
+    "CATrain": StoreSpec(subject_inputs=_catrain_inputs),
+}
+
+
+def _get_subjects_dir(task: ShellCommandTask) -> Path:
+    return Path(getattr(task.inputs, "subjects_dir", None) or os.getenv("SUBJECTS_DIR") or ".")
+
+
+def _get_version() -> str | None:
+    with contextlib.suppress(OSError, TypeError):
+        return (Path(os.getenv("FREESURFER_HOME")) / "build-stamp.txt").read_text().strip()
+    return None
+
+
+def _normalize(value, digest: bool):
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item, digest) for item in value]
+    if digest and isinstance(value, (str, os.PathLike)) and os.path.isfile(value):
+        # Output names may derive from input names, which are thus part of the key.
+        return {"name": os.path.basename(value), "digest": file_digest(value, algorithm=KEY_ALGORITHM)}
+    return value
+
+
+def _is_outside(value, output_dir: os.PathLike) -> bool:
+    if isinstance(value, (list, tuple)):
+        return any(_is_outside(item, output_dir) for item in value)
+    if not isinstance(value, (str, os.PathLike)):
+        return False
+    output_dir = os.path.abspath(output_dir)
+    path = os.path.normpath(os.path.join(output_dir, value))
+    return os.path.commonpath([path, output_dir]) != output_dir
+
+
+def _copy_tree(source: Path, target: Path):
+    for path in source.rglob("*"):
+        if path.is_file():
+            destination = target / path.relative_to(source)
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(path, destination)
+
+
+class ResultStore:
+    """A content-addressed store of the outputs of deterministic tasks.
+
+    Parameters
+    ----------
+    root : path-like
+        Directory of the store, which may be shared between users and hosts.
+    tasks : dict, optional
+        Stored tasks with their specifications. Defaults to :data:`DETERMINISTIC_TASKS`.
+    """
+
+    def __init__(self, root: os.PathLike, tasks: dict[str, StoreSpec] | None = None):
+        self.root = Path(root)
+        self.tasks = DETERMINISTIC_TASKS if tasks is None else tasks
+
+    def supports(self, task: ShellCommandTask) -> bool:
+        """Whether the outputs of a task are stored."""
+        return type(task).__name__ in self.tasks
+
+    def get_key(self, task: ShellCommandTask) -> str | None:
+        """Return the key of a task, or None if its outputs are not stored or its input files are missing.
+
+        Outputs written outside of the output directory of the task are not stored, restoring them being left to it.
+        """
+        if not self.supports(task):
+            return None
+        spec = self.tasks[type(task).__name__]
+        record = {"task": type(task).__name__, "version": _get_version(), "inputs": {}}
+        canonical = get_canonical_inputs(task)
+        for field in attrs.fields(type(task.inputs)):
+            value = canonical.get(field.name, getattr(task.inputs, field.name))
+            if field.name.startswith("_") or field.name in IGNORED_INPUTS or value is attrs.NOTHING:
+                continue
+            if "output_file_template" in field.metadata and _is_outside(value, task.output_dir):
+                return None
+            # Outputs of a previous attempt may exist under the names of output fields.
+            record["inputs"][field.name] = _normalize(value, digest="output_file_template" not in field.metadata)
+        subjects_dir = _get_subjects_dir(task)
+        try:
+            record["subject_inputs"] = {
+                path: file_digest(subjects_dir / path, algorithm=KEY_ALGORITHM)
+                for path in spec.subject_inputs(task.inputs)
+            }
+        except FileNotFoundError:
+            return None
+        return hashlib.sha256(json.dumps(record, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get_entry(self, key: str) -> Path:
+        """Return the directory of an entry."""
+        return self.root / key[:2] / key
+
+    def restore(self, key: str, task: ShellCommandTask, output_dir: os.PathLike) -> dict | None:
+        """Copy the outputs of a stored entry for a task, returning the task output, or None if not stored."""
+        entry = self.get_entry(key)
+        try:
+            manifest = json.loads((entry / MANIFEST_NAME).read_text())
+        except FileNotFoundError:
+            return None
+        _copy_tree(entry / "output", Path(output_dir))
+        _copy_tree(entry / "subjects", _get_subjects_dir(task))
+        with contextlib.suppress(OSError):
+            os.utime(entry / MANIFEST_NAME)
+        return manifest["output"]
+
+    def publish(self, key: str, task: ShellCommandTask, output_dir: os.PathLike, output: dict) -> bool:
+        """Publish the outputs of a task, returning whether the entry was created by this call."""
+        entry = self.get_entry(key)
+        if entry.exists():
+            return False
+        staging = self.root / ".staging" / uuid.uuid4().hex
+        try:
+            for path in Path(output_dir).iterdir():
+                # Pydra's own files are named with a leading underscore.
+                if path.name.startswith("_"):
+                    continue
+                (staging / "output").mkdir(parents=True, exist_ok=True)
+                if path.is_dir():
+                    _copy_tree(path, staging / "output" / path.name)
+                elif path.is_file():
+                    shutil.copy2(path, staging / "output" / path.name)
+            subjects_dir = _get_subjects_dir(task)
+            for name in self.tasks[type(task).__name__].subject_outputs(task.inputs):
+                if (subjects_dir / name).is_file():
+                    (staging / "subjects" / name).parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(subjects_dir / name, staging / "subjects" / name)
+            staging.mkdir(parents=True, exist_ok=True)
+            manifest = {"task": type(task).__name__, "created": time.time(), "output": output}
+            (staging / MANIFEST_NAME).write_text(json.dumps(manifest))
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.rename(staging, entry)
+            except OSError:
+                # Another writer published the same entry first.
+                return False
+            return True
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
@@ -0,0 +1,120 @@
+import json
+import os
+import time
+
+import pytest
+
+from pydra import Submitter, Workflow
+from pydra.engine.task import ShellCommandTask
+
+from pydra.tasks.freesurfer.engine import cache
+from pydra.tasks.freesurfer.mri.binarize import Binarize
+
+
+def make_entry(cache_dir, name, size, age):
+    path = cache_dir / name
+    path.mkdir()
+    (path / "_result.pklz").write_bytes(os.urandom(size))
+    timestamp = time.time() - age
+    os.utime(path / "_result.pklz", (timestamp, timestamp))
+    os.utime(path, (timestamp, timestamp))
+    return path
+
+
+def test_task_names():
+    assert {"Binarize", "ExtractROIs", "ReconAll", "TkRegister2"} <= cache.get_task_names()
+
+
+def test_unmanaged_entries_are_ignored(tmp_path):
+    make_entry(tmp_path, "FunctionTask_0123", 4096, 100)
+
+    assert cache.CacheManager(tmp_path, budget=0).entries() == []
+
+
+def test_evict_least_recently_used(tmp_path):
+    make_entry(tmp_path, "Binarize_old", 4096, 300)
+    make_entry(tmp_path, "Binarize_mid", 4096, 200)
+    recent = make_entry(tmp_path, "Vol2Vol_new", 4096, 100)
+
+    manager = cache.CacheManager(tmp_path, budget=5000)
+    evicted = manager.evict()
+
+    assert [entry.name for entry in evicted] == ["Binarize_old", "Binarize_mid"]
+    assert [entry.path for entry in manager.entries()] == [recent]
+
+
+def test_evict_after_access(tmp_path):
+    make_entry(tmp_path, "Binarize_old", 4096, 300)
+    make_entry(tmp_path, "Binarize_mid", 4096, 200)
+    make_entry(tmp_path, "Vol2Vol_new", 4096, 100)
+    manager = cache.CacheManager(tmp_path, budget=5000)
+    manager.entries()
+
+    # The access is recorded although reading the result file may leave its access time untouched.
+    cache.record_access(tmp_path / "Binarize_old")
+    evicted = manager.evict()
+
+    assert [entry.name for entry in evicted] == ["Binarize_mid", "Vol2Vol_new"]
+    assert [entry.name for entry in manager.entries()] == ["Binarize_old"]
+
+
+def test_index_is_reused(tmp_path, monkeypatch):
+    make_entry(tmp_path, "Binarize_0123", 4096, 100)
+    manager = cache.CacheManager(tmp_path, budget=2**30)
+    entries = manager.entries()
+
+    monkeypatch.setattr(cache, "_get_size", lambda path: 1 / 0)
+
+    assert manager.entries() == entries
+
+
+def test_pinned_entries_are_kept(tmp_path):
+    pinned = make_entry(tmp_path, "Binarize_pinned", 4096, 300)
+    locked = make_entry(tmp_path, "Binarize_locked", 4096, 300)
+    (tmp_path / "Binarize_locked.lock").touch()
+    make_entry(tmp_path, "Binarize_other", 4096, 200)
+
+    manager = cache.CacheManager(tmp_path, budget=0)
+    with manager.pinned(names=["Binarize_pinned"]):
+        evicted = manager.evict()
+
+    assert [entry.name for entry in evicted] == ["Binarize_other"]
+    assert pinned.exists() and locked.exists()
+
+
+def test_pinned_task(tmp_path):
+    task = Binarize(input_volume="aseg.mgz", min_value=1, cache_dir=tmp_path)
+    make_entry(tmp_path, task.checksum, 4096, 300)
+
+    manager = cache.CacheManager(tmp_path, budget=0)
+    with manager.pinned(task):
+        assert manager.evict() == []
+    assert [entry.name for entry in manager.evict()] == [task.checksum]
+
+
+def test_pinned_workflow(tmp_path):
+    workflow = Workflow(name="workflow", input_spec=["args"], args="hello", cache_dir=tmp_path)
+    workflow.add(ShellCommandTask(name="echo_split", executable="echo").split(args=["a", "b"]))
+    workflow.add(ShellCommandTask(name="echo_lazy", executable="echo", args=workflow.lzin.args))
+    workflow.set_output([("stdout", workflow.echo_lazy.lzout.stdout)])
+
+    manager = cache.CacheManager(tmp_path, budget=0)
+    with manager.pinned(workflow) as pin:
+        names = set(json.loads(pin.read_text())["names"])
+
+    # Checksums of nodes with lazy inputs are unknown beforehand.
+    assert names == {workflow.checksum, *workflow.echo_split.checksum_states()}
+
+
+@pytest.mark.parametrize("plugin", ["serial", "cf"])
+def test_track_accesses(tmp_path, plugin):
+    task = ShellCommandTask(name="echo", executable="echo", args="hello", cache_dir=tmp_path)
+    task()
+    result_file = task.output_dir / "_result.pklz"
+    os.utime(result_file, (0, 0))
+
+    cache.track_accesses(task)
+    with Submitter(plugin=plugin) as submitter:
+        submitter(task)
+
+    assert result_file.stat().st_mtime > time.time() - 60
@@ -0,0 +1,38 @@
+from pydra.tasks.freesurfer.engine.canonical import canonicalize, get_canonical_inputs
+from pydra.tasks.freesurfer.gtmseg import GTMSeg
+from pydra.tasks.freesurfer.mri.coreg import Coreg
+from pydra.tasks.freesurfer.mri.label2vol import Label2Vol
+
+
+def test_equivalent_checksums(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SUBJECTS_DIR", str(tmp_path / "subjects"))
+    (tmp_path / "template.nii").touch()
+
+    tasks = [
+        Coreg(source_volume="template.nii", target_volume="$SUBJECTS_DIR/sub-01/mri/orig.mgz"),
+        Coreg(
+            source_volume=str(tmp_path / "template.nii"),
+            target_volume=str(tmp_path / "subjects" / "sub-01" / "mri" / "orig.mgz"),
+            subjects_dir=tmp_path / "subjects",
+            degrees_of_freedom=6,
+            random_seed=53,
+        ),
+    ]
+
+    assert len({canonicalize(task).checksum for task in tasks}) == 1
+
+
+def test_documented_defaults(monkeypatch):
+    monkeypatch.delenv("SUBJECTS_DIR", raising=False)
+    task = GTMSeg(subject_id="sub-01", generate_segmentation=False, upsampling_factor=2, keep_hypointensities=False)
+
+    assert canonicalize(task).cmdline.endswith("--no-xcerseg")
+
+
+def test_sequences(tmp_path):
+    task = Label2Vol(label_file="lh.label", projection=["frac", 0, 1, 0.1], subjects_dir=tmp_path)
+    other = Label2Vol(label_file="lh.label", projection=("frac", 0.0, 1.0, 0.1), subjects_dir=tmp_path)
+
+    assert canonicalize(task).checksum == canonicalize(other).checksum
+    assert not get_canonical_inputs(task)
@@ -0,0 +1,27 @@
+from pydra import Submitter, Workflow
+from pydra.engine.task import ShellCommandTask
+
+from pydra.tasks.freesurfer.engine.dryrun import dry_run
+
+
+def make_workflow(cache_dir, values):
+    wf = Workflow(name="wf", input_spec=["value"], cache_dir=cache_dir)
+    wf.add(ShellCommandTask(name="first", executable="echo", args=wf.lzin.value))
+    wf.add(ShellCommandTask(name="second", executable="echo", args=wf.first.lzout.stdout))
+    wf.set_output([("out", wf.second.lzout.stdout)])
+    return wf.split("value", value=values)
+
+
+def test_dry_run(tmp_path):
+    with Submitter(plugin="serial") as submitter:
+        submitter(make_workflow(tmp_path, ["a", "b"]))
+    wf = make_workflow(tmp_path, ["a", "b", "c"])
+
+    report = dry_run(wf)
+
+    assert report.by_class() == {"ShellCommandTask": {"hit": 4, "miss": 1, "blocked": 1}}
+    assert report.hits == 4
+    assert report.misses == 2
+    assert report.resubmission() == [{"value": "c"}]
+    assert report.core_hours > 0
+    assert wf.state is not None
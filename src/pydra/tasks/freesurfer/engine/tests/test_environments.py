@@ -0,0 +1,17 @@
+from pydra.engine.task import ShellCommandTask
+
+from pydra.tasks.freesurfer.engine.environments import Local
+
+
+def test_thread_environment(tmp_path):
+    task = ShellCommandTask(
+        executable="printenv",
+        args="OMP_NUM_THREADS",
+        environment=Local(slots_dir=tmp_path / "slots"),
+        cache_dir=tmp_path,
+    )
+
+    result = task()
+
+    assert int(result.output.stdout) >= 1
+    assert not list((tmp_path / "slots").iterdir())
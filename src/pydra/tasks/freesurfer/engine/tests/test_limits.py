@@ -0,0 +1,120 @@
+import errno
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from pydra.tasks.freesurfer.engine import limits
+from pydra.tasks.freesurfer.engine.resources import Resources
+
+
+def test_from_resources():
+    resources = Resources(cores=2, memory=1000, wall_time=30)
+
+    assert limits.Limits.from_resources(resources, margin=1.5) == limits.Limits(wall_time=45, memory=1500)
+
+
+def test_run_process():
+    return_code, stdout, stderr = limits.run_process(["echo", "hello"], limits=limits.Limits(wall_time=1))
+
+    assert (return_code, stdout, stderr) == (0, b"hello\n", b"")
+
+
+def test_wall_time_exceeded():
+    with pytest.raises(limits.LimitExceeded) as excinfo:
+        limits.run_process(["sleep", "60"], limits=limits.Limits(wall_time=1 / 60))
+
+    assert excinfo.value.reason == "wall_time"
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/stat"), reason="requires procfs")
+def test_leaked_children_are_reclaimed(tmp_path):
+    pidfile = tmp_path / "pid"
+    # The leaked child keeps the output streams open after its parent exits.
+    script = f"sleep 60 & echo $! > {pidfile}"
+
+    return_code, _, _ = limits.run_process(["sh", "-c", script], limits=limits.Limits(wall_time=1 / 6))
+
+    assert return_code == 0
+    stat = Path(f"/proc/{pidfile.read_text().strip()}/stat")
+    # Either reaped or a zombie waiting to be reaped by its new parent, once the signal is delivered.
+    for _ in range(50):
+        if not stat.exists() or stat.read_text().split()[2] in {"Z", "X"}:
+            break
+        time.sleep(0.1)
+    else:
+        pytest.fail("leaked child is still running")
+
+
+def test_memory_exceeded():
+    allocate = "bytearray(2 * 2**30)"
+
+    with pytest.raises(limits.LimitExceeded) as excinfo:
+        limits.run_process([sys.executable, "-c", allocate], limits=limits.Limits(memory=256))
+
+    assert excinfo.value.reason == "memory"
+
+
+def test_memory_limit_excludes_file_mappings(tmp_path):
+    # Mapping a file larger than the limit reserves address space without allocating memory.
+    path = tmp_path / "large"
+    with open(path, "wb") as f:
+        f.truncate(2**30)
+    script = f"import mmap; f = open({str(path)!r}, 'rb'); mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)"
+
+    return_code, _, stderr = limits.run_process([sys.executable, "-c", script], limits=limits.Limits(memory=256))
+
+    assert return_code == 0, stderr
+
+
+def make_cgroup(path, controllers="cpu memory pids", procs=()):
+    (path / "cgroup.controllers").write_text(f"{controllers}\n")
+    (path / "cgroup.subtree_control").write_text("\n")
+    (path / "cgroup.procs").write_text("".join(f"{pid}\n" for pid in (os.getpid(), *procs)))
+
+
+def test_delegate_memory(tmp_path):
+    make_cgroup(tmp_path)
+
+    assert limits._delegate_memory(tmp_path) == tmp_path
+    assert (tmp_path / limits.LEAF_CGROUP / "cgroup.procs").read_text() == str(os.getpid())
+    assert (tmp_path / "cgroup.subtree_control").read_text() == "+memory"
+
+
+def test_delegate_memory_unavailable(tmp_path, caplog):
+    make_cgroup(tmp_path, controllers="cpu pids")
+
+    assert limits._delegate_memory(tmp_path) is None
+    assert not (tmp_path / limits.LEAF_CGROUP).exists()
+    assert "not available" in caplog.text
+
+
+def test_delegate_memory_with_other_processes(tmp_path, caplog):
+    make_cgroup(tmp_path, procs=[1])
+
+    assert limits._delegate_memory(tmp_path) is None
+    assert not (tmp_path / limits.LEAF_CGROUP).exists()
+    assert "other processes" in caplog.text
+
+
+def test_delegate_memory_failure(tmp_path, monkeypatch, caplog):
+    make_cgroup(tmp_path)
+    write_text = Path.write_text
+
+    def busy(path, data):
+        if path.name == "cgroup.subtree_control":
+            raise OSError(errno.EBUSY, "Device or resource busy")
+        return write_text(path, data)
+
+    removed = []
+    monkeypatch.setattr(Path, "write_text", busy)
+    # Interface files of a cgroup disappear along with it, unlike the files of this fake one.
+    monkeypatch.setattr(Path, "rmdir", lambda path: removed.append(path))
+
+    assert limits._delegate_memory(tmp_path) is None
+    # The process moves back to its cgroup, and the leaf is removed.
+    assert (tmp_path / "cgroup.procs").read_text() == str(os.getpid())
+    assert removed == [tmp_path / limits.LEAF_CGROUP]
+    assert "Cannot delegate" in caplog.text
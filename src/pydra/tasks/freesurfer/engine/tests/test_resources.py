@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from pydra import Submitter
+from pydra.engine.task import ShellCommandTask
+
+from pydra.tasks.freesurfer.engine import resources
+from pydra.tasks.freesurfer.mri.binarize import Binarize
+from pydra.tasks.freesurfer.mris.ca_train import CATrain
+from pydra.tasks.freesurfer.recon_all import ReconAll
+
+
+def test_default_profile():
+    task = ShellCommandTask(executable="echo")
+
+    assert resources.get_resources(task) == resources.Resources()
+
+
+def test_threads_input():
+    task = ReconAll(subject_id="sub-01", num_threads=8)
+
+    assert resources.get_resources(task).cores == 8
+
+
+def test_scaling_input():
+    task = CATrain(hemisphere="lh", canonical_surface="sphere.reg", annotation_file="aparc", subject_ids=["s1", "s2"])
+
+    assert resources.get_resources(task).memory == 2048 + 2 * 256
+
+
+def test_overrides_from_envvar(tmp_path, monkeypatch):
+    overrides = tmp_path / "resources.json"
+    overrides.write_text(json.dumps({"Binarize": {"memory": 64}}))
+    monkeypatch.setenv(resources.RESOURCES_ENVVAR, str(overrides))
+
+    assert resources.get_resources(Binarize(input_volume="aseg.mgz")).memory == 64
+
+
+def test_unknown_override():
+    with pytest.raises(ValueError, match="Unknown resource fields"):
+        resources.get_resources(Binarize(input_volume="aseg.mgz"), overrides={"Binarize": {"gpus": 1}})
+
+
+def test_sbatch_directives(tmp_path):
+    task = ReconAll(subject_id="sub-01", num_threads=4, cache_dir=tmp_path)
+    worker = resources.ResourceAwareSlurmWorker()
+
+    _, batchscript = worker._prepare_runscripts(task)
+
+    lines = batchscript.read_text().splitlines()
+    assert lines[0] == "#!/bin/sh"
+    assert "#SBATCH --cpus-per-task=4" in lines
+    assert "#SBATCH --mem=8192M" in lines
+    assert "#SBATCH --time=1440" in lines
+
+
+def test_resource_aware_worker(tmp_path):
+    task = ShellCommandTask(name="echo", executable="echo", cache_dir=tmp_path).split(args=["a", "b"])
+
+    with Submitter(plugin=resources.ResourceAwareWorker, n_procs=1) as submitter:
+        submitter(task)
+
+    assert [result.output.stdout for result in task.result()] == ["a\n", "b\n"]
@@ -0,0 +1,124 @@
+import functools
+import hashlib
+
+import attrs
+
+from pydra.engine.specs import ShellSpec, SpecInfo
+from pydra.engine.task import ShellCommandTask
+
+from pydra.tasks.freesurfer.engine import hashing
+from pydra.tasks.freesurfer.engine.environments import Local
+from pydra.tasks.freesurfer.engine.store import ResultStore, StoreSpec
+
+INPUT_SPEC = SpecInfo(
+    name="Input",
+    fields=[("input_file", str, {"help_string": "input file", "argstr": "", "position": 1, "mandatory": True})],
+    bases=(ShellSpec,),
+)
+
+
+def make_task(input_file, store, cache_dir):
+    return ShellCommandTask(
+        executable="cp",
+        args="copy.txt",
+        input_spec=INPUT_SPEC,
+        input_file=str(input_file),
+        environment=Local(slots_dir=cache_dir / "slots", store=store),
+        cache_dir=cache_dir,
+    )
+
+
+def test_store(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a" / "input.txt").write_text("content")
+    (tmp_path / "b" / "input.txt").write_text("content")
+    store = ResultStore(tmp_path / "store", tasks={"ShellCommandTask": StoreSpec()})
+
+    task = make_task(tmp_path / "a" / "input.txt", store, tmp_path / "cache-a")
+    task()
+    (entry,) = (tmp_path / "store").glob("*/*")
+    assert (entry / "output" / "copy.txt").read_text() == "content"
+    assert not list((tmp_path / "store" / ".staging").iterdir())
+
+    # Same content in another project, restored from the store rather than executed.
+    (entry / "output" / "copy.txt").write_text("stored")
+    task = make_task(tmp_path / "b" / "input.txt", store, tmp_path / "cache-b")
+    task()
+    assert (task.output_dir / "copy.txt").read_text() == "stored"
+
+    (tmp_path / "b" / "input.txt").write_text("modified")
+    task = make_task(tmp_path / "b" / "input.txt", store, tmp_path / "cache-c")
+    task()
+    assert (task.output_dir / "copy.txt").read_text() == "modified"
+    assert len(list((tmp_path / "store").glob("*/*"))) == 2
+
+
+def test_unsupported(tmp_path):
+    store = ResultStore(tmp_path)
+    task = ShellCommandTask(executable="true")
+
+    assert not store.supports(task)
+    assert store.get_key(task) is None
+
+
+def test_concurrent_publish(tmp_path):
+    store = ResultStore(tmp_path / "store", tasks={"ShellCommandTask": StoreSpec()})
+    task = ShellCommandTask(executable="true")
+    (tmp_path / "output").mkdir()
+    (tmp_path / "output" / "out.txt").write_text("first")
+    output = {"return_code": 0, "stdout": "", "stderr": ""}
+
+    assert store.publish("0123", task, tmp_path / "output", output)
+    (tmp_path / "output" / "out.txt").write_text("second")
+    assert not store.publish("0123", task, tmp_path / "output", output)
+
+    assert (store.get_entry("0123") / "output" / "out.txt").read_text() == "first"
+
+
+def test_key_is_shared_across_hashers(tmp_path, monkeypatch):
+    (tmp_path / "input.txt").write_text("content")
+    store = ResultStore(tmp_path / "store", tasks={"ShellCommandTask": StoreSpec()})
+    key = store.get_key(make_task(tmp_path / "input.txt", store, tmp_path / "cache"))
+
+    # Another host, with another hashing package installed.
+    monkeypatch.setattr(hashing, "get_hasher", lambda: ("xxh3", functools.partial(hashlib.blake2b, digest_size=16)))
+    hashing._file_digest.cache_clear()
+
+    assert store.get_key(make_task(tmp_path / "input.txt", store, tmp_path / "cache")) == key
+
+
+def test_publish_subdirectories(tmp_path):
+    store = ResultStore(tmp_path / "store", tasks={"ShellCommandTask": StoreSpec()})
+    task = ShellCommandTask(executable="true")
+    (tmp_path / "output" / "stats").mkdir(parents=True)
+    (tmp_path / "output" / "stats" / "out.txt").write_text("nested")
+    output = {"return_code": 0, "stdout": "", "stderr": ""}
+
+    assert store.publish("0123", task, tmp_path / "output", output)
+    assert store.restore("0123", task, tmp_path / "restored") == output
+    assert (tmp_path / "restored" / "stats" / "out.txt").read_text() == "nested"
+
+
+def test_outputs_outside_output_dir(tmp_path):
+    (tmp_path / "input.txt").write_text("content")
+    input_spec = SpecInfo(
+        name="Input",
+        fields=[
+            ("input_file", str, {"help_string": "input file", "argstr": "", "position": 1}),
+            ("output_file", str, {"help_string": "output file", "argstr": "", "output_file_template": "copy.txt"}),
+        ],
+        bases=(ShellSpec,),
+    )
+    store = ResultStore(tmp_path / "store", tasks={"ShellCommandTask": StoreSpec()})
+
+    def make(output_file):
+        task = ShellCommandTask(executable="cp", input_spec=input_spec, cache_dir=tmp_path / "cache")
+        task.inputs.input_file = str(tmp_path / "input.txt")
+        task.inputs.output_file = output_file
+        return task
+
+    assert store.get_key(make("copy.txt")) is not None
+    assert store.get_key(make("stats/copy.txt")) is not None
+    assert store.get_key(make(str(tmp_path / "copy.txt"))) is None
+    assert store.get_key(make("../copy.txt")) is None
@@ -0,0 +1,60 @@
+import os
+
+from pydra.tasks.freesurfer.engine import threads
+from pydra.tasks.freesurfer.mri.coreg import Coreg
+
+
+def test_cpu_quota_cgroup_v2(tmp_path):
+    (tmp_path / "cpu.max").write_text("250000 100000\n")
+
+    assert threads.get_cpu_quota(tmp_path) == 2.5
+
+
+def test_cpu_quota_cgroup_v2_unlimited(tmp_path):
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+
+    assert threads.get_cpu_quota(tmp_path) is None
+
+
+def test_cpu_quota_cgroup_v1(tmp_path):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("100000\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+
+    assert threads.get_cpu_quota(tmp_path) == 1.0
+
+
+def test_thread_budget_bounded_by_quota(tmp_path):
+    (tmp_path / "cpu.max").write_text("100000 100000\n")
+
+    assert threads.get_thread_budget(concurrent_tasks=4, cgroup_root=tmp_path) == 1
+
+
+def test_slot_registry(tmp_path):
+    registry = threads.SlotRegistry(tmp_path)
+    # Slot left behind by a dead process.
+    (tmp_path / f"{2**22 + 1}-stale.slot").touch()
+
+    with registry.acquire():
+        assert registry.count() == 1
+    assert registry.count() == 0
+    assert not list(tmp_path.iterdir())
+
+
+def test_apply_thread_budget():
+    task = Coreg(source_volume="rawavg.mgz", target_volume="orig.mgz")
+
+    env = threads.apply_thread_budget(task, 3)
+
+    assert task.inputs.num_threads == 3
+    assert env["OMP_NUM_THREADS"] == env["ITK_GLOBAL_DEFAULT_NUMBER_OF_THREADS"] == "3"
+    assert env["PATH"] == os.environ["PATH"]
+
+
+def test_apply_thread_budget_preserves_user_input():
+    task = Coreg(source_volume="rawavg.mgz", target_volume="orig.mgz", num_threads=8)
+
+    env = threads.apply_thread_budget(task, 3)
+
+    assert task.inputs.num_threads == 8
+    assert all(env[variable] == "8" for variable in threads.THREAD_VARIABLES)
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from pydra.tasks.freesurfer.engine import limits, watchdog
+
+
+@pytest.mark.parametrize(
+    ("line", "reason"),
+    [
+        ("ERROR: talairach_afd: Talairach Transform: transforms/talairach.xfm ***FAILED***", "talairach_failure"),
+        ("ERROR: cannot find /path/to/subjects/sub-01/mri/orig/001.mgz", "missing_file"),
+        ("1234 defects found, arbitrating ambiguous regions...", "topology_defects"),
+        ("recon-all -s sub-01 exited with ERRORS at Sat Jan 1 00:00:00 UTC 2022", "exited_with_errors"),
+        ("Segmentation fault (core dumped)", "segmentation_fault"),
+    ],
+)
+def test_fatal_patterns(line, reason):
+    assert watchdog.Watchdog.for_executable("recon-all").scan(line).reason == reason
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "#@# Talairach Failure Detection Sat Jan 1 00:00:00 UTC 2022",
+        "12 defects found, arbitrating ambiguous regions...",
+        "recon-all -s sub-01 finished without error at Sat Jan 1 00:00:00 UTC 2022",
+    ],
+)
+def test_non_fatal_lines(line):
+    assert watchdog.Watchdog.for_executable("recon-all").scan(line) is None
+
+
+def test_executable_with_arguments():
+    assert watchdog.Watchdog.for_executable("/usr/local/freesurfer/bin/tkregister2 --noedit").patterns == (
+        watchdog.COMMON_PATTERNS
+    )
+
+
+def test_run_process_fails_fast():
+    script = "echo 'ERROR: cannot find orig.mgz'; sleep 60"
+    start = time.monotonic()
+
+    with pytest.raises(watchdog.FatalLogMessage) as excinfo:
+        limits.run_process(["sh", "-c", script], watchdog=watchdog.Watchdog.for_executable("recon-all"))
+
+    assert time.monotonic() - start < limits.KILL_DELAY
+    assert excinfo.value.reason == "missing_file"
+    assert excinfo.value.line == "ERROR: cannot find orig.mgz"
+
+
+@pytest.mark.parametrize(("memory", "error"), [(4096, limits.LimitExceeded), (None, watchdog.FatalLogMessage)])
+def test_out_of_memory_under_limit(memory, error):
+    script = "echo 'terminate called after throwing an instance of std::bad_alloc' >&2; sleep 60"
+
+    with pytest.raises(error) as excinfo:
+        limits.run_process(
+            ["sh", "-c", script],
+            limits=limits.Limits(memory=memory),
+            watchdog=watchdog.Watchdog.for_executable("mri_ca_register"),
+        )
+
+    # Allocation failures under a memory limit are memory breaches, not fatal log messages.
+    assert excinfo.value.reason == ("memory" if memory else "out_of_memory")
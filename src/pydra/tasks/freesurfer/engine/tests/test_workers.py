@@ -0,0 +1,126 @@
+import inspect
+import os
+import re
+import time
+
+import pytest
+from attrs import define, field
+
+from pydra import Submitter
+from pydra.engine.core import TaskBase
+from pydra.engine.specs import ShellSpec, SpecInfo
+from pydra.engine.task import ShellCommandTask
+
+from pydra.tasks.freesurfer.engine.environments import Local
+from pydra.tasks.freesurfer.engine.limits import LimitExceeded, Limits
+from pydra.tasks.freesurfer.engine.workers import AsyncWorker
+
+
+def test_default_max_jobs():
+    assert AsyncWorker().max_jobs >= 1
+
+
+def test_run_shell_task(tmp_path):
+    task = ShellCommandTask(name="echo", executable="echo", args="hello", cache_dir=tmp_path)
+
+    with Submitter(plugin=AsyncWorker) as submitter:
+        submitter(task)
+
+    result = task.result()
+    assert not result.errored
+    assert result.output.stdout == "hello\n"
+    assert result.output.return_code == 0
+
+
+def test_cache_hits_are_recorded(tmp_path):
+    task = ShellCommandTask(name="echo", executable="echo", args="hello", cache_dir=tmp_path)
+    with Submitter(plugin=AsyncWorker) as submitter:
+        submitter(task)
+    result_file = task.output_dir / "_result.pklz"
+    os.utime(result_file, (0, 0))
+
+    with Submitter(plugin=AsyncWorker) as submitter:
+        submitter(task)
+
+    assert result_file.stat().st_mtime > time.time() - 60
+
+
+def test_run_split_shell_task(tmp_path):
+    task = ShellCommandTask(name="echo", executable="echo", cache_dir=tmp_path).split(args=["a", "b", "c"])
+
+    with Submitter(plugin=AsyncWorker, max_jobs=2) as submitter:
+        submitter(task)
+
+    assert [result.output.stdout for result in task.result()] == ["a\n", "b\n", "c\n"]
+
+
+def test_run_local_task_with_limits(tmp_path):
+    environment = Local(slots_dir=tmp_path / "slots", limits=Limits(wall_time=1 / 60))
+    task = ShellCommandTask(name="sleep", executable="sleep", args="60", cache_dir=tmp_path, environment=environment)
+
+    assert not AsyncWorker.supports(task)
+    # The limits of the environment apply, the task running through Local.execute.
+    with pytest.raises(LimitExceeded) as excinfo:
+        with Submitter(plugin=AsyncWorker) as submitter:
+            submitter(task)
+
+    assert excinfo.value.reason == "wall_time"
+
+
+@define(slots=False, kw_only=True)
+class CatSpec(ShellSpec):
+    input_file: os.PathLike = field(metadata={"help_string": "input file", "argstr": "", "position": 1})
+
+
+def test_relative_inputs(tmp_path, monkeypatch):
+    (tmp_path / "input.txt").write_text("hello\n")
+    input_spec = SpecInfo(name="Input", fields=[], bases=(CatSpec,))
+    task = ShellCommandTask(
+        name="cat", executable="cat", input_spec=input_spec, input_file="input.txt", cache_dir=tmp_path / "cache"
+    )
+    monkeypatch.chdir(tmp_path)
+
+    with Submitter(plugin=AsyncWorker) as submitter:
+        # As if a runnable executing in the background thread had changed the working directory.
+        monkeypatch.chdir(tmp_path / "cache")
+        submitter(task)
+
+    result = task.result()
+    assert result.output.stdout == "hello\n"
+    assert task.inputs.input_file == str(tmp_path / "input.txt")
+
+
+def test_mirrors_task_run():
+    # AsyncWorker._run_shell mirrors these private steps of TaskBase._run, in this order.
+    source = inspect.getsource(TaskBase._run)
+    steps = [
+        "self.hooks.pre_run(self)",
+        "self.task_rerun",
+        "self._populate_filesystem(checksum, output_dir)",
+        "os.chdir(output_dir)",
+        "self._modify_inputs()",
+        "self.hooks.pre_run_task(self)",
+        "self.audit.start_audit(odir=output_dir)",
+        "self.audit.audit_task(task=self)",
+        "self.audit.monitor()",
+        "self._run_task(environment=environment)",
+        "self._collect_outputs(output_dir=output_dir)",
+        "record_error(output_dir, error=traceback)",
+        "self.hooks.post_run_task(self, result)",
+        "self.audit.finalize_audit(result)",
+        "save(output_dir, result=result, task=self)",
+        '(self.cache_dir / f"{self.uid}_info.json").unlink()',
+        "self.hooks.post_run(self, result)",
+        "self._check_for_hash_changes()",
+    ]
+    positions = [source.find(step) for step in steps]
+    assert -1 not in positions, [step for step, position in zip(steps, positions) if position == -1]
+    assert positions == sorted(positions)
+    # No other private method of the task is called.
+    assert set(re.findall(r"self\.(_\w+)\(", source)) == {
+        "_populate_filesystem",
+        "_modify_inputs",
+        "_run_task",
+        "_collect_outputs",
+        "_check_for_hash_changes",
+    }
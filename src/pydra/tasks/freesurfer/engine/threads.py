@@ -0,0 +1,125 @@
+"""
+Threads
+=======
+
+Thread budgeting for multithreaded FreeSurfer tools.
+
+OpenMP and ITK default to one thread per core of the host, which oversubscribes it badly
+inside containers, SLURM allocations, or when several tasks run side by side.
+The thread budget of a task is the number of CPUs actually usable by the process,
+bounded by the cgroup CPU quota and the scheduler affinity mask,
+divided between the tasks currently running on the host.
+
+>>> budget = get_thread_budget(concurrent_tasks=1)
+>>> budget >= 1
+True
+>>> get_thread_environment(2)
+{'OMP_NUM_THREADS': '2', 'ITK_GLOBAL_DEFAULT_NUMBER_OF_THREADS': '2'}
+"""
+
+from __future__ import annotations
+
+__all__ = [
+    "SlotRegistry",
+    "get_cpu_budget",
+    "get_cpu_quota",
+    "get_thread_budget",
+    "get_thread_environment",
+    "apply_thread_budget",
+]
+
+import contextlib
+import errno
+import os
+import tempfile
+import uuid
+from pathlib import Path
+
+from attrs import NOTHING, fields_dict
+
+from pydra.engine.task import ShellCommandTask
+from pydra.tasks.freesurfer._cpu import get_cpu_budget, get_cpu_quota, get_thread_budget
+
+#: Environment variables controlling the number of threads of FreeSurfer's tools.
+THREAD_VARIABLES = ("OMP_NUM_THREADS", "ITK_GLOBAL_DEFAULT_NUMBER_OF_THREADS")
+
+#: Inputs controlling the number of threads of FreeSurfer's tools.
+THREAD_INPUTS = ("num_threads",)
+
+SLOTS_ENVVAR = "PYDRA_FREESURFER_SLOTS_DIR"
+
+
+def is_alive(pid: int) -> bool:
+    """Whether a process is running on the host."""
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+
+class SlotRegistry:
+    """Registry of the tasks running concurrently on the host.
+
+    Each running task holds a slot file named after its process identifier,
+    so that slots held by dead processes can be reclaimed.
+
+    Parameters
+    ----------
+    directory : path-like, optional
+        Directory holding the slot files, shared by all processes on the host.
+        Defaults to ``PYDRA_FREESURFER_SLOTS_DIR`` or a directory in the system's temporary directory.
+    """
+
+    def __init__(self, directory: os.PathLike | None = None):
+        directory = directory or os.getenv(SLOTS_ENVVAR) or Path(tempfile.gettempdir()) / "pydra-freesurfer-slots"
+        self.directory = Path(directory)
+
+    def count(self) -> int:
+        """Return the number of slots held by live processes."""
+        count = 0
+        for slot in self.directory.glob("*.slot"):
+            pid = int(slot.name.split("-", 1)[0])
+            if is_alive(pid):
+                count += 1
+            else:
+                with contextlib.suppress(FileNotFoundError):
+                    slot.unlink()
+        return count
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """Hold a slot for the duration of the context."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        slot = self.directory / f"{os.getpid()}-{uuid.uuid4().hex}.slot"
+        slot.touch()
+        try:
+            yield slot
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                slot.unlink()
+
+
+def get_thread_environment(num_threads: int) -> dict[str, str]:
+    """Return the environment variables limiting tools to a number of threads."""
+    return {variable: str(num_threads) for variable in THREAD_VARIABLES}
+
+
+def apply_thread_budget(task: ShellCommandTask, num_threads: int) -> dict[str, str]:
+    """Apply a thread budget to a task.
+
+    Thread inputs left unset by the user are set to the budget.
+    Returns the environment in which the task should run,
+    limited to the number of threads set by the user if any, so that the environment never contradicts the inputs.
+    """
+    input_fields = fields_dict(type(task.inputs))
+    user_threads = None
+    for name in THREAD_INPUTS:
+        if name not in input_fields:
+            continue
+        value = getattr(task.inputs, name)
+        if value is NOTHING:
+            setattr(task.inputs, name, num_threads)
+        elif isinstance(value, int) and value > 0:
+            user_threads = value
+    return {**os.environ, **get_thread_environment(user_threads or num_threads)}
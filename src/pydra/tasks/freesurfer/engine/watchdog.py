@@ -0,0 +1,128 @@
+"""
+Watchdog
+========
+
+Fail-fast detection of fatal errors in the output of FreeSurfer's command-line tools.
+
+Tools such as ``recon-all`` may report a fatal error, then keep running or linger in cleanup for a long time.
+A :class:`Watchdog` scans the output of a command as it is written
+against a curated table of known fatal patterns for its executable:
+
+>>> watchdog = Watchdog.for_executable("recon-all")
+>>> watchdog.scan("#@# Talairach Failure Detection Sat Jan 1 00:00:00 UTC 2022")
+>>> watchdog.scan("ERROR: talairach_afd: Talairach Transform: transforms/talairach.xfm ***FAILED***").reason
+'talairach_failure'
+
+The command is then terminated at once and the task fails with a :class:`FatalLogMessage` error.
+"""
+
+from __future__ import annotations
+
+__all__ = ["FATAL_PATTERNS", "FatalLogMessage", "FatalMatch", "FatalPattern", "Watchdog"]
+
+import os
+import re
+from typing import Iterable
+
+from attrs import define, field
+
+
+class FatalLogMessage(RuntimeError):
+    """A command reported a fatal error.
+
+    Attributes
+    ----------
+    reason : str
+        Identifier of the matched pattern.
+    line : str
+        Output line matching the pattern.
+    """
+
+    def __init__(self, reason: str, line: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.line = line
+
+
+@define(frozen=True)
+class FatalPattern:
+    """A pattern identifying a fatal error in the output of a tool.
+
+    Parameters
+    ----------
+    reason : str
+        Identifier of the fatal error.
+    pattern : str
+        Regular expression matched against each output line.
+    min_value : int, optional
+        Minimum value of the first group of the pattern for the match to be fatal,
+        for errors identified by a count (for instance, topological defects).
+    """
+
+    reason: str
+
+    pattern: re.Pattern = field(converter=re.compile)
+
+    min_value: int | None = None
+
+    def match(self, line: str) -> bool:
+        """Whether a line reports this fatal error."""
+        match = self.pattern.search(line)
+        if match is None:
+            return False
+        return self.min_value is None or int(match.group(1)) >= self.min_value
+
+
+#: Fatal patterns common to all tools.
+COMMON_PATTERNS = (
+    FatalPattern("segmentation_fault", r"Segmentation fault|core dumped"),
+    FatalPattern("out_of_memory", r"std::bad_alloc|Cannot allocate memory"),
+)
+
+#: Fatal patterns specific to each executable.
+FATAL_PATTERNS = {
+    "recon-all": (
+        FatalPattern("talairach_failure", r"ERROR: talairach_afd: .*\*\*\*FAILED\*\*\*"),
+        FatalPattern("missing_file", r"ERROR: (?:[Nn]o such file|[Cc]annot find|[Cc]ould not (?:open|find|read))"),
+        FatalPattern("topology_defects", r"^\s*(\d+) defects (?:found|to be corrected)", min_value=1000),
+        FatalPattern("license", r"ERROR: FreeSurfer license file .* not found"),
+        FatalPattern("exited_with_errors", r"recon-all .* exited with ERRORS"),
+    ),
+    "gtmseg": (FatalPattern("missing_file", r"ERROR: (?:[Cc]annot find|[Cc]ould not (?:open|read))"),),
+    "mri_robust_template": (
+        FatalPattern("missing_file", r"ERROR: .*(?:does not exist|could not (?:open|read))"),
+        FatalPattern("dimension_mismatch", r"ERROR: .*dimensions? (?:do not|don't) match"),
+    ),
+    "mri_robust_register": (FatalPattern("missing_file", r"ERROR: .*(?:does not exist|could not (?:open|read))"),),
+    "mri_coreg": (FatalPattern("missing_file", r"ERROR: (?:[Cc]annot find|[Cc]ould not (?:open|read))"),),
+    "mris_ca_train": (FatalPattern("missing_file", r"ERROR: .*could not (?:open|read)"),),
+}
+
+
+@define(frozen=True)
+class FatalMatch:
+    """A fatal error reported by a command."""
+
+    reason: str
+
+    line: str
+
+
+@define
+class Watchdog:
+    """Scan the output of a command for fatal errors."""
+
+    patterns: tuple = field(converter=tuple)
+
+    @classmethod
+    def for_executable(cls, executable: str, extra_patterns: Iterable[FatalPattern] = ()) -> Watchdog:
+        """Return a watchdog for an executable, which may include arguments (e.g. ``"tkregister2 --noedit"``)."""
+        name = os.path.basename(executable.split()[0]) if executable else ""
+        return cls([*FATAL_PATTERNS.get(name, ()), *COMMON_PATTERNS, *extra_patterns])
+
+    def scan(self, line: str) -> FatalMatch | None:
+        """Return the fatal error reported by a line, if any."""
+        for pattern in self.patterns:
+            if pattern.match(line):
+                return FatalMatch(pattern.reason, line)
+        return None
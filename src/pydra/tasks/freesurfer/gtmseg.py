@@ -38,6 +38,7 @@ from attrs import NOTHING, define, field
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
 from pydra.tasks.freesurfer import specs
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(kw_only=True)
@@ -116,6 +117,8 @@ class GTMSeg(ShellCommandTask):
 
     executable = "gtmseg"
 
+    resource_profile = ResourceProfile(cores=1, memory=8192, wall_time=120, scratch=2048)
+
     input_spec = SpecInfo(name="Output", bases=(GTMSegSpec, specs.SubjectsDirSpec))
 
     output_spec = SpecInfo(name="Input", bases=(specs.SubjectsDirOutSpec,))
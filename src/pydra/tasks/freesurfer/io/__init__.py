@@ -0,0 +1,21 @@
+"""
+Input/Output
+============
+
+Native readers and writers for FreeSurfer's file formats,
+to inspect inputs and outputs of tasks without spawning FreeSurfer's binaries.
+
+>>> from pydra.tasks.freesurfer.io import mgh
+
+.. automodule:: pydra.tasks.freesurfer.io.annot
+.. automodule:: pydra.tasks.freesurfer.io.cache
+.. automodule:: pydra.tasks.freesurfer.io.label
+.. automodule:: pydra.tasks.freesurfer.io.mgh
+.. automodule:: pydra.tasks.freesurfer.io.morph
+.. automodule:: pydra.tasks.freesurfer.io.nifti
+.. automodule:: pydra.tasks.freesurfer.io.pgzip
+.. automodule:: pydra.tasks.freesurfer.io.shared
+.. automodule:: pydra.tasks.freesurfer.io.surface
+.. automodule:: pydra.tasks.freesurfer.io.transforms
+.. automodule:: pydra.tasks.freesurfer.io.volume
+"""
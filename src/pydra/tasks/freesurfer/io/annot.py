@@ -0,0 +1,207 @@
+"""
+Annotation
+==========
+
+Native reader and writer for FreeSurfer's surface annotations (``?h.aparc.annot``...) and color tables.
+
+An annotation assigns a label to every vertex of a surface,
+returned as an int32 array of structure indices into its embedded color table, -1 for unlabeled vertices:
+
+>>> annotation = read_annot("lh.aparc.annot")  # doctest: +SKIP
+>>> annotation.labels  # doctest: +SKIP
+array([ 8, 28, 28, ..., 24, 24, 24], dtype=int32)
+>>> annotation.ctab.names[8]  # doctest: +SKIP
+'inferiorparietal'
+
+Annotations are written with a color table of the current binary format, as FreeSurfer writes them.
+Color tables in text format, such as ``FreeSurferColorLUT.txt``, are read and written as well:
+
+>>> ctab = read_ctab("FreeSurferColorLUT.txt")  # doctest: +SKIP
+"""
+
+from __future__ import annotations
+
+__all__ = ["Annotation", "ColorTable", "read_annot", "read_ctab", "write_annot", "write_ctab"]
+
+import os
+import struct
+from typing import BinaryIO
+
+import numpy as np
+from attrs import define, field
+
+#: Tag preceding the color table of an annotation.
+TAG_OLD_COLORTABLE = 1
+
+#: Version of the binary color tables written.
+CTAB_VERSION = 2
+
+
+@define
+class ColorTable:
+    """A color table.
+
+    Attributes
+    ----------
+    indices : numpy.ndarray
+        Structure index of each entry, as an int32 array.
+    names : list of str
+        Name of each entry.
+    colors : numpy.ndarray
+        Red, green, blue and transparency of each entry, as an int32 array of shape (K, 4).
+    filename : str
+        Path of the color table the annotation was created with.
+    size : int
+        Number of structure indices of the table, at least one more than the largest index.
+    """
+
+    indices: np.ndarray = field(converter=lambda indices: np.asarray(indices, dtype=np.int32), eq=False)
+
+    names: list = field(converter=list)
+
+    colors: np.ndarray = field(converter=lambda colors: np.asarray(colors, dtype=np.int32).reshape(-1, 4), eq=False)
+
+    filename: str = ""
+
+    size: int = field()
+
+    @size.default
+    def _get_size(self) -> int:
+        return int(self.indices.max()) + 1 if len(self.indices) else 0
+
+    @property
+    def annotations(self) -> np.ndarray:
+        """Annotation value of each entry, packing its red, green and blue components."""
+        return self.colors[:, 0] + self.colors[:, 1] * 256 + self.colors[:, 2] * 65536
+
+    def get_index(self, name: str) -> int:
+        """Return the structure index of an entry by name."""
+        return int(self.indices[self.names.index(name)])
+
+
+@define
+class Annotation:
+    """A surface annotation.
+
+    Attributes
+    ----------
+    labels : numpy.ndarray
+        Structure index of each vertex in the color table, as an int32 array, -1 for unlabeled vertices.
+    ctab : ColorTable
+        Color table of the labels.
+    """
+
+    labels: np.ndarray = field(eq=False)
+
+    ctab: ColorTable
+
+    @property
+    def values(self) -> np.ndarray:
+        """Annotation value of each vertex, as stored in annotation files, 0 for unlabeled vertices."""
+        # The last entry of the lookup table, left at 0, is indexed by unlabeled vertices.
+        lookup = np.zeros(self.ctab.size + 1, dtype=np.int32)
+        lookup[self.ctab.indices] = self.ctab.annotations
+        return lookup[self.labels]
+
+
+def _read_int(f: BinaryIO) -> int:
+    return struct.unpack(">i", f.read(4))[0]
+
+
+def _read_string(f: BinaryIO) -> str:
+    return f.read(_read_int(f)).split(b"\0")[0].decode("utf-8", errors="replace")
+
+
+def _read_binary_ctab(f: BinaryIO) -> ColorTable:
+    count = _read_int(f)
+    indices, names, colors = [], [], []
+    if count > 0:
+        # Old format: entries of consecutive indices.
+        filename = _read_string(f)
+        for index in range(count):
+            names.append(_read_string(f))
+            colors.append(struct.unpack(">4i", f.read(16)))
+            indices.append(index)
+        return ColorTable(indices, names, colors, filename=filename, size=count)
+    if -count != CTAB_VERSION:
+        raise ValueError(f"Unsupported color table version: {-count}")
+    size = _read_int(f)
+    filename = _read_string(f)
+    for _ in range(_read_int(f)):
+        indices.append(_read_int(f))
+        names.append(_read_string(f))
+        colors.append(struct.unpack(">4i", f.read(16)))
+    return ColorTable(indices, names, colors, filename=filename, size=size)
+
+
+def _pack_string(value: str) -> bytes:
+    # Strings are written with their null terminator, counted in their length.
+    encoded = value.encode("utf-8") + b"\0"
+    return struct.pack(">i", len(encoded)) + encoded
+
+
+def _pack_binary_ctab(ctab: ColorTable) -> bytes:
+    chunks = [struct.pack(">2i", -CTAB_VERSION, ctab.size), _pack_string(ctab.filename)]
+    chunks.append(struct.pack(">i", len(ctab.names)))
+    for index, name, color in zip(ctab.indices, ctab.names, ctab.colors):
+        chunks += [struct.pack(">i", index), _pack_string(name), struct.pack(">4i", *color)]
+    return b"".join(chunks)
+
+
+def read_annot(path: os.PathLike) -> Annotation:
+    """Read a surface annotation with its color table."""
+    with open(path, "rb") as f:
+        num_vertices = _read_int(f)
+        pairs = np.fromfile(f, dtype=">i4", count=2 * num_vertices).reshape(-1, 2)
+        if len(pairs) != num_vertices:
+            raise ValueError(f"Truncated annotation: {path}")
+        tag = f.read(4)
+        if len(tag) < 4 or struct.unpack(">i", tag)[0] != TAG_OLD_COLORTABLE:
+            raise ValueError(f"Annotation without color table: {path}")
+        ctab = _read_binary_ctab(f)
+    values = np.zeros(num_vertices, dtype=np.int32)
+    values[pairs[:, 0]] = pairs[:, 1]
+    # Values are mapped to structure indices through the sorted annotation values of the table.
+    annotations = ctab.annotations
+    order = np.argsort(annotations, kind="stable")
+    positions = np.clip(np.searchsorted(annotations[order], values), 0, max(len(order) - 1, 0))
+    labels = np.full(num_vertices, -1, dtype=np.int32)
+    if len(order):
+        found = annotations[order][positions] == values
+        labels[found] = ctab.indices[order][positions][found]
+    return Annotation(labels, ctab)
+
+
+def write_annot(path: os.PathLike, annotation: Annotation):
+    """Write a surface annotation with its color table, as FreeSurfer does."""
+    values = annotation.values
+    pairs = np.empty((len(values), 2), dtype=">i4")
+    pairs[:, 0] = np.arange(len(values))
+    pairs[:, 1] = values
+    with open(path, "wb") as f:
+        f.write(struct.pack(">i", len(values)))
+        f.write(pairs.tobytes())
+        f.write(struct.pack(">i", TAG_OLD_COLORTABLE))
+        f.write(_pack_binary_ctab(annotation.ctab))
+
+
+def read_ctab(path: os.PathLike) -> ColorTable:
+    """Read a color table in text format, with lines of index, name, red, green, blue and transparency."""
+    indices, names, colors = [], [], []
+    with open(path) as f:
+        for line in f:
+            fields = line.split("#")[0].split()
+            if len(fields) < 5:
+                continue
+            indices.append(int(fields[0]))
+            names.append(fields[1])
+            colors.append([int(value) for value in (fields[2:6] + ["0"])[:4]])
+    return ColorTable(indices, names, colors, filename=os.fspath(path))
+
+
+def write_ctab(path: os.PathLike, ctab: ColorTable):
+    """Write a color table in text format."""
+    width = max(map(len, ctab.names), default=0)
+    with open(path, "w") as f:
+        for index, name, (red, green, blue, alpha) in zip(ctab.indices, ctab.names, ctab.colors):
+            f.write(f"{index:<4d} {name:<{width}s} {red:3d} {green:3d} {blue:3d} {alpha:3d}\n")
@@ -0,0 +1,147 @@
+"""
+Decoded Cache
+=============
+
+In-process cache of the volumes and surfaces decoded by native readers, bounded by bytes.
+
+Native engines of a workflow often decode the same files of a subject, such as ``aparc+aseg.mgz`` or ``lh.white``.
+:func:`cached_read` returns the value of a reader for a file, decoding the file only once per version of it,
+as identified by its path, modification time and size:
+
+>>> from pydra.tasks.freesurfer.io.volume import read_data
+>>> data = cached_read("aparc+aseg.mgz", read_data)  # doctest: +SKIP
+
+Cached arrays are made read-only, as they are shared by every caller.
+The least recently used values are evicted above a byte budget,
+set by the ``PYDRA_FREESURFER_DECODED_CACHE_SIZE`` environment variable for the default cache:
+
+>>> cache = DecodedCache(budget=2**30)
+>>> cache.stats()
+CacheStats(hits=0, misses=0, evictions=0, size=0, count=0)
+"""
+
+from __future__ import annotations
+
+__all__ = ["CacheStats", "DecodedCache", "cached_read", "get_cache"]
+
+import collections
+import functools
+import os
+import threading
+from typing import Any, Callable
+
+import attrs
+import numpy as np
+from attrs import define
+
+#: Environment variable setting the budget in bytes of the default cache.
+CACHE_SIZE_ENVVAR = "PYDRA_FREESURFER_DECODED_CACHE_SIZE"
+
+#: Budget in bytes of the default cache, unless set by the environment.
+DEFAULT_BUDGET = 2 * 2**30
+
+
+@define(frozen=True)
+class CacheStats:
+    """Counters of a cache.
+
+    Attributes
+    ----------
+    hits, misses : int
+        Number of reads served from the cache and decoded.
+    evictions : int
+        Number of values evicted.
+    size : int
+        Size in bytes of the cached values.
+    count : int
+        Number of cached values.
+    """
+
+    hits: int
+
+    misses: int
+
+    evictions: int
+
+    size: int
+
+    count: int
+
+
+def _freeze(value: Any) -> int:
+    # Arrays are made read-only and their sizes summed, through containers and attrs instances.
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sum(map(_freeze, value))
+    if isinstance(value, dict):
+        return sum(map(_freeze, value.values()))
+    if attrs.has(type(value)):
+        return sum(_freeze(getattr(value, field.name)) for field in attrs.fields(type(value)))
+    return 0
+
+
+class DecodedCache:
+    """Least recently used cache of decoded files, bounded by bytes.
+
+    Parameters
+    ----------
+    budget : int
+        Maximum size in bytes of the cached arrays. Values larger than the budget are never cached.
+    """
+
+    def __init__(self, budget: int = DEFAULT_BUDGET):
+        self.budget = budget
+        self._entries: collections.OrderedDict[tuple, tuple[Any, int]] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._size = 0
+
+    def read(self, path: os.PathLike, reader: Callable[..., Any], **kwargs) -> Any:
+        """Return the value of a reader for a file, from the cache if the file has not changed since.
+
+        Keyword arguments are passed to the reader and are part of the key.
+        """
+        source = os.path.realpath(path)
+        stat = os.stat(source)
+        key = (source, stat.st_mtime_ns, stat.st_size, reader, tuple(sorted(kwargs.items())))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return self._entries[key][0]
+            self._misses += 1
+        # Files are decoded outside of the lock, concurrent misses of the same file decoding it twice at worst.
+        value = reader(path, **kwargs)
+        size = _freeze(value)
+        with self._lock:
+            if size <= self.budget and key not in self._entries:
+                self._entries[key] = (value, size)
+                self._size += size
+                while self._size > self.budget:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._size -= evicted
+                    self._evictions += 1
+        return value
+
+    def stats(self) -> CacheStats:
+        """Return the counters of the cache."""
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions, self._size, len(self._entries))
+
+    def clear(self):
+        """Evict every value and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = self._size = 0
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache() -> DecodedCache:
+    """Return the default cache of the process."""
+    return DecodedCache(int(os.getenv(CACHE_SIZE_ENVVAR, DEFAULT_BUDGET)))
+
+
+def cached_read(path: os.PathLike, reader: Callable[..., Any], **kwargs) -> Any:
+    """Return the value of a reader for a file, through the default cache."""
+    return get_cache().read(path, reader, **kwargs)
@@ -0,0 +1,179 @@
+"""
+Label
+=====
+
+Native reader and writer for FreeSurfer's ASCII labels (``?h.cortex.label``...), with vectorized set operations.
+
+Labels are parsed in bulk into arrays of vertex indices, coordinates and values,
+rather than line by line, so that whole-cortex labels of thousands of subjects load in moments:
+
+>>> cortex = read_label("lh.cortex.label")  # doctest: +SKIP
+>>> mask = cortex.to_mask(163842)  # doctest: +SKIP
+
+Set operations combine labels by vertex index, keeping the coordinates and values of the left operand first:
+
+>>> first = Label([0, 1, 2], [[0.0, 0.0, 0.0]] * 3, [0.0] * 3)
+>>> second = Label([2, 3], [[1.0, 1.0, 1.0]] * 2, [1.0] * 2)
+>>> (first | second).vertices
+array([0, 1, 2, 3], dtype=int32)
+>>> (first & second).vertices
+array([2], dtype=int32)
+>>> (first - second).vertices
+array([0, 1], dtype=int32)
+"""
+
+from __future__ import annotations
+
+__all__ = ["Label", "read_label", "write_label"]
+
+import os
+
+import numpy as np
+from attrs import define, field
+
+# Format of the lines of a label, as FreeSurfer writes them.
+_LINE_FORMAT = "%d  %.3f  %.3f  %.3f %.10f\n"
+
+
+@define
+class Label:
+    """A surface label.
+
+    Attributes
+    ----------
+    vertices : numpy.ndarray
+        Indices of the vertices of the label, as an int32 array.
+    coordinates : numpy.ndarray
+        Coordinates of the vertices, as a float32 array of shape (N, 3).
+    values : numpy.ndarray
+        Value of each vertex, as a float32 array.
+    subject : str
+        Subject the label was drawn on.
+    coordinate_space : str
+        Space of the coordinates, usually ``"TkReg"``.
+    """
+
+    vertices: np.ndarray = field(converter=lambda vertices: np.asarray(vertices, dtype=np.int32), eq=False)
+
+    coordinates: np.ndarray = field(
+        converter=lambda coordinates: np.asarray(coordinates, dtype=np.float32).reshape(-1, 3), eq=False
+    )
+
+    values: np.ndarray = field(converter=lambda values: np.asarray(values, dtype=np.float32), eq=False)
+
+    subject: str = ""
+
+    coordinate_space: str = "TkReg"
+
+    def __len__(self) -> int:
+        return len(self.vertices)
+
+    def _select(self, indices: np.ndarray) -> Label:
+        return Label(
+            self.vertices[indices],
+            self.coordinates[indices],
+            self.values[indices],
+            subject=self.subject,
+            coordinate_space=self.coordinate_space,
+        )
+
+    def union(self, other: Label) -> Label:
+        """Return the vertices of either label, sorted by index."""
+        merged = Label(
+            np.concatenate([self.vertices, other.vertices]),
+            np.concatenate([self.coordinates, other.coordinates]),
+            np.concatenate([self.values, other.values]),
+            subject=self.subject,
+            coordinate_space=self.coordinate_space,
+        )
+        # The first occurrence of each vertex comes from this label if it holds the vertex.
+        _, indices = np.unique(merged.vertices, return_index=True)
+        return merged._select(indices)
+
+    def intersection(self, other: Label) -> Label:
+        """Return the vertices of both labels, sorted by index."""
+        _, indices, _ = np.intersect1d(self.vertices, other.vertices, assume_unique=True, return_indices=True)
+        return self._select(indices)
+
+    def difference(self, other: Label) -> Label:
+        """Return the vertices of this label missing from the other, sorted by index."""
+        indices = np.flatnonzero(~np.isin(self.vertices, other.vertices))
+        return self._select(indices[np.argsort(self.vertices[indices], kind="stable")])
+
+    __or__ = union
+
+    __and__ = intersection
+
+    __sub__ = difference
+
+    def to_mask(self, num_vertices: int) -> np.ndarray:
+        """Return a boolean mask of the vertices of a surface in the label."""
+        mask = np.zeros(num_vertices, dtype=bool)
+        mask[self.vertices] = True
+        return mask
+
+    @classmethod
+    def from_mask(
+        cls,
+        mask: np.ndarray,
+        vertices: np.ndarray | None = None,
+        values: np.ndarray | None = None,
+        subject: str = "",
+    ) -> Label:
+        """Create a label from a boolean mask of the vertices of a surface.
+
+        Parameters
+        ----------
+        mask : numpy.ndarray
+            Boolean mask of the vertices of the label.
+        vertices : numpy.ndarray, optional
+            Coordinates of all the vertices of the surface, zero if not given.
+        values : numpy.ndarray, optional
+            Values of all the vertices of the surface, zero if not given.
+        subject : str
+            Subject the label is drawn on.
+        """
+        indices = np.flatnonzero(mask)
+        coordinates = np.zeros((len(indices), 3)) if vertices is None else np.asarray(vertices)[indices]
+        return cls(
+            indices,
+            coordinates,
+            np.zeros(len(indices)) if values is None else np.asarray(values)[indices],
+            subject=subject,
+        )
+
+    def map_to_surface(self, vertices: np.ndarray) -> Label:
+        """Return the label with the coordinates of its vertices on another surface of the same subject."""
+        return Label(
+            self.vertices,
+            np.asarray(vertices)[self.vertices],
+            self.values,
+            subject=self.subject,
+            coordinate_space=self.coordinate_space,
+        )
+
+
+def read_label(path: os.PathLike) -> Label:
+    """Read an ASCII label."""
+    with open(path) as f:
+        header = f.readline()
+        count = int(f.readline())
+        # Numbers are parsed in bulk, all lines having the same number of columns.
+        data = np.fromstring(f.read(), dtype=np.float64, sep=" ")
+    if data.size != count * 5:
+        raise ValueError(f"Expected {count} lines of 5 columns in label: {path}")
+    data = data.reshape(count, 5)
+    subject, _, coordinate_space = "", "", "TkReg"
+    if "from subject" in header:
+        subject, _, coordinate_space = header.split("from subject", 1)[1].strip().partition("vox2ras=")
+        subject, coordinate_space = subject.strip(), coordinate_space.strip() or "TkReg"
+    return Label(data[:, 0], data[:, 1:4], data[:, 4], subject=subject, coordinate_space=coordinate_space)
+
+
+def write_label(path: os.PathLike, label: Label):
+    """Write an ASCII label, as FreeSurfer does."""
+    rows = zip(label.vertices.tolist(), *label.coordinates.T.tolist(), label.values.tolist())
+    with open(path, "w") as f:
+        f.write(f"#!ascii label  , from subject {label.subject} vox2ras={label.coordinate_space}\n")
+        f.write(f"{len(label)}\n")
+        f.write("".join(_LINE_FORMAT % row for row in rows))
@@ -0,0 +1,247 @@
+"""
+MGH
+===
+
+Native reader and writer for FreeSurfer's MGH (``.mgh``) and compressed MGH (``.mgz``) volumes.
+
+Headers are parsed without reading any voxel data:
+
+>>> header = MGHHeader.from_affine((256, 256, 256), np.uint8, np.diag([-1.0, 1.0, 1.0, 1.0]))
+>>> header.shape
+(256, 256, 256)
+>>> header.voxel_size
+(1.0, 1.0, 1.0)
+
+Voxel data of uncompressed volumes are memory-mapped with zero copy,
+whereas compressed volumes are decompressed in chunks straight into the returned array.
+Arrays are indexed in FreeSurfer's column, row, slice (and frame) order, with the file's big-endian data type.
+"""
+
+from __future__ import annotations
+
+__all__ = ["MGHHeader", "is_compressed", "iter_frames", "read_data", "read_header", "write"]
+
+import gzip
+import os
+import struct
+from typing import BinaryIO, Iterator
+
+import numpy as np
+from attrs import define, field
+
+from pydra.tasks.freesurfer.io import pgzip
+
+#: Size in bytes of the header, after which voxel data start.
+HEADER_SIZE = 284
+
+#: Size in bytes of the chunks decompressed at once.
+CHUNK_SIZE = 2**24
+
+#: Data types by MGH type code.
+DATA_TYPES = {0: np.dtype(">u1"), 1: np.dtype(">i4"), 3: np.dtype(">f4"), 4: np.dtype(">i2")}
+
+_HEADER_STRUCT = struct.Struct(">7ih15f")
+
+
+def is_compressed(path: os.PathLike) -> bool:
+    """Whether a path refers to a compressed volume, by its extension."""
+    return os.fspath(path).endswith((".mgz", ".gz"))
+
+
+def _open(path: os.PathLike) -> BinaryIO:
+    return gzip.open(path) if is_compressed(path) else open(path, "rb")
+
+
+@define(frozen=True)
+class MGHHeader:
+    """Header of an MGH volume.
+
+    Attributes
+    ----------
+    dims : tuple of int
+        Number of columns, rows, slices and frames.
+    dtype : numpy.dtype
+        Big-endian data type of voxels.
+    dof : int
+        Degrees of freedom.
+    good_ras : bool
+        Whether the geometry below is valid.
+    voxel_size : tuple of float
+        Voxel size in millimeters.
+    direction_cosines : numpy.ndarray
+        Direction cosines of columns, rows and slices, as the columns of a 3x3 matrix.
+    center : tuple of float
+        RAS coordinates of the center of the volume.
+    """
+
+    dims: tuple = field(converter=tuple)
+
+    dtype: np.dtype = field(converter=lambda dtype: np.dtype(dtype).newbyteorder(">"))
+
+    dof: int = 0
+
+    good_ras: bool = True
+
+    voxel_size: tuple = field(default=(1.0, 1.0, 1.0), converter=lambda size: tuple(map(float, size)))
+
+    direction_cosines: np.ndarray = field(
+        factory=lambda: np.array([[-1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.0, -1.0, 0.0]]),
+        converter=lambda cosines: np.asarray(cosines, dtype=float),
+        eq=False,
+    )
+
+    center: tuple = field(default=(0.0, 0.0, 0.0), converter=lambda center: tuple(map(float, center)))
+
+    @classmethod
+    def from_bytes(cls, buffer: bytes) -> MGHHeader:
+        """Parse a header from its first bytes."""
+        values = _HEADER_STRUCT.unpack_from(buffer)
+        version, dims, (type_code, dof, good_ras), geometry = values[0], values[1:5], values[5:8], values[8:]
+        if version != 1:
+            raise ValueError(f"Unsupported MGH version: {version}")
+        if type_code not in DATA_TYPES:
+            raise ValueError(f"Unsupported MGH data type: {type_code}")
+        if not good_ras:
+            return cls(dims, DATA_TYPES[type_code], dof=dof, good_ras=False)
+        return cls(
+            dims,
+            DATA_TYPES[type_code],
+            dof=dof,
+            voxel_size=geometry[:3],
+            direction_cosines=np.reshape(geometry[3:12], (3, 3)).T,
+            center=geometry[12:],
+        )
+
+    @classmethod
+    def from_affine(cls, shape: tuple, dtype, affine: np.ndarray) -> MGHHeader:
+        """Create a header for an array of a given shape and voxel to RAS transform."""
+        affine = np.asarray(affine, dtype=float)
+        dims = (tuple(shape) + (1,) * 4)[:3] + ((shape[3],) if len(shape) > 3 else (1,))
+        voxel_size = np.linalg.norm(affine[:3, :3], axis=0)
+        center = affine[:3, :3] @ (np.array(dims[:3]) / 2) + affine[:3, 3]
+        return cls(dims, dtype, voxel_size=voxel_size, direction_cosines=affine[:3, :3] / voxel_size, center=center)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the header, padded to its full size."""
+        type_code = next(code for code, dtype in DATA_TYPES.items() if dtype == self.dtype)
+        geometry = (*self.voxel_size, *self.direction_cosines.T.ravel(), *self.center)
+        buffer = _HEADER_STRUCT.pack(1, *self.dims, type_code, self.dof, self.good_ras, *geometry)
+        return buffer.ljust(HEADER_SIZE, b"\0")
+
+    @property
+    def shape(self) -> tuple:
+        """Shape of the data array, without the frame axis for single-frame volumes."""
+        return self.dims if self.dims[3] > 1 else self.dims[:3]
+
+    @property
+    def frame_size(self) -> int:
+        """Size in bytes of a frame."""
+        return int(np.prod(self.dims[:3])) * self.dtype.itemsize
+
+    @property
+    def data_size(self) -> int:
+        """Size in bytes of the voxel data."""
+        return self.frame_size * self.dims[3]
+
+    @property
+    def affine(self) -> np.ndarray:
+        """Voxel to RAS transform."""
+        rotation = self.direction_cosines * self.voxel_size
+        affine = np.eye(4)
+        affine[:3, :3] = rotation
+        affine[:3, 3] = np.array(self.center) - rotation @ (np.array(self.dims[:3]) / 2)
+        return affine
+
+
+def read_header(path: os.PathLike) -> MGHHeader:
+    """Read the header of a volume, decompressing only its first bytes."""
+    with _open(path) as f:
+        return MGHHeader.from_bytes(f.read(HEADER_SIZE))
+
+
+def _read_exactly(f: BinaryIO, buffer: memoryview) -> int:
+    # Decompressing readers may return fewer bytes than requested.
+    total = 0
+    while total < len(buffer):
+        count = f.readinto(buffer[total:])
+        if not count:
+            break
+        total += count
+    return total
+
+
+def _as_volume(flat: np.ndarray, header: MGHHeader) -> np.ndarray:
+    # Columns vary fastest on disk, hence a Fortran-ordered view.
+    return flat.reshape(header.dims, order="F").reshape(header.shape, order="F")
+
+
+def read_data(path: os.PathLike, mmap: bool = True, threads: int | None = None) -> np.ndarray:
+    """Read the voxel data of a volume.
+
+    Uncompressed volumes are memory-mapped read-only unless ``mmap`` is false.
+    Compressed volumes are decompressed in parallel if written by :mod:`~.pgzip`,
+    and in chunks into a preallocated array otherwise.
+    """
+    header = read_header(path)
+    count = header.data_size // header.dtype.itemsize
+    if not is_compressed(path):
+        if mmap:
+            flat = np.memmap(path, dtype=header.dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+        else:
+            flat = np.fromfile(path, dtype=header.dtype, count=count, offset=HEADER_SIZE)
+        return _as_volume(flat, header)
+    if pgzip.get_members(path) is not None:
+        buffer = pgzip.decompress_file(path, threads=threads)
+        if len(buffer) < HEADER_SIZE + header.data_size:
+            raise ValueError(f"Truncated MGH volume: {path}")
+        return _as_volume(np.frombuffer(buffer, dtype=header.dtype, count=count, offset=HEADER_SIZE), header)
+    flat = np.empty(count, dtype=header.dtype)
+    view = memoryview(flat).cast("B")
+    with _open(path) as f:
+        f.seek(HEADER_SIZE)
+        for start in range(0, len(view), CHUNK_SIZE):
+            chunk = view[start : start + CHUNK_SIZE]
+            if _read_exactly(f, chunk) != len(chunk):
+                raise ValueError(f"Truncated MGH volume: {path}")
+    return _as_volume(flat, header)
+
+
+def iter_frames(path: os.PathLike) -> Iterator[np.ndarray]:
+    """Iterate over the frames of a volume, holding a single frame in memory for compressed volumes."""
+    header = read_header(path)
+    shape = header.dims[:3]
+    if not is_compressed(path):
+        data = read_data(path)
+        for index in range(header.dims[3]):
+            yield data[..., index] if data.ndim > 3 else data
+        return
+    with _open(path) as f:
+        f.seek(HEADER_SIZE)
+        for _ in range(header.dims[3]):
+            frame = np.empty(np.prod(shape), dtype=header.dtype)
+            if _read_exactly(f, memoryview(frame).cast("B")) != header.frame_size:
+                raise ValueError(f"Truncated MGH volume: {path}")
+            yield frame.reshape(shape, order="F")
+
+
+def write(path: os.PathLike, data: np.ndarray, header: MGHHeader, compresslevel: int = 6, threads: int | None = None):
+    """Write a volume, compressed in parallel if its extension is ``.mgz``.
+
+    Data are cast to the data type of the header.
+    """
+    data = np.asarray(data)
+    if data.shape != header.shape:
+        raise ValueError(f"Data shape {data.shape} does not match header shape {header.shape}")
+    if is_compressed(path):
+        f = pgzip.open_writer(path, compresslevel=compresslevel, threads=threads)
+    else:
+        f = open(path, "wb")
+    with f:
+        f.write(header.to_bytes())
+        if is_compressed(path):
+            f.end_member()
+        if data.ndim > 3:
+            for index in range(data.shape[3]):
+                f.write(data[..., index].astype(header.dtype, copy=False).tobytes(order="F"))
+        else:
+            f.write(data.astype(header.dtype, copy=False).tobytes(order="F"))
@@ -0,0 +1,140 @@
+"""
+Morphometry
+===========
+
+Native reader and writer for per-vertex data, in FreeSurfer's "curv" format (``?h.thickness``, ``?h.area``,
+``?h.curv``...) and as MGH overlays (``.mgh``, ``.mgz``).
+
+Values are returned as contiguous float32 arrays:
+
+>>> thickness = read_morph("lh.thickness")  # doctest: +SKIP
+>>> thickness.shape, thickness.dtype  # doctest: +SKIP
+((163842,), dtype('float32'))
+
+Maps of many subjects are stacked into a single preallocated array, each file being read straight into its row,
+concurrently:
+
+>>> thickness = stack_morphs([f"{subject}/surf/lh.thickness.fsaverage.mgh" for subject in subjects])  # doctest: +SKIP
+>>> thickness.shape  # doctest: +SKIP
+(10000, 163842)
+
+Curv files of the old format, with values stored as 16-bit integers, are read but never written.
+"""
+
+from __future__ import annotations
+
+__all__ = ["read_curv_header", "read_morph", "read_morph_into", "stack_morphs", "write_morph"]
+
+import os
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Sequence
+
+import numpy as np
+
+from pydra.tasks.freesurfer.io import mgh
+
+#: Magic number of curv files of the new format.
+CURV_MAGIC = b"\xff\xff\xff"
+
+# Size in bytes of the header of curv files of the new format.
+_CURV_HEADER_SIZE = 15
+
+
+def _is_overlay(path: os.PathLike) -> bool:
+    return os.fspath(path).endswith((".mgh", ".mgz"))
+
+
+def read_curv_header(path: os.PathLike) -> tuple[int, int, int]:
+    """Return the number of vertices, faces and values per vertex of a curv file."""
+    with open(path, "rb") as f:
+        header = f.read(_CURV_HEADER_SIZE)
+    if header[:3] != CURV_MAGIC:
+        # Old format: numbers of vertices and faces as 3-byte integers, one value per vertex.
+        return int.from_bytes(header[:3], "big"), int.from_bytes(header[3:6], "big"), 1
+    return struct.unpack_from(">3i", header, 3)
+
+
+def _get_num_vertices(path: os.PathLike) -> int:
+    if _is_overlay(path):
+        dims = mgh.read_header(path).dims
+        if dims[3] != 1:
+            raise ValueError(f"Overlay with {dims[3]} frames: {path}")
+        return int(np.prod(dims[:3]))
+    num_vertices, _, values_per_vertex = read_curv_header(path)
+    if values_per_vertex != 1:
+        raise ValueError(f"Curv file with {values_per_vertex} values per vertex: {path}")
+    return num_vertices
+
+
+def read_morph_into(path: os.PathLike, out: np.ndarray) -> np.ndarray:
+    """Read per-vertex data into a preallocated contiguous float32 array of the matching size."""
+    if out.dtype != np.float32 or not out.flags.c_contiguous:
+        raise ValueError("Output array must be a contiguous float32 array")
+    num_vertices = _get_num_vertices(path)
+    if out.size != num_vertices:
+        raise ValueError(f"Expected {out.size} vertices, found {num_vertices}: {path}")
+    if _is_overlay(path):
+        out[...] = mgh.read_data(path).reshape(out.shape, order="F")
+        return out
+    with open(path, "rb") as f:
+        magic = f.read(3)
+        if magic != CURV_MAGIC:
+            f.seek(6)
+            out[...] = np.fromfile(f, dtype=">i2", count=num_vertices).reshape(out.shape) / 100
+            return out
+        f.seek(_CURV_HEADER_SIZE)
+        view = memoryview(out).cast("B")
+        if f.readinto(view) != len(view):
+            raise ValueError(f"Truncated curv file: {path}")
+    # Values are read as big-endian bytes, swapped in place.
+    if sys.byteorder == "little":
+        out.byteswap(inplace=True)
+    return out
+
+
+def read_morph(path: os.PathLike) -> np.ndarray:
+    """Read per-vertex data as a contiguous float32 array."""
+    return read_morph_into(path, np.empty(_get_num_vertices(path), dtype=np.float32))
+
+
+def write_morph(path: os.PathLike, values: np.ndarray, num_faces: int = 0):
+    """Write per-vertex data, as an MGH overlay if the extension is ``.mgh`` or ``.mgz``, as a curv file otherwise.
+
+    The number of faces is only recorded in curv files.
+    """
+    values = np.asarray(values, dtype=np.float32).ravel()
+    if _is_overlay(path):
+        header = mgh.MGHHeader((len(values), 1, 1, 1), np.float32)
+        mgh.write(path, values.reshape(-1, 1, 1), header)
+        return
+    with open(path, "wb") as f:
+        f.write(CURV_MAGIC + struct.pack(">3i", len(values), num_faces, 1))
+        f.write(values.astype(">f4").tobytes())
+
+
+def stack_morphs(
+    paths: Sequence[os.PathLike],
+    out: np.ndarray | None = None,
+    max_workers: int | None = None,
+) -> np.ndarray:
+    """Read the per-vertex data of many files into the rows of a single array.
+
+    Parameters
+    ----------
+    paths : sequence of path-like
+        Files with the same number of vertices, such as maps resampled to a common template.
+    out : numpy.ndarray, optional
+        Preallocated contiguous float32 array of shape (len(paths), N), allocated if not given.
+    max_workers : int, optional
+        Maximum number of files read concurrently.
+    """
+    if out is None:
+        out = np.empty((len(paths), _get_num_vertices(paths[0]) if paths else 0), dtype=np.float32)
+    if len(out) != len(paths):
+        raise ValueError(f"Expected an array of {len(paths)} rows, got {len(out)}")
+    with ThreadPoolExecutor(max_workers) as executor:
+        for future in [executor.submit(read_morph_into, path, row) for path, row in zip(paths, out)]:
+            future.result()
+    return out
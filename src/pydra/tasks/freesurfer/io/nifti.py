@@ -0,0 +1,404 @@
+"""
+NIfTI
+=====
+
+Native reader for NIfTI-1 and NIfTI-2 volumes (``.nii`` and ``.nii.gz``), with a minimal NIfTI-1 writer.
+
+Headers are parsed without reading any voxel data, and the data of 4D volumes are accessed lazily,
+a few volumes at a time, to process long fMRI or dynamic PET series with bounded memory:
+
+>>> header = read_header("bold.nii.gz")  # doctest: +SKIP
+>>> header.shape  # doctest: +SKIP
+(64, 64, 40, 600)
+>>> for slab in iter_volumes("bold.nii.gz", size=50):  # doctest: +SKIP
+...     print(slab.shape)
+(64, 64, 40, 50)
+...
+
+Uncompressed files are memory-mapped with zero copy.
+Compressed files are indexed on first access with snapshots of the decompressor state at regular intervals,
+so that later accesses decompress from the nearest snapshot rather than from the start of the file.
+Raw voxel values are returned, which :meth:`NiftiHeader.scale` converts with the scaling of the header.
+"""
+
+from __future__ import annotations
+
+__all__ = [
+    "GzipIndex",
+    "NiftiHeader",
+    "iter_volumes",
+    "read_data",
+    "read_header",
+    "read_volumes",
+    "set_affine",
+    "write",
+]
+
+import bisect
+import functools
+import gzip
+import os
+import struct
+import zlib
+from typing import Iterator
+
+import numpy as np
+from attrs import define, field
+
+from pydra.tasks.freesurfer.io import pgzip
+
+#: Data types by NIfTI type code.
+DATA_TYPES = {
+    2: np.uint8,
+    4: np.int16,
+    8: np.int32,
+    16: np.float32,
+    64: np.float64,
+    256: np.int8,
+    512: np.uint16,
+    768: np.uint32,
+    1024: np.int64,
+    1280: np.uint64,
+}
+
+#: Interval in bytes of uncompressed data between snapshots of a gzip index.
+INDEX_SPAN = 2**24
+
+#: Size in bytes of the compressed chunks read at once.
+CHUNK_SIZE = 2**16
+
+
+def is_compressed(path: os.PathLike) -> bool:
+    """Whether a path refers to a compressed volume, by its extension."""
+    return os.fspath(path).endswith(".gz")
+
+
+def _quaternion_to_rotation(b: float, c: float, d: float) -> np.ndarray:
+    a = np.sqrt(max(0.0, 1.0 - (b * b + c * c + d * d)))
+    return np.array(
+        [
+            [a * a + b * b - c * c - d * d, 2 * (b * c - a * d), 2 * (b * d + a * c)],
+            [2 * (b * c + a * d), a * a + c * c - b * b - d * d, 2 * (c * d - a * b)],
+            [2 * (b * d - a * c), 2 * (c * d + a * b), a * a + d * d - c * c - b * b],
+        ]
+    )
+
+
+def _rotation_to_quaternion(rotation: np.ndarray) -> tuple[float, float, float]:
+    # Returns (b, c, d) with a non-negative real part, as NIfTI requires.
+    (r11, r12, r13), (r21, r22, r23), (r31, r32, r33) = rotation
+    trace = r11 + r22 + r33
+    if trace > 0:
+        a = 0.5 * np.sqrt(1.0 + trace)
+        b, c, d = (r32 - r23) / (4 * a), (r13 - r31) / (4 * a), (r21 - r12) / (4 * a)
+    elif r11 >= r22 and r11 >= r33:
+        b = 0.5 * np.sqrt(1.0 + r11 - r22 - r33)
+        a, c, d = (r32 - r23) / (4 * b), (r12 + r21) / (4 * b), (r13 + r31) / (4 * b)
+    elif r22 >= r33:
+        c = 0.5 * np.sqrt(1.0 - r11 + r22 - r33)
+        a, b, d = (r13 - r31) / (4 * c), (r12 + r21) / (4 * c), (r23 + r32) / (4 * c)
+    else:
+        d = 0.5 * np.sqrt(1.0 - r11 - r22 + r33)
+        a, b, c = (r21 - r12) / (4 * d), (r13 + r31) / (4 * d), (r23 + r32) / (4 * d)
+    return (-b, -c, -d) if a < 0 else (b, c, d)
+
+
+@define(frozen=True)
+class NiftiHeader:
+    """Header of a NIfTI volume.
+
+    Attributes
+    ----------
+    version : int
+        Either 1 or 2.
+    shape : tuple of int
+        Shape of the data array.
+    dtype : numpy.dtype
+        Data type of voxels, with the byte order of the file.
+    pixdim : tuple of float
+        Voxel size along each axis, and the repetition time for 4D volumes.
+    vox_offset : int
+        Offset in bytes of the voxel data.
+    affine : numpy.ndarray
+        Voxel to world transform, from the sform if set, from the qform otherwise.
+    scl_slope, scl_inter : float
+        Scaling of voxel values.
+    """
+
+    version: int
+
+    shape: tuple = field(converter=tuple)
+
+    dtype: np.dtype = field(converter=np.dtype)
+
+    pixdim: tuple = field(converter=tuple)
+
+    vox_offset: int
+
+    affine: np.ndarray = field(eq=False)
+
+    scl_slope: float = 0.0
+
+    scl_inter: float = 0.0
+
+    @classmethod
+    def from_bytes(cls, buffer: bytes) -> NiftiHeader:
+        """Parse a header from its first bytes."""
+        for endian in "<>":
+            (sizeof_hdr,) = struct.unpack_from(f"{endian}i", buffer)
+            if sizeof_hdr in (348, 540):
+                break
+        else:
+            raise ValueError("Not a NIfTI header")
+        if sizeof_hdr == 348:
+            version = 1
+            dim = struct.unpack_from(f"{endian}8h", buffer, 40)
+            (datatype,) = struct.unpack_from(f"{endian}h", buffer, 70)
+            pixdim = struct.unpack_from(f"{endian}8f", buffer, 76)
+            vox_offset, scl_slope, scl_inter = struct.unpack_from(f"{endian}3f", buffer, 108)
+            qform_code, sform_code = struct.unpack_from(f"{endian}2h", buffer, 252)
+            quaternion = struct.unpack_from(f"{endian}6f", buffer, 256)
+            srows = struct.unpack_from(f"{endian}12f", buffer, 280)
+        else:
+            version = 2
+            (datatype,) = struct.unpack_from(f"{endian}h", buffer, 12)
+            dim = struct.unpack_from(f"{endian}8q", buffer, 16)
+            pixdim = struct.unpack_from(f"{endian}8d", buffer, 104)
+            (vox_offset,) = struct.unpack_from(f"{endian}q", buffer, 168)
+            scl_slope, scl_inter = struct.unpack_from(f"{endian}2d", buffer, 176)
+            qform_code, sform_code = struct.unpack_from(f"{endian}2i", buffer, 344)
+            quaternion = struct.unpack_from(f"{endian}6d", buffer, 352)
+            srows = struct.unpack_from(f"{endian}12d", buffer, 400)
+        if datatype not in DATA_TYPES:
+            raise ValueError(f"Unsupported NIfTI data type: {datatype}")
+        affine = np.eye(4)
+        if sform_code > 0:
+            affine[:3] = np.reshape(srows, (3, 4))
+        elif qform_code > 0:
+            qfac = -1.0 if pixdim[0] < 0 else 1.0
+            affine[:3, :3] = _quaternion_to_rotation(*quaternion[:3]) * [pixdim[1], pixdim[2], pixdim[3] * qfac]
+            affine[:3, 3] = quaternion[3:]
+        else:
+            affine[:3, :3] = np.diag(pixdim[1:4])
+        return cls(
+            version,
+            dim[1 : dim[0] + 1],
+            np.dtype(DATA_TYPES[datatype]).newbyteorder(endian),
+            pixdim[1 : dim[0] + 1],
+            int(vox_offset),
+            affine,
+            scl_slope=scl_slope,
+            scl_inter=scl_inter,
+        )
+
+    @property
+    def volume_shape(self) -> tuple:
+        """Shape of a single 3D volume."""
+        return (self.shape + (1, 1, 1))[:3]
+
+    @property
+    def volume_size(self) -> int:
+        """Size in bytes of a single 3D volume."""
+        return int(np.prod(self.volume_shape)) * self.dtype.itemsize
+
+    @property
+    def num_volumes(self) -> int:
+        """Number of 3D volumes, for 4D and higher-dimensional data."""
+        return int(np.prod(self.shape[3:], dtype=int))
+
+    def scale(self, data: np.ndarray) -> np.ndarray:
+        """Apply the scaling of the header to raw voxel values."""
+        if self.scl_slope == 0.0 or not np.isfinite(self.scl_slope) or (self.scl_slope, self.scl_inter) == (1.0, 0.0):
+            return data
+        return data * self.scl_slope + self.scl_inter
+
+
+def set_affine(buffer: bytes, affine: np.ndarray) -> bytes:
+    """Return a copy of raw header bytes with both the sform and the qform set to an affine.
+
+    The codes of the forms are preserved when set, and set to scanner coordinates otherwise.
+    """
+    buffer = bytearray(buffer)
+    endian = "<" if struct.unpack_from("<i", buffer)[0] in (348, 540) else ">"
+    version = 1 if struct.unpack_from(f"{endian}i", buffer)[0] == 348 else 2
+    affine = np.asarray(affine, dtype=float)
+    voxel_size = np.linalg.norm(affine[:3, :3], axis=0)
+    rotation = affine[:3, :3] / voxel_size
+    qfac = 1.0
+    if np.linalg.det(rotation) < 0:
+        qfac = -1.0
+        rotation[:, 2] *= -1
+    quaternion = (*_rotation_to_quaternion(rotation), *affine[:3, 3])
+    # Offsets and formats of pixdim[0:4], form codes, quaternion and srows, by version.
+    real, code, offsets = ("f", "h", (76, 252, 256, 280)) if version == 1 else ("d", "i", (104, 344, 352, 400))
+    qform_code, sform_code = struct.unpack_from(f"{endian}2{code}", buffer, offsets[1])
+    struct.pack_into(f"{endian}4{real}", buffer, offsets[0], qfac, *voxel_size)
+    struct.pack_into(f"{endian}2{code}", buffer, offsets[1], qform_code or 1, sform_code or 1)
+    struct.pack_into(f"{endian}6{real}", buffer, offsets[2], *quaternion)
+    struct.pack_into(f"{endian}12{real}", buffer, offsets[3], *affine[:3].ravel())
+    return bytes(buffer)
+
+
+def _read_prefix(path: os.PathLike, size: int) -> bytes:
+    with gzip.open(path) if is_compressed(path) else open(path, "rb") as f:
+        return f.read(size)
+
+
+def read_header(path: os.PathLike) -> NiftiHeader:
+    """Read the header of a volume, decompressing only its first bytes."""
+    return NiftiHeader.from_bytes(_read_prefix(path, 540))
+
+
+class GzipIndex:
+    """Random access index of a gzip file.
+
+    Snapshots of the decompressor state are taken every ``span`` bytes of uncompressed data.
+    Concatenated gzip members are supported.
+    """
+
+    def __init__(self, path: os.PathLike, span: int = INDEX_SPAN):
+        self.path = os.fspath(path)
+        self.span = span
+        # Uncompressed offsets, with compressed offsets and decompressor states.
+        self.offsets = [0]
+        self.points = [(0, None)]
+        self._build()
+
+    def _build(self):
+        decompressor = zlib.decompressobj(wbits=31)
+        position, compressed = 0, 0
+        with open(self.path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                compressed += len(chunk)
+                while chunk:
+                    position += len(decompressor.decompress(chunk))
+                    chunk = decompressor.unused_data if decompressor.eof else b""
+                    if decompressor.eof:
+                        decompressor = zlib.decompressobj(wbits=31)
+                if position - self.offsets[-1] >= self.span:
+                    self.offsets.append(position)
+                    self.points.append((compressed, decompressor.copy()))
+        self.size = position
+
+    def read(self, offset: int, size: int) -> bytes:
+        """Read uncompressed bytes from an offset, decompressing from the nearest preceding snapshot."""
+        index = bisect.bisect_right(self.offsets, offset) - 1
+        position = self.offsets[index]
+        compressed, decompressor = self.points[index]
+        decompressor = decompressor.copy() if decompressor is not None else zlib.decompressobj(wbits=31)
+        output = bytearray()
+        with open(self.path, "rb") as f:
+            f.seek(compressed)
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                while chunk:
+                    data = decompressor.decompress(chunk)
+                    chunk = decompressor.unused_data if decompressor.eof else b""
+                    if decompressor.eof:
+                        decompressor = zlib.decompressobj(wbits=31)
+                    start = max(offset - position, 0)
+                    position += len(data)
+                    if start < len(data):
+                        output += data[start : start + size - len(output)]
+                    if len(output) >= size:
+                        return bytes(output)
+        raise ValueError(f"Truncated gzip file: {self.path}")
+
+
+@functools.lru_cache(maxsize=16)
+def _get_index(path: str, size: int, mtime_ns: int) -> GzipIndex:
+    return GzipIndex(path)
+
+
+def get_index(path: os.PathLike) -> GzipIndex:
+    """Return the index of a gzip file, built once per file version."""
+    stat = os.stat(path)
+    return _get_index(os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+
+
+def read_data(path: os.PathLike, mmap: bool = True, threads: int | None = None) -> np.ndarray:
+    """Read the raw voxel data of a volume, memory-mapped read-only for uncompressed files unless ``mmap`` is false.
+
+    Compressed files written by :mod:`~.pgzip` are decompressed in parallel.
+    """
+    header = read_header(path)
+    count = int(np.prod(header.shape))
+    if is_compressed(path) and pgzip.get_members(path) is not None:
+        buffer = pgzip.decompress_file(path, threads=threads)
+        count = min(count, max(len(buffer) - header.vox_offset, 0) // header.dtype.itemsize)
+        flat = np.frombuffer(buffer, dtype=header.dtype, count=count, offset=header.vox_offset)
+    elif is_compressed(path):
+        with gzip.open(path) as f:
+            f.seek(header.vox_offset)
+            flat = np.frombuffer(f.read(count * header.dtype.itemsize), dtype=header.dtype)
+    elif mmap:
+        flat = np.memmap(path, dtype=header.dtype, mode="r", offset=header.vox_offset, shape=(count,))
+    else:
+        flat = np.fromfile(path, dtype=header.dtype, count=count, offset=header.vox_offset)
+    if flat.size != count:
+        raise ValueError(f"Truncated NIfTI volume: {path}")
+    return flat.reshape(header.shape, order="F")
+
+
+def read_volumes(path: os.PathLike, start: int, stop: int) -> np.ndarray:
+    """Read the raw voxel data of a range of 3D volumes of a 4D volume, stacked along the last axis."""
+    header = read_header(path)
+    stop = min(stop, header.num_volumes)
+    shape = (*header.volume_shape, max(stop - start, 0))
+    offset = header.vox_offset + start * header.volume_size
+    size = shape[3] * header.volume_size
+    if not is_compressed(path):
+        flat = np.memmap(path, dtype=header.dtype, mode="r", offset=offset, shape=(size // header.dtype.itemsize,))
+    else:
+        flat = np.frombuffer(get_index(path).read(offset, size), dtype=header.dtype) if size else np.empty(0)
+    return flat.reshape(shape, order="F")
+
+
+def iter_volumes(path: os.PathLike, size: int = 1) -> Iterator[np.ndarray]:
+    """Iterate over slabs of consecutive 3D volumes of a 4D volume, stacked along the last axis."""
+    header = read_header(path)
+    if not is_compressed(path):
+        for start in range(0, header.num_volumes, size):
+            yield read_volumes(path, start, start + size)
+        return
+    # Stream sequentially through the file rather than seeking for each slab.
+    with gzip.open(path) as f:
+        f.seek(header.vox_offset)
+        for start in range(0, header.num_volumes, size):
+            count = min(size, header.num_volumes - start)
+            buffer = f.read(count * header.volume_size)
+            if len(buffer) != count * header.volume_size:
+                raise ValueError(f"Truncated NIfTI volume: {path}")
+            yield np.frombuffer(buffer, dtype=header.dtype).reshape((*header.volume_shape, count), order="F")
+
+
+def write(path: os.PathLike, data: np.ndarray, affine: np.ndarray, compresslevel: int = 6, threads: int | None = None):
+    """Write a single-file NIfTI-1 volume, compressed in parallel if its extension is ``.nii.gz``.
+
+    The affine is stored as the sform, with the qform left unset.
+    """
+    data = np.asarray(data)
+    native = data.dtype.newbyteorder("=")
+    datatype = next((code for code, dtype in DATA_TYPES.items() if np.dtype(dtype) == native), None)
+    if datatype is None:
+        raise ValueError(f"Unsupported data type: {data.dtype}")
+    affine = np.asarray(affine, dtype=float)
+    header = bytearray(352)
+    dim = (data.ndim, *data.shape) + (1,) * (7 - data.ndim)
+    pixdim = (1.0, *np.linalg.norm(affine[:3, :3], axis=0)) + (1.0,) * 4
+    struct.pack_into("<i", header, 0, 348)
+    struct.pack_into("<8h", header, 40, *dim)
+    struct.pack_into("<2h", header, 70, datatype, data.dtype.itemsize * 8)
+    struct.pack_into("<8f", header, 76, *pixdim)
+    struct.pack_into("<3f", header, 108, 352.0, 1.0, 0.0)
+    struct.pack_into("<2h", header, 252, 0, 1)
+    struct.pack_into("<12f", header, 280, *affine[:3].ravel())
+    struct.pack_into("4s", header, 344, b"n+1\0")
+    if is_compressed(path):
+        f = pgzip.open_writer(path, compresslevel=compresslevel, threads=threads)
+    else:
+        f = open(path, "wb")
+    with f:
+        f.write(header)
+        if is_compressed(path):
+            f.end_member()
+        f.write(data.astype(data.dtype.newbyteorder("<"), copy=False).tobytes(order="F"))
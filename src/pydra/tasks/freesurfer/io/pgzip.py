@@ -0,0 +1,192 @@
+"""
+Parallel Gzip
+=============
+
+Block-parallel gzip compression and decompression for ``.mgz`` and ``.nii.gz`` files.
+
+Data are split into blocks compressed concurrently as independent gzip members,
+whose concatenation is a valid gzip stream readable by any gzip reader, including FreeSurfer's.
+Each member records its compressed size in an extra header field, like BGZF does,
+so that the members of a file written by this module are located without decompressing,
+then decompressed concurrently:
+
+>>> import io
+>>> buffer = io.BytesIO()
+>>> with ParallelGzipWriter(buffer, threads=4, block_size=4) as f:
+...     _ = f.write(b"compressed in parallel")
+>>> import gzip
+>>> gzip.decompress(buffer.getvalue())
+b'compressed in parallel'
+
+Headers are written as members of their own, so that they may be rewritten
+without recompressing voxel data (see :func:`~.volume.rewrite_affine`).
+Files written by other tools are decompressed sequentially.
+The number of threads defaults to the thread budget of the host,
+see :func:`~pydra.tasks.freesurfer.engine.threads.get_thread_budget`.
+"""
+
+from __future__ import annotations
+
+__all__ = ["ParallelGzipWriter", "compress_member", "decompress_file", "get_members", "open_writer"]
+
+import collections
+import gzip
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO
+
+from pydra.tasks.freesurfer._cpu import get_thread_budget
+
+#: Size in bytes of the uncompressed blocks compressed independently.
+BLOCK_SIZE = 2**20
+
+#: Identifier of the extra header subfield recording the compressed size of a member.
+SUBFIELD_ID = b"PZ"
+
+# Magic, deflate, extra field flag, no modification time, no extra flags, unknown OS, extra field length.
+_MEMBER_HEADER = struct.Struct("<BBBBIBBH2sHI")
+
+
+def compress_member(block: bytes, compresslevel: int = 6) -> bytes:
+    """Compress a block of data as a gzip member recording its compressed size."""
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+    deflated = compressor.compress(block) + compressor.flush()
+    size = _MEMBER_HEADER.size + len(deflated) + 8
+    header = _MEMBER_HEADER.pack(0x1F, 0x8B, 8, 4, 0, 0, 255, 8, SUBFIELD_ID, 4, size)
+    return header + deflated + struct.pack("<II", zlib.crc32(block), len(block) & 0xFFFFFFFF)
+
+
+class ParallelGzipWriter:
+    """A writable binary file compressing blocks of data concurrently.
+
+    Parameters
+    ----------
+    fileobj : file-like
+        Binary file the compressed stream is written to.
+    compresslevel : int
+        Compression level, from 1 (fastest) to 9 (smallest).
+    threads : int, optional
+        Number of compression threads. Defaults to the thread budget of the host.
+    block_size : int
+        Size in bytes of the uncompressed blocks.
+    """
+
+    def __init__(
+        self,
+        fileobj: BinaryIO,
+        compresslevel: int = 6,
+        threads: int | None = None,
+        block_size: int = BLOCK_SIZE,
+    ):
+        self.fileobj = fileobj
+        self.compresslevel = compresslevel
+        self.threads = threads or get_thread_budget()
+        self.block_size = block_size
+        self._buffer = bytearray()
+        self._pending = collections.deque()
+        self._executor = ThreadPoolExecutor(self.threads)
+
+    def _submit(self, block: bytes):
+        self._pending.append(self._executor.submit(compress_member, block, self.compresslevel))
+        # Bound the memory held by blocks in flight.
+        while len(self._pending) > 2 * self.threads:
+            self.fileobj.write(self._pending.popleft().result())
+
+    def write(self, data) -> int:
+        data = memoryview(data).cast("B")
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[: self.block_size]))
+            del self._buffer[: self.block_size]
+        return len(data)
+
+    def end_member(self):
+        """Compress the buffered data as a member of its own, for instance to separate a header from voxel data."""
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+
+    def close(self):
+        if self._executor is None:
+            return
+        if self._buffer or not self._pending:
+            # An empty stream is still a valid gzip member.
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self.fileobj.write(self._pending.popleft().result())
+        self._executor.shutdown()
+        self._executor = None
+
+    def __enter__(self) -> ParallelGzipWriter:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _ClosingWriter(ParallelGzipWriter):
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self.fileobj.close()
+
+
+def open_writer(path: os.PathLike, compresslevel: int = 6, threads: int | None = None) -> ParallelGzipWriter:
+    """Open a file for parallel gzip compression, closed along with the writer."""
+    return _ClosingWriter(open(path, "wb"), compresslevel=compresslevel, threads=threads)
+
+
+def get_members(path: os.PathLike) -> list[tuple[int, int, int]] | None:
+    """Return the offset, compressed size and uncompressed size of the members of a file written by this module.
+
+    Returns None for files written by other tools.
+    """
+    members, offset = [], 0
+    total = os.path.getsize(path)
+    with open(path, "rb") as f:
+        while offset < total:
+            f.seek(offset)
+            header = f.read(_MEMBER_HEADER.size)
+            if len(header) < _MEMBER_HEADER.size:
+                return None
+            magic = header[:2]
+            _, _, _, flags, _, _, _, xlen, subfield_id, subfield_len, size = _MEMBER_HEADER.unpack(header)
+            if magic != b"\x1f\x8b" or flags != 4 or xlen != 8 or subfield_id != SUBFIELD_ID or subfield_len != 4:
+                return None
+            if size < _MEMBER_HEADER.size + 8:
+                return None
+            f.seek(offset + size - 4)
+            (isize,) = struct.unpack("<I", f.read(4))
+            members.append((offset, size, isize))
+            offset += size
+    return members
+
+
+def decompress_file(path: os.PathLike, threads: int | None = None) -> bytearray:
+    """Decompress a gzip file, concurrently for files written by this module."""
+    members = get_members(path)
+    if members is None:
+        with gzip.open(path) as f:
+            return bytearray(f.read())
+    output = bytearray(sum(isize for _, _, isize in members))
+    starts = [0]
+    for _, _, isize in members[:-1]:
+        starts.append(starts[-1] + isize)
+
+    def decompress(member, start):
+        offset, size, isize = member
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = zlib.decompress(f.read(size), wbits=31)
+        if len(data) != isize:
+            raise ValueError(f"Corrupted gzip member at offset {offset}: {path}")
+        output[start : start + isize] = data
+
+    with ThreadPoolExecutor(threads or get_thread_budget()) as executor:
+        for future in [executor.submit(decompress, member, start) for member, start in zip(members, starts)]:
+            future.result()
+    return output
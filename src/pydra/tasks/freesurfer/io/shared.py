@@ -0,0 +1,139 @@
+"""
+Shared
+======
+
+Node-level shared-memory cache of read-only template assets, such as atlases, fsaverage surfaces and color tables.
+
+Concurrent tasks on a node otherwise each read their own copy of the same templates from shared storage.
+A :class:`SharedCache` copies each file once into shared memory (``/dev/shm`` where available),
+where every process maps the same pages, for FreeSurfer's binaries as for native readers:
+
+>>> cache = SharedCache()
+>>> atlas = cache.path("$FREESURFER_HOME/average/lh.DKatlas40.gcs")  # doctest: +SKIP
+
+Arrays decoded by a reader are cached as well, as memory-mapped ``.npy`` files, so that they are parsed only once:
+
+>>> from pydra.tasks.freesurfer.io.surface import read_surface
+>>> def read_mesh(path):
+...     surface = read_surface(path)
+...     return {"vertices": surface.vertices, "faces": surface.faces}
+>>> arrays = cache.arrays("fsaverage/surf/lh.sphere.reg", read_mesh)  # doctest: +SKIP
+>>> arrays["vertices"].shape  # doctest: +SKIP
+(163842, 3)
+
+Environment variables in paths are expanded.
+Entries are keyed by the path, modification time and size of their source, so that modified files are copied again,
+their stale copies being removed, and shared memory holding a single copy of each file.
+Copies are made under a lock per source, a single process reading each file from shared storage.
+"""
+
+from __future__ import annotations
+
+__all__ = ["SharedCache"]
+
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Callable, Mapping
+
+import numpy as np
+from filelock import FileLock
+
+#: Environment variable overriding the directory of the shared cache.
+SHARED_ENVVAR = "PYDRA_FREESURFER_SHARED_DIR"
+
+# Memory-backed file system of Linux, shared by all processes of a node.
+_SHM = Path("/dev/shm")
+
+
+def _get_default_directory() -> Path:
+    if os.getenv(SHARED_ENVVAR):
+        return Path(os.environ[SHARED_ENVVAR])
+    root = _SHM if _SHM.is_dir() and os.access(_SHM, os.W_OK) else Path(tempfile.gettempdir())
+    return root / "pydra-freesurfer-shared"
+
+
+class SharedCache:
+    """Shared-memory cache of read-only files.
+
+    Parameters
+    ----------
+    directory : path-like, optional
+        Directory of the cache, defaulting to the ``PYDRA_FREESURFER_SHARED_DIR`` environment variable,
+        ``/dev/shm`` or the temporary directory.
+    """
+
+    def __init__(self, directory: os.PathLike | None = None):
+        self.directory = Path(directory) if directory is not None else _get_default_directory()
+
+    def _get_key(self, path: os.PathLike, *extra: str) -> tuple[str, str]:
+        # Keys of the source and of its version, so that the copies of previous versions may be found.
+        source = os.path.realpath(path)
+        stat = os.stat(source)
+        name = hashlib.sha256("\0".join([source, *extra]).encode()).hexdigest()[:32]
+        version = hashlib.sha256(f"{stat.st_mtime_ns}\0{stat.st_size}".encode()).hexdigest()[:16]
+        return name, version
+
+    def _create(self, key: tuple[str, str], fill: Callable[[Path], None]) -> Path:
+        name, version = key
+        entry = self.directory / f"{name}-{version}"
+        if entry.exists():
+            return entry
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with FileLock(self.directory / f"{name}.lock"):
+            # Another process may have created the entry while this one was waiting for the lock.
+            if not entry.exists():
+                staging = self.directory / f".{entry.name}.{uuid.uuid4().hex}"
+                staging.mkdir()
+                try:
+                    fill(staging)
+                    os.rename(staging, entry)
+                finally:
+                    shutil.rmtree(staging, ignore_errors=True)
+            # Copies of previous versions are removed, processes mapping them keeping their pages until unmapped.
+            for stale in self.directory.glob(f"{name}-*"):
+                if stale != entry:
+                    shutil.rmtree(stale, ignore_errors=True)
+        return entry
+
+    def path(self, path: os.PathLike) -> Path:
+        """Return the path of the shared copy of a file, with the same name, copying it on first use."""
+        path = os.path.expandvars(path)
+        name = Path(path).name
+        entry = self._create(self._get_key(path), lambda staging: shutil.copyfile(path, staging / name))
+        return entry / name
+
+    def open(self, path: os.PathLike) -> np.memmap:
+        """Return the bytes of a file, memory-mapped read-only from its shared copy."""
+        return np.memmap(self.path(path), dtype=np.uint8, mode="r")
+
+    def arrays(
+        self, path: os.PathLike, reader: Callable[[os.PathLike], Mapping[str, object]]
+    ) -> dict[str, np.ndarray]:
+        """Return the arrays read from a file, memory-mapped read-only from their shared copies.
+
+        Parameters
+        ----------
+        path : path-like
+            File to read.
+        reader : callable
+            Function reading the file into a mapping of names to values, of which only arrays are cached.
+            The reader is identified by its qualified name, which must be unique.
+        """
+        path = os.path.expandvars(path)
+        qualname = f"{getattr(reader, '__module__', '')}.{getattr(reader, '__qualname__', repr(reader))}"
+
+        def fill(staging: Path):
+            for key, value in reader(path).items():
+                if isinstance(value, np.ndarray):
+                    np.save(staging / f"{key}.npy", value)
+
+        entry = self._create(self._get_key(path, qualname), fill)
+        return {file.stem: np.load(file, mmap_mode="r") for file in sorted(entry.glob("*.npy"))}
+
+    def clear(self):
+        """Remove every entry of the cache."""
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,167 @@
+"""
+Surface
+=======
+
+Native reader and writer for FreeSurfer's triangle surfaces, such as ``?h.white``, ``?h.pial`` or ``?h.sphere.reg``.
+
+Vertices are read as a float32 array of shape (N, 3) and faces as an int32 array of shape (M, 3),
+straight from the file with a single read:
+
+>>> surface = read_surface("lh.white")  # doctest: +SKIP
+>>> surface.vertices.shape, surface.faces.shape  # doctest: +SKIP
+((163842, 3), (327680, 3))
+
+Memory-mapped arrays, in the big-endian byte order of the file, avoid any copy:
+
+>>> surface = read_surface("lh.white", mmap=True)  # doctest: +SKIP
+
+The geometry of the volume the surface was created from, recorded in the footer of the file, is preserved,
+along with any other tag following it.
+"""
+
+from __future__ import annotations
+
+__all__ = ["Surface", "read_surface", "write_surface"]
+
+import os
+import struct
+import time
+
+import numpy as np
+from attrs import define, field
+
+from pydra.tasks.freesurfer.io.volume import Geometry, format_volume_info, parse_volume_info
+
+#: Magic number of triangle surfaces.
+TRIANGLE_MAGIC = b"\xff\xff\xfe"
+
+#: Tags preceding the volume geometry in the footer: whether scanner RAS coordinates are used, and the geometry.
+TAG_OLD_USEREALRAS, TAG_OLD_SURF_GEOM = 2, 20
+
+# Number of lines of the volume geometry in the footer.
+_VOLUME_INFO_LINES = 8
+
+
+@define
+class Surface:
+    """A triangle surface.
+
+    Attributes
+    ----------
+    vertices : numpy.ndarray
+        Coordinates of vertices, as a float32 array of shape (N, 3).
+    faces : numpy.ndarray
+        Indices of the vertices of faces, as an int32 array of shape (M, 3).
+    geometry : Geometry, optional
+        Geometry of the volume the surface was created from.
+    filename : str, optional
+        Path of the volume the surface was created from.
+    use_real_ras : bool
+        Whether coordinates are scanner RAS rather than tkregister RAS coordinates.
+    created_by : str
+        Creation stamp of the file.
+    tags : bytes
+        Raw tags following the volume geometry in the footer.
+    """
+
+    vertices: np.ndarray = field(eq=False)
+
+    faces: np.ndarray = field(eq=False)
+
+    geometry: Geometry | None = field(default=None, eq=False)
+
+    filename: str | None = None
+
+    use_real_ras: bool = False
+
+    created_by: str = ""
+
+    tags: bytes = b""
+
+    @property
+    def num_vertices(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def num_faces(self) -> int:
+        return len(self.faces)
+
+
+def _parse_footer(footer: bytes) -> dict:
+    # The footer of surfaces written by FreeSurfer starts with the real RAS flag followed by the volume geometry.
+    if len(footer) < 12:
+        return {"tags": footer}
+    tag, use_real_ras, geometry_tag = struct.unpack_from(">3i", footer)
+    if (tag, geometry_tag) != (TAG_OLD_USEREALRAS, TAG_OLD_SURF_GEOM):
+        return {"tags": footer}
+    offset = 12
+    lines = []
+    for _ in range(_VOLUME_INFO_LINES):
+        end = footer.find(b"\n", offset)
+        if end < 0:
+            return {"tags": footer}
+        lines.append(footer[offset:end].decode("utf-8", errors="replace"))
+        offset = end + 1
+    geometry, filename = parse_volume_info(lines)
+    return {
+        "geometry": geometry,
+        "filename": filename,
+        "use_real_ras": bool(use_real_ras),
+        "tags": footer[offset:],
+    }
+
+
+def read_surface(path: os.PathLike, mmap: bool = False) -> Surface:
+    """Read a triangle surface.
+
+    Parameters
+    ----------
+    path : path-like
+        Surface file.
+    mmap : bool
+        Memory-map vertices and faces read-only, in the big-endian byte order of the file,
+        rather than converting them to native arrays.
+    """
+    with open(path, "rb") as f:
+        if f.read(3) != TRIANGLE_MAGIC:
+            raise ValueError(f"Not a triangle surface: {path}")
+        created_by = f.readline().decode("utf-8", errors="replace").strip()
+        f.readline()
+        num_vertices, num_faces = struct.unpack(">2i", f.read(8))
+        offset = f.tell()
+        data_size = (num_vertices + num_faces) * 3 * 4
+        if mmap:
+            f.seek(offset + data_size)
+            footer = f.read()
+        else:
+            buffer = bytearray(os.path.getsize(path) - offset)
+            buffer = memoryview(buffer)[: f.readinto(buffer)]
+            footer = bytes(buffer[data_size:])
+    if mmap:
+        vertices = np.memmap(path, dtype=">f4", mode="r", offset=offset, shape=(num_vertices, 3))
+        faces = np.memmap(path, dtype=">i4", mode="r", offset=offset + num_vertices * 12, shape=(num_faces, 3))
+    else:
+        if len(buffer) < data_size:
+            raise ValueError(f"Truncated surface: {path}")
+        # Byte swapping is the only copy.
+        vertices = np.frombuffer(buffer, dtype=">f4", count=num_vertices * 3).astype(np.float32).reshape(-1, 3)
+        faces = np.frombuffer(buffer, dtype=">i4", count=num_faces * 3, offset=num_vertices * 12)
+        faces = faces.astype(np.int32).reshape(-1, 3)
+    return Surface(vertices, faces, created_by=created_by, **_parse_footer(footer))
+
+
+def write_surface(path: os.PathLike, surface: Surface):
+    """Write a triangle surface, with its volume geometry if known."""
+    vertices = np.asarray(surface.vertices).reshape(-1, 3)
+    faces = np.asarray(surface.faces).reshape(-1, 3)
+    created_by = surface.created_by or f"created by {os.getenv('USER', 'unknown')} on {time.ctime()}"
+    with open(path, "wb") as f:
+        f.write(TRIANGLE_MAGIC + created_by.encode("utf-8") + b"\n\n")
+        f.write(struct.pack(">2i", len(vertices), len(faces)))
+        f.write(vertices.astype(">f4", copy=False).tobytes())
+        f.write(faces.astype(">i4", copy=False).tobytes())
+        if surface.geometry is not None or surface.filename:
+            f.write(struct.pack(">3i", TAG_OLD_USEREALRAS, int(surface.use_real_ras), TAG_OLD_SURF_GEOM))
+            lines = format_volume_info(surface.geometry, surface.filename, center_key="cras")
+            f.write("".join(line + "\n" for line in lines).encode("utf-8"))
+        f.write(surface.tags)
@@ -0,0 +1,66 @@
+import struct
+
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.io import annot
+
+
+@pytest.fixture
+def ctab():
+    return annot.ColorTable(
+        [0, 1, 3],
+        ["unknown", "bankssts", "caudalmiddlefrontal"],
+        [[25, 5, 25, 0], [25, 100, 40, 0], [100, 25, 0, 0]],
+        filename="/usr/local/freesurfer/average/colortable_desikan_killiany.txt",
+    )
+
+
+@pytest.fixture
+def annotation(ctab):
+    labels = np.random.default_rng(0).choice([-1, 0, 1, 3], size=500).astype(np.int32)
+    return annot.Annotation(labels, ctab)
+
+
+def test_roundtrip(tmp_path, annotation):
+    annot.write_annot(tmp_path / "lh.aparc.annot", annotation)
+
+    loaded = annot.read_annot(tmp_path / "lh.aparc.annot")
+
+    np.testing.assert_array_equal(loaded.labels, annotation.labels)
+    assert loaded.ctab == annotation.ctab
+    assert loaded.ctab.size == 4
+    np.testing.assert_array_equal(loaded.ctab.colors, annotation.ctab.colors)
+    annot.write_annot(tmp_path / "rh.aparc.annot", loaded)
+    assert (tmp_path / "rh.aparc.annot").read_bytes() == (tmp_path / "lh.aparc.annot").read_bytes()
+
+
+def test_layout(tmp_path, ctab):
+    annot.write_annot(tmp_path / "lh.annot", annot.Annotation(np.array([1, -1], dtype=np.int32), ctab))
+
+    content = (tmp_path / "lh.annot").read_bytes()
+
+    assert content[:20] == struct.pack(">5i", 2, 0, 25 + 100 * 256 + 40 * 65536, 1, 0)
+    assert content[20:32] == struct.pack(">3i", annot.TAG_OLD_COLORTABLE, -2, 4)
+
+
+def test_old_ctab_format(tmp_path):
+    content = struct.pack(">3i", 1, 0, 10 + 20 * 256 + 30 * 65536) + struct.pack(">2i", 1, 1)
+    content += struct.pack(">i", 4) + b"lut\0" + struct.pack(">i", 3) + b"ab\0" + struct.pack(">4i", 10, 20, 30, 0)
+    (tmp_path / "lh.annot").write_bytes(content)
+
+    loaded = annot.read_annot(tmp_path / "lh.annot")
+
+    assert loaded.ctab.names == ["ab"]
+    assert loaded.ctab.filename == "lut"
+    np.testing.assert_array_equal(loaded.labels, [0])
+
+
+def test_text_ctab(tmp_path, ctab):
+    annot.write_ctab(tmp_path / "lut.txt", ctab)
+
+    loaded = annot.read_ctab(tmp_path / "lut.txt")
+
+    assert loaded.names == ctab.names
+    assert loaded.get_index("caudalmiddlefrontal") == 3
+    np.testing.assert_array_equal(loaded.colors, ctab.colors)
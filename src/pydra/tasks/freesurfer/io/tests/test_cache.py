@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.io import morph
+from pydra.tasks.freesurfer.io.cache import CacheStats, DecodedCache
+
+
+@pytest.fixture
+def maps(tmp_path):
+    paths = []
+    for index in range(3):
+        paths.append(tmp_path / f"lh.map{index}")
+        morph.write_morph(paths[-1], np.full(100, index, dtype=np.float32))
+    return paths
+
+
+def test_read(maps):
+    cache = DecodedCache()
+
+    first = cache.read(maps[0], morph.read_morph)
+    second = cache.read(maps[0], morph.read_morph)
+
+    assert second is first
+    assert not first.flags.writeable
+    assert cache.stats() == CacheStats(hits=1, misses=1, evictions=0, size=400, count=1)
+
+
+def test_read_modified(maps):
+    cache = DecodedCache()
+    cache.read(maps[0], morph.read_morph)
+
+    morph.write_morph(maps[0], np.full(101, 5, dtype=np.float32))
+    os.utime(maps[0], ns=(0, 0))
+
+    np.testing.assert_array_equal(cache.read(maps[0], morph.read_morph), [5] * 101)
+    assert cache.stats().misses == 2
+
+
+def test_eviction(maps):
+    cache = DecodedCache(budget=800)
+
+    for path in maps + maps[2:]:
+        cache.read(path, morph.read_morph)
+
+    assert cache.stats() == CacheStats(hits=1, misses=3, evictions=1, size=800, count=2)
+    cache.read(maps[0], morph.read_morph)
+    assert cache.stats().misses == 4
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.io import label
+
+
+@pytest.fixture
+def cortex():
+    rng = np.random.default_rng(0)
+    vertices = np.sort(rng.choice(10000, size=8000, replace=False))
+    return label.Label(vertices, rng.uniform(-80, 80, size=(8000, 3)), np.zeros(8000), subject="sub-01")
+
+
+def test_roundtrip(tmp_path, cortex):
+    label.write_label(tmp_path / "lh.cortex.label", cortex)
+
+    loaded = label.read_label(tmp_path / "lh.cortex.label")
+
+    assert loaded == cortex
+    np.testing.assert_array_equal(loaded.vertices, cortex.vertices)
+    np.testing.assert_allclose(loaded.coordinates, cortex.coordinates, atol=1e-3)
+    lines = (tmp_path / "lh.cortex.label").read_text().splitlines()
+    assert lines[0] == "#!ascii label  , from subject sub-01 vox2ras=TkReg"
+    assert lines[1] == "8000"
+
+
+def test_set_operations(cortex):
+    other = label.Label(np.arange(0, 10000, 2), np.ones((5000, 3)), np.ones(5000))
+    mask, other_mask = cortex.to_mask(10000), other.to_mask(10000)
+
+    np.testing.assert_array_equal((cortex | other).to_mask(10000), mask | other_mask)
+    np.testing.assert_array_equal((cortex & other).to_mask(10000), mask & other_mask)
+    np.testing.assert_array_equal((cortex - other).to_mask(10000), mask & ~other_mask)
+    # Values of the left operand take precedence.
+    assert not (cortex | other).values[np.isin((cortex | other).vertices, cortex.vertices)].any()
+
+
+def test_mask_conversion(cortex):
+    surface = np.random.default_rng(1).standard_normal((10000, 3)).astype(np.float32)
+
+    converted = label.Label.from_mask(cortex.to_mask(10000), vertices=surface)
+
+    np.testing.assert_array_equal(converted.vertices, cortex.vertices)
+    np.testing.assert_array_equal(converted.coordinates, cortex.map_to_surface(surface).coordinates)
+
+
+def test_malformed(tmp_path):
+    (tmp_path / "lh.label").write_text("#!ascii label\n2\n0 0.0 0.0 0.0 0.0\n")
+
+    with pytest.raises(ValueError):
+        label.read_label(tmp_path / "lh.label")
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.io import mgh
+
+
+@pytest.fixture
+def affine():
+    return np.array([[-1.0, 0.0, 0.0, 128.0], [0.0, 0.0, 1.0, -128.0], [0.0, -1.0, 0.0, 128.0], [0.0, 0.0, 0.0, 1.0]])
+
+
+@pytest.mark.parametrize("name", ["volume.mgh", "volume.mgz"])
+def test_roundtrip(tmp_path, affine, name):
+    data = np.arange(4 * 5 * 6 * 2, dtype=np.float32).reshape(4, 5, 6, 2)
+    header = mgh.MGHHeader.from_affine(data.shape, np.float32, affine)
+
+    mgh.write(tmp_path / name, data, header)
+
+    header = mgh.read_header(tmp_path / name)
+    assert header.shape == (4, 5, 6, 2)
+    np.testing.assert_allclose(header.affine, affine)
+    np.testing.assert_array_equal(mgh.read_data(tmp_path / name), data)
+    for index, frame in enumerate(mgh.iter_frames(tmp_path / name)):
+        np.testing.assert_array_equal(frame, data[..., index])
+
+
+def test_memory_map(tmp_path, affine):
+    data = np.ones((3, 3, 3), dtype=np.uint8)
+    mgh.write(tmp_path / "volume.mgh", data, mgh.MGHHeader.from_affine(data.shape, np.uint8, affine))
+
+    mapped = mgh.read_data(tmp_path / "volume.mgh")
+
+    assert isinstance(mapped.base, np.memmap) or isinstance(mapped.base.base, np.memmap)
+    assert not mapped.flags.writeable
+    np.testing.assert_array_equal(mapped, data)
+
+
+def test_truncated(tmp_path, affine):
+    data = np.ones((8, 8, 8), dtype=np.int16)
+    mgh.write(tmp_path / "volume.mgz", data, mgh.MGHHeader.from_affine(data.shape, np.int16, affine))
+    content = (tmp_path / "volume.mgz").read_bytes()
+    import gzip
+
+    (tmp_path / "truncated.mgz").write_bytes(gzip.compress(gzip.decompress(content)[:-10]))
+
+    with pytest.raises(ValueError, match="Truncated"):
+        mgh.read_data(tmp_path / "truncated.mgz")
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.io import morph
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(0).uniform(0.0, 5.0, size=2562).astype(np.float32)
+
+
+@pytest.mark.parametrize("name", ["lh.thickness", "lh.thickness.mgh", "lh.thickness.mgz"])
+def test_roundtrip(tmp_path, values, name):
+    morph.write_morph(tmp_path / name, values, num_faces=5120)
+
+    loaded = morph.read_morph(tmp_path / name)
+
+    assert loaded.dtype == np.float32 and loaded.flags.c_contiguous
+    np.testing.assert_array_equal(loaded, values)
+
+
+def test_curv_header(tmp_path, values):
+    morph.write_morph(tmp_path / "lh.curv", values, num_faces=5120)
+
+    assert morph.read_curv_header(tmp_path / "lh.curv") == (2562, 5120, 1)
+
+
+def test_old_format(tmp_path):
+    content = (3).to_bytes(3, "big") + (1).to_bytes(3, "big") + np.array([150, -25, 0], dtype=">i2").tobytes()
+    (tmp_path / "lh.curv").write_bytes(content)
+
+    np.testing.assert_allclose(morph.read_morph(tmp_path / "lh.curv"), [1.5, -0.25, 0.0])
+
+
+def test_stack(tmp_path, values):
+    paths = []
+    for index in range(12):
+        paths.append(tmp_path / f"sub-{index:02d}.{'mgh' if index % 2 else 'thickness'}")
+        morph.write_morph(paths[-1], values + index)
+
+    stacked = morph.stack_morphs(paths, max_workers=4)
+
+    assert stacked.shape == (12, 2562)
+    np.testing.assert_array_equal(stacked, values + np.arange(12, dtype=np.float32)[:, None])
+
+
+def test_stack_mismatch(tmp_path, values):
+    morph.write_morph(tmp_path / "lh.thickness", values)
+    morph.write_morph(tmp_path / "rh.thickness", values[:-1])
+
+    with pytest.raises(ValueError):
+        morph.stack_morphs([tmp_path / "lh.thickness", tmp_path / "rh.thickness"])
@@ -0,0 +1,82 @@
+import struct
+
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.io import nifti
+
+
+@pytest.fixture
+def affine():
+    return np.array([[2.0, 0.0, 0.0, -90.0], [0.0, 2.0, 0.0, -126.0], [0.0, 0.0, 2.0, -72.0], [0.0, 0.0, 0.0, 1.0]])
+
+
+@pytest.fixture
+def data():
+    return np.random.default_rng(0).standard_normal((6, 7, 8, 10)).astype(np.float32)
+
+
+@pytest.mark.parametrize("name", ["bold.nii", "bold.nii.gz"])
+def test_roundtrip(tmp_path, affine, data, name):
+    nifti.write(tmp_path / name, data, affine)
+
+    header = nifti.read_header(tmp_path / name)
+    assert header.version == 1
+    assert header.shape == data.shape
+    assert header.num_volumes == 10
+    np.testing.assert_allclose(header.affine, affine)
+    np.testing.assert_array_equal(nifti.read_data(tmp_path / name), data)
+    np.testing.assert_array_equal(nifti.read_volumes(tmp_path / name, 3, 7), data[..., 3:7])
+    slabs = list(nifti.iter_volumes(tmp_path / name, size=4))
+    assert [slab.shape[3] for slab in slabs] == [4, 4, 2]
+    np.testing.assert_array_equal(np.concatenate(slabs, axis=3), data)
+
+
+def test_gzip_index(tmp_path, affine):
+    data = np.random.default_rng(0).standard_normal((32, 32, 16, 10)).astype(np.float32)
+    nifti.write(tmp_path / "bold.nii.gz", data, affine)
+    volume_size = data[..., 0].nbytes
+
+    index = nifti.GzipIndex(tmp_path / "bold.nii.gz", span=volume_size)
+
+    assert len(index.offsets) > 5
+    for start in (0, 5, 9):
+        buffer = index.read(352 + start * volume_size, volume_size)
+        volume = np.frombuffer(buffer, dtype="<f4").reshape(data.shape[:3], order="F")
+        np.testing.assert_array_equal(volume, data[..., start])
+
+
+def test_nifti2_header():
+    buffer = bytearray(540)
+    struct.pack_into("<i8s", buffer, 0, 540, b"n+2\0\r\n\x1a\n")
+    struct.pack_into("<2h8q", buffer, 12, 4, 16, 3, 2, 3, 4, 1, 1, 1, 1)
+    struct.pack_into("<8d", buffer, 104, 1, 1, 1, 1, 1, 1, 1, 1)
+    struct.pack_into("<q", buffer, 168, 544)
+    struct.pack_into("<2i", buffer, 344, 1, 0)
+    struct.pack_into("<6d", buffer, 352, 0, 0, 1, 10, 20, 30)
+
+    header = nifti.NiftiHeader.from_bytes(bytes(buffer))
+
+    assert header.version == 2
+    assert header.shape == (2, 3, 4)
+    assert header.dtype == np.dtype("<i2")
+    # Rotation of 180 degrees around the z axis.
+    np.testing.assert_allclose(header.affine[:3, :3], np.diag([-1.0, -1.0, 1.0]), atol=1e-12)
+    np.testing.assert_allclose(header.affine[:3, 3], [10, 20, 30])
+
+
+@pytest.mark.parametrize("flip", [1.0, -1.0])
+def test_set_affine(tmp_path, data, flip):
+    nifti.write(tmp_path / "bold.nii", data, np.eye(4))
+    angle = 0.3
+    affine = np.eye(4)
+    affine[:3, :3] = [[np.cos(angle), -np.sin(angle), 0.0], [np.sin(angle), np.cos(angle), 0.0], [0.0, 0.0, 1.0]]
+    affine[:3, :3] *= [2.0, 1.5, 3.0 * flip]
+    affine[:3, 3] = [1.0, 2.0, 3.0]
+
+    buffer = bytearray(nifti.set_affine((tmp_path / "bold.nii").read_bytes()[:352], affine))
+
+    np.testing.assert_allclose(nifti.NiftiHeader.from_bytes(buffer).affine, affine, atol=1e-5)
+    # The qform alone describes the same transform.
+    struct.pack_into("<h", buffer, 254, 0)
+    np.testing.assert_allclose(nifti.NiftiHeader.from_bytes(buffer).affine, affine, atol=1e-5)
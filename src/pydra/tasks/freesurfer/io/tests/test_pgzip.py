@@ -0,0 +1,50 @@
+import gzip
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.io import mgh, pgzip
+
+
+@pytest.fixture
+def content():
+    return np.random.default_rng(0).integers(0, 16, size=3 * 2**20, dtype=np.uint8).tobytes()
+
+
+def test_roundtrip(tmp_path, content):
+    with pgzip.open_writer(tmp_path / "data.gz", threads=4) as f:
+        f.write(content[:1000])
+        f.write(content[1000:])
+
+    members = pgzip.get_members(tmp_path / "data.gz")
+    assert len(members) == 3
+    assert sum(isize for *_, isize in members) == len(content)
+    assert pgzip.decompress_file(tmp_path / "data.gz", threads=4) == content
+    assert gzip.decompress((tmp_path / "data.gz").read_bytes()) == content
+
+
+@pytest.mark.skipif(shutil.which("gzip") is None, reason="gzip is not installed")
+def test_standard_reader(tmp_path, content):
+    with pgzip.open_writer(tmp_path / "data.gz", threads=2) as f:
+        f.write(content)
+
+    assert subprocess.run(["gzip", "-dc", tmp_path / "data.gz"], capture_output=True, check=True).stdout == content
+
+
+def test_foreign_file(tmp_path, content):
+    (tmp_path / "data.gz").write_bytes(gzip.compress(content))
+
+    assert pgzip.get_members(tmp_path / "data.gz") is None
+    assert pgzip.decompress_file(tmp_path / "data.gz") == content
+
+
+def test_parallel_volume(tmp_path):
+    data = np.arange(64**3, dtype=np.float32).reshape(64, 64, 64)
+    header = mgh.MGHHeader.from_affine(data.shape, np.float32, np.eye(4))
+
+    mgh.write(tmp_path / "volume.mgz", data, header, threads=4)
+
+    assert len(pgzip.get_members(tmp_path / "volume.mgz")) > 1
+    np.testing.assert_array_equal(mgh.read_data(tmp_path / "volume.mgz", threads=4), data)
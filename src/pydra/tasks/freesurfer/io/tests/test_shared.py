@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+
+from pydra.tasks.freesurfer.io import surface
+from pydra.tasks.freesurfer.io.shared import SharedCache
+
+
+def read_mesh(path):
+    mesh = surface.read_surface(path)
+    return {"vertices": mesh.vertices, "faces": mesh.faces, "filename": mesh.filename}
+
+
+def test_path(tmp_path):
+    source = tmp_path / "lh.atlas.gcs"
+    source.write_bytes(b"atlas")
+    cache = SharedCache(tmp_path / "shared")
+
+    shared = cache.path(source)
+
+    assert shared.name == "lh.atlas.gcs" and shared.read_bytes() == b"atlas"
+    assert cache.path(source) == shared
+    assert bytes(cache.open(source)) == b"atlas"
+    # Modified sources are copied again, replacing their stale copies.
+    source.write_bytes(b"new atlas")
+    os.utime(source, ns=(0, 0))
+    assert cache.path(source).read_bytes() == b"new atlas"
+    assert not shared.exists()
+    assert len(list((tmp_path / "shared").iterdir())) == 2
+    cache.clear()
+    assert not (tmp_path / "shared").exists()
+
+
+def test_path_with_variables(tmp_path, monkeypatch):
+    (tmp_path / "average").mkdir()
+    (tmp_path / "average" / "lh.atlas.gcs").write_bytes(b"atlas")
+    monkeypatch.setenv("FREESURFER_HOME", str(tmp_path))
+    cache = SharedCache(tmp_path / "shared")
+
+    assert cache.path("$FREESURFER_HOME/average/lh.atlas.gcs").read_bytes() == b"atlas"
+
+
+def test_arrays(tmp_path):
+    mesh = surface.Surface(np.eye(3, dtype=np.float32), np.array([[0, 1, 2]], dtype=np.int32))
+    surface.write_surface(tmp_path / "lh.sphere.reg", mesh)
+    cache = SharedCache(tmp_path / "shared")
+
+    arrays = cache.arrays(tmp_path / "lh.sphere.reg", read_mesh)
+
+    assert sorted(arrays) == ["faces", "vertices"]
+    assert isinstance(arrays["vertices"], np.memmap)
+    np.testing.assert_array_equal(arrays["faces"], mesh.faces)
+    assert len(list((tmp_path / "shared").glob("*.lock"))) == 1
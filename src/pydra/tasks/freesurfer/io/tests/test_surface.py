@@ -0,0 +1,55 @@
+import struct
+
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.io import surface, volume
+
+
+@pytest.fixture
+def mesh():
+    rng = np.random.default_rng(0)
+    vertices = rng.standard_normal((1000, 3)).astype(np.float32)
+    faces = rng.integers(0, 1000, size=(1996, 3)).astype(np.int32)
+    geometry = volume.Geometry(
+        (256, 256, 256),
+        (1.0, 1.0, 1.0),
+        [[-1.0, 0.0, 0.0, 130.0], [0.0, 0.0, 1.0, -120.0], [0.0, -1.0, 0.0, 125.0], [0.0, 0.0, 0.0, 1.0]],
+    )
+    return surface.Surface(vertices, faces, geometry=geometry, filename="../mri/filled-pretess255.mgz")
+
+
+@pytest.mark.parametrize("mmap", [False, True])
+def test_roundtrip(tmp_path, mesh, mmap):
+    mesh.tags = b"\x00\x00\x00\x03extra"
+    surface.write_surface(tmp_path / "lh.white", mesh)
+
+    loaded = surface.read_surface(tmp_path / "lh.white", mmap=mmap)
+
+    assert loaded.vertices.shape == (1000, 3) and loaded.faces.shape == (1996, 3)
+    np.testing.assert_array_equal(loaded.vertices, mesh.vertices)
+    np.testing.assert_array_equal(loaded.faces, mesh.faces)
+    np.testing.assert_allclose(loaded.geometry.affine, mesh.geometry.affine)
+    assert loaded.filename == "../mri/filled-pretess255.mgz"
+    assert loaded.tags == mesh.tags
+    assert loaded.created_by.startswith("created by")
+    if not mmap:
+        assert loaded.vertices.dtype == np.float32 and loaded.faces.dtype == np.int32
+
+
+def test_layout(tmp_path):
+    vertices = np.array([[0.0, 0.0, 0.0], [1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32)
+    surface.write_surface(tmp_path / "lh.tri", surface.Surface(vertices, [[0, 1, 2]], created_by="created by test"))
+
+    content = (tmp_path / "lh.tri").read_bytes()
+
+    assert content.startswith(b"\xff\xff\xfecreated by test\n\n" + struct.pack(">2i", 3, 1))
+    assert content.endswith(struct.pack(">3i", 0, 1, 2))
+    assert surface.read_surface(tmp_path / "lh.tri").geometry is None
+
+
+def test_not_a_surface(tmp_path):
+    (tmp_path / "lh.curv").write_bytes(b"\xff\xff\xff" + bytes(12))
+
+    with pytest.raises(ValueError):
+        surface.read_surface(tmp_path / "lh.curv")
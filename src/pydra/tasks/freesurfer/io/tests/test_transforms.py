@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.io import transforms, volume
+
+
+def test_register_dat_roundtrip(tmp_path):
+    matrix = np.array([[1.0, 0.0, 0.0, -1.5], [0.0, 0.0, 1.0, 2.0], [0.0, -1.0, 0.0, 0.25], [0.0, 0.0, 0.0, 1.0]])
+    registration = transforms.Registration("sub-01", matrix, in_plane_resolution=3.125, between_plane_resolution=4.0)
+
+    transforms.write_register_dat(tmp_path / "register.dat", registration)
+    loaded = transforms.read_register_dat(tmp_path / "register.dat")
+
+    assert loaded == registration
+    np.testing.assert_array_equal(loaded.matrix, matrix)
+    lines = (tmp_path / "register.dat").read_text().splitlines()
+    assert lines[1:4] == ["3.125000", "4.000000", "0.150000"]
+    assert lines[4] == "1.000000000000000e+00 0.000000000000000e+00 0.000000000000000e+00 -1.500000000000000e+00 "
+    assert lines[-1] == "round"
+
+
+@pytest.fixture
+def geometries():
+    moving = volume.Geometry((20, 24, 16), (2.0, 2.0, 3.0), np.diag([2.0, 2.0, 3.0, 1.0]))
+    target = volume.Geometry(
+        (32, 32, 32),
+        (1.0, 1.0, 1.0),
+        [[-1.0, 0.0, 0.0, 130.0], [0.0, 0.0, 1.0, -120.0], [0.0, -1.0, 0.0, 125.0], [0.0, 0.0, 0.0, 1.0]],
+    )
+    return moving, target
+
+
+@pytest.fixture
+def transform(geometries):
+    angle = 0.2
+    matrix = np.eye(4)
+    matrix[:3, :3] = [[np.cos(angle), -np.sin(angle), 0.0], [np.sin(angle), np.cos(angle), 0.0], [0.0, 0.0, 1.0]]
+    matrix[:3, 3] = [4.0, -3.0, 2.0]
+    return transforms.LinearTransform(matrix, *geometries)
+
+
+@pytest.mark.parametrize("name", ["transform.lta", "register.dat", "transform.mat", "transform.xfm"])
+def test_transform_roundtrip(tmp_path, geometries, transform, name):
+    transforms.write_transform(tmp_path / name, transform)
+
+    loaded = transforms.read_transform(tmp_path / name, *geometries)
+
+    np.testing.assert_allclose(loaded.matrix, transform.matrix, atol=1e-8)
+
+
+def test_lta_geometries(tmp_path, geometries, transform):
+    transforms.write_lta(tmp_path / "transform.lta", transform)
+
+    loaded = transforms.read_lta(tmp_path / "transform.lta")
+
+    for geometry, expected in zip((loaded.source, loaded.destination), geometries):
+        assert geometry.shape == expected.shape
+        np.testing.assert_allclose(geometry.affine, expected.affine, atol=1e-12)
+    np.testing.assert_allclose(loaded.vox2vox, transform.vox2vox, atol=1e-8)
+
+
+def test_compose_chain(tmp_path, geometries, transform):
+    moving, target = geometries
+    second = transforms.LinearTransform(np.diag([1.0, 1.0, 1.0, 1.0]) + np.eye(4, k=3) * 5.0, target, target)
+    transforms.write_transform(tmp_path / "first.dat", transform)
+    transforms.write_transform(tmp_path / "second.lta", second)
+
+    composed = transforms.read_chain([(tmp_path / "first.dat", moving, target), tmp_path / "second.lta"])
+
+    np.testing.assert_allclose(composed.matrix, second.matrix @ transform.matrix, atol=1e-8)
+    np.testing.assert_allclose(transforms.compose(transform, transform.inverse()).matrix, np.eye(4), atol=1e-12)
+    assert composed.source is moving
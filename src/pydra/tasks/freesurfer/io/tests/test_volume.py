@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.io import mgh, nifti, pgzip, transforms, volume
+
+
+@pytest.fixture
+def data():
+    return np.random.default_rng(0).integers(0, 100, size=(40, 50, 60)).astype(np.float32)
+
+
+@pytest.fixture
+def affine():
+    return np.array([[0.0, 0.0, 2.0, -60.0], [-2.0, 0.0, 0.0, 50.0], [0.0, -2.0, 0.0, 40.0], [0.0, 0.0, 0.0, 1.0]])
+
+
+def write(path, data, affine):
+    if volume.get_format(path) == "mgh":
+        mgh.write(path, data, mgh.MGHHeader.from_affine(data.shape, np.float32, affine))
+    else:
+        nifti.write(path, data, affine)
+
+
+def read(path):
+    return mgh.read_data(path) if volume.get_format(path) == "mgh" else nifti.read_data(path)
+
+
+def test_geometry(tmp_path, data, affine):
+    write(tmp_path / "volume.mgz", data, affine)
+
+    geometry = volume.read_geometry(tmp_path / "volume.mgz")
+
+    assert geometry.shape == (40, 50, 60)
+    assert geometry.voxel_size == (2.0, 2.0, 2.0)
+    np.testing.assert_allclose(geometry.affine, affine)
+    np.testing.assert_allclose(geometry.tkr_affine, transforms.tkr_vox2ras((40, 50, 60), (2.0, 2.0, 2.0)))
+
+
+@pytest.mark.parametrize(
+    "source, target",
+    [
+        ("volume.mgh", "volume.mgh"),
+        ("volume.mgz", "other.mgz"),
+        ("volume.mgh", "other.mgz"),
+        ("volume.nii", "other.nii"),
+        ("volume.nii.gz", "other.nii.gz"),
+        ("volume.nii.gz", "other.nii"),
+    ],
+)
+def test_rewrite_affine(tmp_path, data, affine, source, target):
+    write(tmp_path / source, data, affine)
+    new_affine = affine.copy()
+    new_affine[:3, 3] += [1.0, 2.0, 3.0]
+
+    volume.rewrite_affine(tmp_path / source, tmp_path / target, new_affine)
+
+    np.testing.assert_allclose(volume.read_geometry(tmp_path / target).affine, new_affine, atol=1e-5)
+    np.testing.assert_array_equal(read(tmp_path / target), data)
+    assert not [path for path in tmp_path.iterdir() if path.name.startswith(".rewrite-")]
+
+
+def test_rewrite_reuses_compressed_data(tmp_path, data, affine):
+    write(tmp_path / "volume.mgz", data, affine)
+
+    volume.rewrite_affine(tmp_path / "volume.mgz", tmp_path / "other.mgz", np.eye(4))
+
+    source, target = (tmp_path / "volume.mgz").read_bytes(), (tmp_path / "other.mgz").read_bytes()
+    offset = pgzip.get_members(tmp_path / "volume.mgz")[1][0]
+    assert target.endswith(source[offset:])
+
+
+def test_rewrite_mismatched_formats(tmp_path, data, affine):
+    write(tmp_path / "volume.mgz", data, affine)
+
+    with pytest.raises(ValueError):
+        volume.rewrite_affine(tmp_path / "volume.mgz", tmp_path / "volume.nii.gz", affine)
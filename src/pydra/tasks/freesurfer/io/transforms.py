@@ -0,0 +1,422 @@
+"""
+Transforms
+==========
+
+Readers and writers for registration files,
+converted to and from linear transforms between the scanner RAS coordinates of two volumes.
+
+Registration files come in several formats, which differ in the coordinates their matrix maps:
+
+- LTA files (``.lta``) map either scanner RAS or voxel coordinates, and record the geometry of both volumes,
+- ``register.dat`` files (``.dat``, ``.reg``) map the tkregister RAS coordinates of the target volume
+  to those of the moving volume,
+- FSL matrices (``.mat``) map the scaled voxel coordinates of the moving volume to those of the reference volume,
+- MNI transforms (``.xfm``) map scanner RAS coordinates.
+
+Formats lacking the geometry of both volumes are only converted given both volumes.
+A ``register.dat`` file is formatted as tkregister2 writes it:
+
+>>> registration = Registration("sub-01", np.eye(4), in_plane_resolution=2.0, between_plane_resolution=3.0)
+>>> print(registration.to_string(), end="")  # doctest: +NORMALIZE_WHITESPACE
+sub-01
+2.000000
+3.000000
+0.150000
+1.000000000000000e+00 0.000000000000000e+00 0.000000000000000e+00 0.000000000000000e+00
+0.000000000000000e+00 1.000000000000000e+00 0.000000000000000e+00 0.000000000000000e+00
+0.000000000000000e+00 0.000000000000000e+00 1.000000000000000e+00 0.000000000000000e+00
+0.000000000000000e+00 0.000000000000000e+00 0.000000000000000e+00 1.000000000000000e+00
+round
+
+Transforms compose and invert, so that a chain of registrations collapses into a single transform,
+applied with a single resampling:
+
+>>> transform = compose(
+...     read_transform("func-to-anat.dat", source="func.nii.gz", destination="orig.mgz"),
+...     read_transform("anat-to-template.lta"),
+... )  # doctest: +SKIP
+>>> write_transform("func-to-template.lta", transform)  # doctest: +SKIP
+"""
+
+from __future__ import annotations
+
+__all__ = [
+    "LinearTransform",
+    "Registration",
+    "compose",
+    "read_chain",
+    "read_lta",
+    "read_register_dat",
+    "read_transform",
+    "tkr_vox2ras",
+    "write_lta",
+    "write_register_dat",
+    "write_transform",
+]
+
+import os
+import re
+
+import numpy as np
+from attrs import define, field
+
+from pydra.tasks.freesurfer.io.volume import (
+    Geometry,
+    format_volume_info,
+    parse_volume_info,
+    read_geometry,
+    tkr_vox2ras,
+)
+
+#: Types of LTA transforms.
+LINEAR_VOX_TO_VOX, LINEAR_RAS_TO_RAS = 0, 1
+
+
+def _format_row(values) -> str:
+    # Each value is followed by a space, trailing ones included.
+    return "".join(f"{value:18.15e} " for value in values)
+
+
+def _as_geometry(volume: Geometry | os.PathLike | None) -> Geometry | None:
+    if volume is None or isinstance(volume, Geometry):
+        return volume
+    return read_geometry(volume)
+
+
+def _fsl_scaling(geometry: Geometry) -> np.ndarray:
+    # FSL scales voxel coordinates by the voxel size, flipping columns of volumes in neurological order.
+    scaling = np.diag([*geometry.voxel_size, 1.0])
+    if np.linalg.det(geometry.affine[:3, :3]) > 0:
+        flip = np.eye(4)
+        flip[0, 0], flip[0, 3] = -1.0, geometry.shape[0] - 1
+        scaling = scaling @ flip
+    return scaling
+
+
+@define
+class LinearTransform:
+    """A linear transform from the scanner RAS coordinates of a source volume to those of a destination volume.
+
+    Attributes
+    ----------
+    matrix : numpy.ndarray
+        4x4 RAS to RAS matrix.
+    source, destination : Geometry, optional
+        Geometry of the volumes, if known.
+    source_file, destination_file : str, optional
+        Path of the volumes, if known, recorded in LTA files.
+    """
+
+    matrix: np.ndarray = field(converter=lambda matrix: np.asarray(matrix, dtype=float), eq=False)
+
+    source: Geometry | None = field(default=None, eq=False)
+
+    destination: Geometry | None = field(default=None, eq=False)
+
+    source_file: str | None = None
+
+    destination_file: str | None = None
+
+    def __matmul__(self, other: LinearTransform) -> LinearTransform:
+        """Compose with a transform applied first, as matrices do."""
+        return LinearTransform(
+            self.matrix @ other.matrix,
+            source=other.source,
+            destination=self.destination,
+            source_file=other.source_file,
+            destination_file=self.destination_file,
+        )
+
+    def inverse(self) -> LinearTransform:
+        """Return the transform from the destination volume to the source volume."""
+        return LinearTransform(
+            np.linalg.inv(self.matrix),
+            source=self.destination,
+            destination=self.source,
+            source_file=self.destination_file,
+            destination_file=self.source_file,
+        )
+
+    def _check_geometries(self, purpose: str):
+        if self.source is None or self.destination is None:
+            raise ValueError(f"The geometry of both volumes is required for {purpose}")
+
+    @property
+    def vox2vox(self) -> np.ndarray:
+        """Matrix mapping source voxel coordinates to destination voxel coordinates."""
+        self._check_geometries("voxel coordinates")
+        return np.linalg.inv(self.destination.affine) @ self.matrix @ self.source.affine
+
+    def to_registration(self, subject: str = "subject-unknown") -> Registration:
+        """Convert to a registration in ``register.dat`` format, with the source volume as moving volume."""
+        self._check_geometries("register.dat files")
+        source, destination = self.source, self.destination
+        matrix = (
+            source.tkr_affine
+            @ np.linalg.inv(source.affine)
+            @ np.linalg.inv(self.matrix)
+            @ destination.affine
+            @ np.linalg.inv(destination.tkr_affine)
+        )
+        return Registration(
+            subject, matrix, in_plane_resolution=source.voxel_size[0], between_plane_resolution=source.voxel_size[2]
+        )
+
+    def to_fsl(self) -> np.ndarray:
+        """Convert to an FSL matrix, with the source volume as input volume."""
+        self._check_geometries("FSL matrices")
+        return _fsl_scaling(self.destination) @ self.vox2vox @ np.linalg.inv(_fsl_scaling(self.source))
+
+    @classmethod
+    def from_fsl(cls, matrix: np.ndarray, source: Geometry, destination: Geometry) -> LinearTransform:
+        """Convert an FSL matrix, given the geometries of its input and reference volumes."""
+        vox2vox = np.linalg.inv(_fsl_scaling(destination)) @ matrix @ _fsl_scaling(source)
+        return cls(destination.affine @ vox2vox @ np.linalg.inv(source.affine), source=source, destination=destination)
+
+
+@define
+class Registration:
+    """A registration in ``register.dat`` format.
+
+    Attributes
+    ----------
+    subject : str
+        Subject of the target volume.
+    matrix : numpy.ndarray
+        Transform from target to moving tkregister RAS coordinates.
+    in_plane_resolution, between_plane_resolution : float
+        Voxel size of the moving volume, within and across slices.
+    intensity : float
+        Display intensity of the moving volume, unused outside tkregister2.
+    float2int : str
+        Conversion of coordinates to voxel indices, either ``"round"``, ``"floor"`` or ``"tkregister"``.
+    """
+
+    subject: str
+
+    matrix: np.ndarray = field(converter=lambda matrix: np.asarray(matrix, dtype=float), eq=False)
+
+    in_plane_resolution: float = 1.0
+
+    between_plane_resolution: float = 1.0
+
+    intensity: float = 0.15
+
+    float2int: str = "round"
+
+    @classmethod
+    def from_string(cls, text: str) -> Registration:
+        """Parse the content of a ``register.dat`` file."""
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        if len(lines) < 8:
+            raise ValueError("Truncated register.dat file")
+        matrix = np.array([[float(value) for value in line.split()] for line in lines[4:8]])
+        if matrix.shape != (4, 4):
+            raise ValueError("Invalid register.dat matrix")
+        return cls(
+            lines[0],
+            matrix,
+            in_plane_resolution=float(lines[1]),
+            between_plane_resolution=float(lines[2]),
+            intensity=float(lines[3]),
+            float2int=lines[8] if len(lines) > 8 else "round",
+        )
+
+    def to_string(self) -> str:
+        """Format the registration as tkregister2 does."""
+        lines = [
+            self.subject,
+            f"{self.in_plane_resolution:f}",
+            f"{self.between_plane_resolution:f}",
+            f"{self.intensity:f}",
+            *map(_format_row, self.matrix),
+            self.float2int,
+        ]
+        return "\n".join(lines) + "\n"
+
+    def to_transform(self, moving: Geometry, target: Geometry) -> LinearTransform:
+        """Convert to a transform from the moving volume to the target volume."""
+        matrix = (
+            target.affine
+            @ np.linalg.inv(target.tkr_affine)
+            @ np.linalg.inv(self.matrix)
+            @ moving.tkr_affine
+            @ np.linalg.inv(moving.affine)
+        )
+        return LinearTransform(matrix, source=moving, destination=target)
+
+
+def read_register_dat(path: os.PathLike) -> Registration:
+    """Read a registration in ``register.dat`` format."""
+    with open(path) as f:
+        return Registration.from_string(f.read())
+
+
+def write_register_dat(path: os.PathLike, registration: Registration):
+    """Write a registration in ``register.dat`` format."""
+    with open(path, "w") as f:
+        f.write(registration.to_string())
+
+
+def read_lta(path: os.PathLike) -> LinearTransform:
+    """Read a linear transform array, converted to a RAS to RAS transform."""
+    with open(path) as f:
+        lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    header = {}
+    for index, line in enumerate(lines):
+        if re.fullmatch(r"\d+\s+4\s+4", line):
+            break
+        key, _, value = line.partition("=")
+        header[key.strip()] = value.split("#")[0].strip()
+    else:
+        raise ValueError(f"Invalid LTA file: {path}")
+    if int(header.get("nxforms", 1)) != 1:
+        raise ValueError(f"Only single transforms are supported: {path}")
+    matrix = np.array([[float(value) for value in line.split()] for line in lines[index + 1 : index + 5]])
+    start, middle = lines.index("src volume info"), lines.index("dst volume info")
+    end = next((i for i in range(middle + 1, len(lines)) if lines[i].split()[0] in ("subject", "fscale")), len(lines))
+    source, source_file = parse_volume_info(lines[start + 1 : middle])
+    destination, destination_file = parse_volume_info(lines[middle + 1 : end])
+    transform_type = int(header.get("type", LINEAR_RAS_TO_RAS))
+    if transform_type == LINEAR_VOX_TO_VOX:
+        if source is None or destination is None:
+            raise ValueError(f"Voxel to voxel transform without volume geometries: {path}")
+        matrix = destination.affine @ matrix @ np.linalg.inv(source.affine)
+    elif transform_type != LINEAR_RAS_TO_RAS:
+        raise ValueError(f"Unsupported LTA type {transform_type}: {path}")
+    return LinearTransform(
+        matrix, source=source, destination=destination, source_file=source_file, destination_file=destination_file
+    )
+
+
+def write_lta(path: os.PathLike, transform: LinearTransform, subject: str | None = None):
+    """Write a transform as a RAS to RAS linear transform array."""
+    lines = [
+        f"# transform file {os.path.abspath(path)}",
+        f"type      = {LINEAR_RAS_TO_RAS} # LINEAR_RAS_TO_RAS",
+        "nxforms   = 1",
+        "mean      = 0.0000 0.0000 0.0000",
+        "sigma     = 1.0000",
+        "1 4 4",
+        *map(_format_row, transform.matrix),
+        "src volume info",
+        *format_volume_info(transform.source, transform.source_file),
+        "dst volume info",
+        *format_volume_info(transform.destination, transform.destination_file),
+    ]
+    if subject is not None:
+        lines.append(f"subject {subject}")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def _read_fsl(path: os.PathLike) -> np.ndarray:
+    with open(path) as f:
+        matrix = np.array([[float(value) for value in line.split()] for line in f if line.strip()])
+    if matrix.shape != (4, 4):
+        raise ValueError(f"Invalid FSL matrix: {path}")
+    return matrix
+
+
+def _read_xfm(path: os.PathLike) -> np.ndarray:
+    with open(path) as f:
+        match = re.search(r"Linear_Transform\s*=([^;]*);", f.read())
+    if match is None:
+        raise ValueError(f"No linear transform in XFM file: {path}")
+    matrix = np.eye(4)
+    matrix[:3] = np.reshape([float(value) for value in match.group(1).split()], (3, 4))
+    return matrix
+
+
+def _write_xfm(path: os.PathLike, matrix: np.ndarray):
+    rows = "\n".join(" " + " ".join(f"{value:.9g}" for value in row) for row in matrix[:3])
+    with open(path, "w") as f:
+        f.write(f"MNI Transform File\n\nTransform_Type = Linear;\nLinear_Transform =\n{rows};\n")
+
+
+def read_transform(
+    path: os.PathLike,
+    source: Geometry | os.PathLike | None = None,
+    destination: Geometry | os.PathLike | None = None,
+) -> LinearTransform:
+    """Read a registration file of any format, by its extension, as a transform.
+
+    Parameters
+    ----------
+    path : path-like
+        Registration file, either ``.lta``, ``.dat``, ``.reg``, ``.mat`` or ``.xfm``.
+    source, destination : Geometry or path-like, optional
+        Moving and target volumes, or their geometries,
+        required for ``register.dat`` files and FSL matrices, and overriding those recorded in LTA files.
+    """
+    extension = os.path.splitext(os.fspath(path))[1]
+    source, destination = _as_geometry(source), _as_geometry(destination)
+    if extension == ".lta":
+        transform = read_lta(path)
+        return LinearTransform(
+            transform.matrix,
+            source=source or transform.source,
+            destination=destination or transform.destination,
+            source_file=transform.source_file,
+            destination_file=transform.destination_file,
+        )
+    if extension == ".xfm":
+        return LinearTransform(_read_xfm(path), source=source, destination=destination)
+    if source is None or destination is None:
+        raise ValueError(f"Both volumes are required to read {path}")
+    if extension in (".dat", ".reg"):
+        return read_register_dat(path).to_transform(source, destination)
+    if extension == ".mat":
+        return LinearTransform.from_fsl(_read_fsl(path), source, destination)
+    raise ValueError(f"Unsupported registration format: {path}")
+
+
+def write_transform(path: os.PathLike, transform: LinearTransform, subject: str | None = None):
+    """Write a transform to a registration file of any format, by its extension."""
+    extension = os.path.splitext(os.fspath(path))[1]
+    if extension == ".lta":
+        write_lta(path, transform, subject=subject)
+    elif extension == ".xfm":
+        _write_xfm(path, transform.matrix)
+    elif extension in (".dat", ".reg"):
+        write_register_dat(path, transform.to_registration(subject or "subject-unknown"))
+    elif extension == ".mat":
+        np.savetxt(path, transform.to_fsl(), fmt="%.10f")
+    else:
+        raise ValueError(f"Unsupported registration format: {path}")
+
+
+def compose(*transforms: LinearTransform) -> LinearTransform:
+    """Compose transforms applied in the given order, from the source of the first to the destination of the last."""
+    if not transforms:
+        raise ValueError("No transform to compose")
+    composed = transforms[0]
+    for transform in transforms[1:]:
+        composed = transform @ composed
+    return composed
+
+
+def read_chain(
+    chain: list,
+    source: Geometry | os.PathLike | None = None,
+    destination: Geometry | os.PathLike | None = None,
+) -> LinearTransform:
+    """Read a chain of registration files and compose them into a single transform.
+
+    Parameters
+    ----------
+    chain : list
+        Registration files, in the order they apply. Each is either a path,
+        or a tuple of a path with the moving and target volumes of the registration.
+    source, destination : Geometry or path-like, optional
+        Moving volume of the first registration and target volume of the last one.
+    """
+    transforms = []
+    for index, item in enumerate(chain):
+        path, moving, target = (item, None, None) if isinstance(item, (str, os.PathLike)) else item
+        if index == 0 and moving is None:
+            moving = source
+        if index == len(chain) - 1 and target is None:
+            target = destination
+        transforms.append(read_transform(path, source=moving, destination=target))
+    return compose(*transforms)
@@ -0,0 +1,280 @@
+"""
+Volume Geometry
+===============
+
+Format-independent access to the geometry of MGH and NIfTI volumes, read from their headers only.
+
+>>> geometry = read_geometry("orig.mgz")  # doctest: +SKIP
+>>> geometry.shape, geometry.voxel_size  # doctest: +SKIP
+((256, 256, 256), (1.0, 1.0, 1.0))
+
+Voxel data is read by the reader of the format, with :func:`read_data`.
+
+:func:`rewrite_affine` changes the voxel to RAS transform of a volume without reading or writing its voxel data
+whenever possible:
+
+- uncompressed volumes are cloned, with a reflink on filesystems supporting it, then their header is patched in place,
+- compressed volumes written by :mod:`~.pgzip` only have their header member recompressed,
+  the compressed voxel data being copied verbatim,
+- other compressed volumes are decompressed and recompressed in parallel.
+
+>>> rewrite_affine("func.nii.gz", "func.new.vox2ras.nii.gz", affine)  # doctest: +SKIP
+"""
+
+from __future__ import annotations
+
+__all__ = [
+    "Geometry",
+    "format_volume_info",
+    "get_format",
+    "parse_volume_info",
+    "read_data",
+    "read_geometry",
+    "rewrite_affine",
+    "tkr_vox2ras",
+]
+
+import os
+import shutil
+import struct
+import tempfile
+import zlib
+from typing import Iterable
+
+import attrs
+import numpy as np
+from attrs import define, field
+
+from pydra.tasks.freesurfer.io import mgh, nifti, pgzip
+
+# Linux ioctl cloning a file into another, sharing their extents.
+_FICLONE = 0x40049409
+
+
+def tkr_vox2ras(shape: tuple, voxel_size: tuple) -> np.ndarray:
+    """Return the tkregister voxel to RAS transform of a volume, centered on its field of view."""
+    (columns, rows, slices), (xsize, ysize, zsize) = shape[:3], voxel_size[:3]
+    return np.array(
+        [
+            [-xsize, 0.0, 0.0, xsize * columns / 2],
+            [0.0, 0.0, zsize, -zsize * slices / 2],
+            [0.0, -ysize, 0.0, ysize * rows / 2],
+            [0.0, 0.0, 0.0, 1.0],
+        ]
+    )
+
+
+@define(frozen=True)
+class Geometry:
+    """Geometry of a volume.
+
+    Attributes
+    ----------
+    shape : tuple of int
+        Number of columns, rows and slices.
+    voxel_size : tuple of float
+        Voxel size in millimeters.
+    affine : numpy.ndarray
+        Voxel to scanner RAS transform.
+    """
+
+    shape: tuple = field(converter=tuple)
+
+    voxel_size: tuple = field(converter=lambda size: tuple(map(float, size)))
+
+    affine: np.ndarray = field(converter=lambda affine: np.asarray(affine, dtype=float), eq=False)
+
+    @property
+    def center(self) -> np.ndarray:
+        """RAS coordinates of the center of the volume."""
+        return self.affine[:3, :3] @ (np.array(self.shape) / 2) + self.affine[:3, 3]
+
+    @property
+    def tkr_affine(self) -> np.ndarray:
+        """Voxel to tkregister RAS transform."""
+        return tkr_vox2ras(self.shape, self.voxel_size)
+
+
+def get_format(path: os.PathLike) -> str:
+    """Return the format of a volume, either ``"mgh"`` or ``"nifti"``, by its extension."""
+    path = os.fspath(path)
+    if path.endswith((".mgh", ".mgz")):
+        return "mgh"
+    if path.endswith((".nii", ".nii.gz")):
+        return "nifti"
+    raise ValueError(f"Unsupported volume format: {path}")
+
+
+def _is_compressed(path: os.PathLike) -> bool:
+    return os.fspath(path).endswith((".mgz", ".gz"))
+
+
+def read_geometry(path: os.PathLike) -> Geometry:
+    """Read the geometry of a volume from its header."""
+    if get_format(path) == "mgh":
+        header = mgh.read_header(path)
+        return Geometry(header.dims[:3], header.voxel_size, header.affine)
+    header = nifti.read_header(path)
+    return Geometry(header.volume_shape, (tuple(header.pixdim) + (1.0, 1.0, 1.0))[:3], header.affine)
+
+
+def read_data(path: os.PathLike, mmap: bool = True, threads: int | None = None) -> np.ndarray:
+    """Read the raw voxel data of a volume, memory-mapped read-only for uncompressed files unless ``mmap`` is false."""
+    reader = mgh.read_data if get_format(path) == "mgh" else nifti.read_data
+    return reader(path, mmap=mmap, threads=threads)
+
+
+def parse_volume_info(lines: Iterable[str]) -> tuple[Geometry | None, str | None]:
+    """Parse the volume geometry recorded in LTA files and surface footers, and the path of the volume."""
+    values = {}
+    for line in lines:
+        key, _, value = line.partition("=")
+        values[key.strip()] = value.split("#")[0].strip()
+    filename = values.get("filename") or None
+    if values.get("valid") != "1":
+        return None, filename
+    shape = tuple(int(value) for value in values["volume"].split())
+    voxel_size = np.array([float(value) for value in values["voxelsize"].split()])
+    cosines = np.array([[float(value) for value in values[key].split()] for key in ("xras", "yras", "zras")]).T
+    # LTA files and surfaces name the center differently.
+    center = np.array([float(value) for value in values.get("c_ras", values.get("cras", "0 0 0")).split()])
+    affine = np.eye(4)
+    affine[:3, :3] = cosines * voxel_size
+    affine[:3, 3] = center - affine[:3, :3] @ (np.array(shape) / 2)
+    return Geometry(shape, voxel_size, affine), filename
+
+
+def format_volume_info(geometry: Geometry | None, filename: str | None, center_key: str = "c_ras") -> list[str]:
+    """Format a volume geometry as recorded in LTA files, or surface footers with ``center_key="cras"``."""
+
+    def row(values) -> str:
+        return " ".join(f"{value:.15e}" for value in values)
+
+    if geometry is None:
+        shape, voxel_size, cosines, center = (0, 0, 0), np.zeros(3), np.zeros((3, 3)), np.zeros(3)
+    else:
+        shape, voxel_size, center = geometry.shape, geometry.voxel_size, geometry.center
+        cosines = geometry.affine[:3, :3] / np.array(voxel_size)
+    return [
+        "valid = 1  # volume info valid" if geometry is not None else "valid = 0  # volume info invalid",
+        f"filename = {filename or ''}",
+        "volume = {} {} {}".format(*shape),
+        f"voxelsize = {row(voxel_size)}",
+        f"xras   = {row(cosines[:, 0])}",
+        f"yras   = {row(cosines[:, 1])}",
+        f"zras   = {row(cosines[:, 2])}",
+        f"{center_key:6} = {row(center)}",
+    ]
+
+
+def _patch_header(prefix: bytes, fmt: str, affine: np.ndarray) -> bytes:
+    if fmt == "nifti":
+        return nifti.set_affine(prefix, affine)
+    header = mgh.MGHHeader.from_bytes(prefix)
+    geometry = mgh.MGHHeader.from_affine(header.shape, header.dtype, affine)
+    patched = attrs.evolve(
+        header,
+        good_ras=True,
+        voxel_size=geometry.voxel_size,
+        direction_cosines=geometry.direction_cosines,
+        center=geometry.center,
+    )
+    return patched.to_bytes() + prefix[mgh.HEADER_SIZE :]
+
+
+def _header_size(prefix: bytes, fmt: str) -> int:
+    if fmt == "mgh":
+        return mgh.HEADER_SIZE
+    endian = "<" if struct.unpack_from("<i", prefix)[0] in (348, 540) else ">"
+    return struct.unpack_from(f"{endian}i", prefix)[0]
+
+
+def _clone(source: os.PathLike, target: os.PathLike):
+    try:
+        import fcntl
+
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    except (ImportError, OSError):
+        shutil.copyfile(source, target)
+
+
+def _rewrite_members(source: os.PathLike, f, members: list, fmt: str, affine: np.ndarray, compresslevel: int) -> bool:
+    # Only the first member, holding the header, is recompressed.
+    offset, size, _ = members[0]
+    with open(source, "rb") as src:
+        src.seek(offset)
+        prefix = zlib.decompress(src.read(size), wbits=31)
+        if len(prefix) < _header_size(prefix, fmt):
+            return False
+        f.write(pgzip.compress_member(_patch_header(prefix, fmt, affine), compresslevel))
+        shutil.copyfileobj(src, f)
+    return True
+
+
+def _rewrite_stream(source: os.PathLike, f, fmt: str, affine: np.ndarray, threads: int | None):
+    if _is_compressed(source):
+        data = pgzip.decompress_file(source, threads=threads)
+    else:
+        with open(source, "rb") as src:
+            data = bytearray(src.read())
+    size = _header_size(bytes(data[:540]), fmt)
+    f.write(_patch_header(bytes(data[:size]), fmt, affine))
+    if isinstance(f, pgzip.ParallelGzipWriter):
+        f.end_member()
+    f.write(memoryview(data)[size:])
+
+
+def rewrite_affine(
+    source: os.PathLike,
+    target: os.PathLike,
+    affine: np.ndarray,
+    compresslevel: int = 6,
+    threads: int | None = None,
+):
+    """Copy a volume with a new voxel to RAS transform, leaving its voxel data untouched.
+
+    Parameters
+    ----------
+    source, target : path-like
+        Volumes of the same format, either of which may be compressed. They may be the same file.
+    affine : numpy.ndarray
+        New voxel to RAS transform.
+    compresslevel : int
+        Compression level of recompressed data.
+    threads : int, optional
+        Number of threads decompressing and compressing data. Defaults to the thread budget of the host.
+    """
+    fmt = get_format(source)
+    if get_format(target) != fmt:
+        raise ValueError(f"Volumes differ in format: {source}, {target}")
+    affine = np.asarray(affine, dtype=float)
+    directory = os.path.dirname(os.path.abspath(target))
+    # Volumes are written next to the target then renamed, so that the source may be the target.
+    fd, staging = tempfile.mkstemp(dir=directory, prefix=".rewrite-")
+    os.close(fd)
+    try:
+        if not _is_compressed(source) and not _is_compressed(target):
+            _clone(source, staging)
+            with open(staging, "r+b") as f:
+                prefix = f.read(540)
+                f.seek(0)
+                f.write(_patch_header(prefix[: _header_size(prefix, fmt)], fmt, affine))
+        elif not _is_compressed(target):
+            with open(staging, "wb") as f:
+                _rewrite_stream(source, f, fmt, affine, threads)
+        else:
+            members = pgzip.get_members(source) if _is_compressed(source) else None
+            done = False
+            if members is not None:
+                with open(staging, "wb") as f:
+                    done = _rewrite_members(source, f, members, fmt, affine, compresslevel)
+            if not done:
+                with pgzip.open_writer(staging, compresslevel=compresslevel, threads=threads) as f:
+                    _rewrite_stream(source, f, fmt, affine, threads)
+        shutil.copymode(source, staging)
+        os.replace(staging, target)
+    except BaseException:
+        if os.path.exists(staging):
+            os.unlink(staging)
+        raise
@@ -6,6 +6,7 @@ Volume Utilities
 .. automodule:: pydra.tasks.freesurfer.mri.binarize
 .. automodule:: pydra.tasks.freesurfer.mri.convert
 .. automodule:: pydra.tasks.freesurfer.mri.coreg
+.. automodule:: pydra.tasks.freesurfer.mri.extract_rois
 .. automodule:: pydra.tasks.freesurfer.mri.label2vol
 .. automodule:: pydra.tasks.freesurfer.mri.robust_register
 .. automodule:: pydra.tasks.freesurfer.mri.robust_template
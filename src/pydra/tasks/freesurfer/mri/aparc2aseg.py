@@ -22,6 +22,7 @@ from attrs import define, field
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
 from pydra.tasks.freesurfer import specs
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(slots=False, kw_only=True)
@@ -80,3 +81,5 @@ class Aparc2Aseg(ShellCommandTask):
     output_spec = SpecInfo(name="Output", bases=(specs.SubjectsDirOutSpec,))
 
     executable = "mri_aparc2aseg"
+
+    resource_profile = ResourceProfile(cores=1, memory=2048, wall_time=30, scratch=512)
@@ -22,6 +22,7 @@ from attrs import define, field
 
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(slots=False, kw_only=True)
@@ -141,3 +142,5 @@ class Binarize(ShellCommandTask):
     )
 
     executable = "mri_binarize"
+
+    resource_profile = ResourceProfile(cores=1, memory=512, wall_time=5, scratch=512)
@@ -22,6 +22,7 @@ from attrs import define, field
 
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(kw_only=True)
@@ -61,3 +62,5 @@ class Convert(ShellCommandTask):
     input_spec = SpecInfo(name="ConvertInput", bases=(ConvertSpec,))
 
     executable = "mri_convert"
+
+    resource_profile = ResourceProfile(cores=1, memory=1024, wall_time=10, scratch=1024)
@@ -20,6 +20,7 @@ from attrs import define, field
 
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(kw_only=True)
@@ -72,4 +73,6 @@ class Coreg(ShellCommandTask):
 
     executable = "mri_coreg"
 
+    resource_profile = ResourceProfile(cores=1, memory=2048, wall_time=30, scratch=256, threads_input="num_threads")
+
     input_spec = SpecInfo(name="Input", bases=(CoregSpec,))
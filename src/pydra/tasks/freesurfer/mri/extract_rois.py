@@ -0,0 +1,164 @@
+"""
+ExtractROIs
+===========
+
+Extract the masks of many regions of interest from a segmentation, read once.
+
+Each region is a label or a group of labels of the segmentation, such as ``aparc+aseg.mgz`` or ``gtmseg.mgz``.
+Its mask is the output of ``mri_binarize --match`` with the same labels, along with its line of the count file,
+but the segmentation is decoded once for all regions, voxels counted per label in a single pass,
+and masks written concurrently, without launching any process.
+
+Examples
+--------
+
+>>> task = ExtractROIs(segmentation_volume="aparc+aseg.mgz", match_values=[17, 53, [10, 49]])
+>>> task.inputs.match_values
+[17, 53, [10, 49]]
+
+Masks are written as ``aparc+aseg_roi-17.mgz``, ``aparc+aseg_roi-53.mgz`` and ``aparc+aseg_roi-10+49.mgz``,
+and their voxel counts returned in the same order:
+
+>>> result = task()  # doctest: +SKIP
+>>> result.output.voxel_counts  # doctest: +SKIP
+[4213, 4127, 16452]
+"""
+
+__all__ = ["ExtractROIs", "extract_rois"]
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from attrs import define, field
+
+from pydra.engine.specs import BaseSpec, File, SpecInfo
+from pydra.engine.task import FunctionTask
+from pydra.tasks.freesurfer._cpu import get_thread_budget
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
+from pydra.tasks.freesurfer.native.binarize import format_count, read_volume, write_volume
+
+#: Labels of integer segmentations below this value are counted through a table, as FreeSurfer labels are.
+MAX_LABEL = 1 << 16
+
+
+def _split_name(path: os.PathLike) -> Tuple[str, str]:
+    name = Path(path).name
+    for extension in (".nii.gz", ".nii", ".mgz", ".mgh"):
+        if name.endswith(extension):
+            return name[: -len(extension)], extension
+    raise ValueError(f"Unsupported volume format: {path}")
+
+
+def extract_rois(
+    segmentation_volume: os.PathLike,
+    match_values: Sequence,
+    output_prefix: Optional[str] = None,
+    save_as_uchar: bool = False,
+    max_workers: Optional[int] = None,
+) -> Tuple[List[str], List[int], str]:
+    """Write the mask of each region of a segmentation, and return their paths, voxel counts and count file.
+
+    Parameters
+    ----------
+    segmentation_volume : path-like
+        Segmentation volume.
+    match_values : sequence
+        Label, or sequence of labels, of each region.
+    output_prefix : str, optional
+        Prefix of the masks, defaulting to the name of the segmentation followed by ``_roi``.
+    save_as_uchar : bool
+        Save masks as unsigned char rather than int, as ``mri_binarize --uchar`` does.
+    max_workers : int, optional
+        Maximum number of masks written concurrently, defaulting to the thread budget of the process.
+    """
+    stem, extension = _split_name(segmentation_volume)
+    prefix = output_prefix or f"{stem}_roi"
+    groups = [np.atleast_1d(np.asarray(values, dtype=np.float64)) for values in match_values]
+    data = read_volume(segmentation_volume)
+    if np.issubdtype(data.dtype, np.integer) and data.size and 0 <= data.min() and data.max() < MAX_LABEL:
+        # Voxels are counted per label in a single pass, and regions looked up through a table indexed by label.
+        counts = np.bincount(data.ravel())
+
+        def get_mask(group: np.ndarray) -> Tuple[np.ndarray, int]:
+            table = np.zeros(counts.size, dtype=bool)
+            labels = group[(group == np.round(group)) & (group >= 0) & (group < counts.size)]
+            table[labels.astype(np.intp)] = True
+            return table[data], int(counts[table].sum())
+
+    else:
+        # Negative, large or non-integer labels are matched region per region.
+        def get_mask(group: np.ndarray) -> Tuple[np.ndarray, int]:
+            mask = np.isin(data, group)
+            return mask, int(np.count_nonzero(mask))
+
+    def write(group: np.ndarray) -> Tuple[str, int]:
+        mask, count = get_mask(group)
+        path = os.path.abspath(f"{prefix}-{'+'.join(f'{value:g}' for value in group)}{extension}")
+        # Masks are built as booleans, and viewed as unsigned char or converted to int once.
+        mask = mask.view(np.uint8) if save_as_uchar else mask.astype(np.int32)
+        write_volume(path, mask, segmentation_volume, threads=1)
+        return path, count
+
+    with ThreadPoolExecutor(max_workers or get_thread_budget()) as executor:
+        results = list(executor.map(write, groups))
+    output_volumes = [path for path, _ in results]
+    voxel_counts = [count for _, count in results]
+    output_count_file = os.path.abspath(f"{prefix}_count.txt")
+    with open(output_count_file, "w") as f:
+        f.writelines(format_count(count, data.size) for count in voxel_counts)
+    return output_volumes, voxel_counts, output_count_file
+
+
+@define(slots=False, kw_only=True)
+class ExtractROIsSpec(BaseSpec):
+    """Specifications for ROI extraction."""
+
+    segmentation_volume: File = field(metadata={"help_string": "segmentation volume", "mandatory": True})
+
+    match_values: list = field(
+        metadata={"help_string": "label, or list of labels, of each region of interest", "mandatory": True}
+    )
+
+    output_prefix: str = field(
+        default=None, metadata={"help_string": "prefix of output masks, the segmentation name followed by _roi"}
+    )
+
+    save_as_uchar: bool = field(default=False, metadata={"help_string": "save masks as unsigned char"})
+
+    max_workers: int = field(default=None, metadata={"help_string": "maximum number of masks written concurrently"})
+
+
+class ExtractROIs(FunctionTask):
+    """Task definition for ROI extraction."""
+
+    output_spec = SpecInfo(
+        name="Output",
+        fields=[
+            ("output_volumes", list, {"help_string": "mask of each region of interest"}),
+            ("voxel_counts", list, {"help_string": "number of voxels of each region of interest"}),
+            ("output_count_file", File, {"help_string": "hit counts of each region, as written by mri_binarize"}),
+        ],
+        bases=(BaseSpec,),
+    )
+
+    resource_profile = ResourceProfile(
+        cores=4,
+        memory=1024,
+        wall_time=5,
+        scratch=0,
+        threads_input="max_workers",
+        scaling_input="match_values",
+        scratch_per_item=16,
+    )
+
+    def __init__(self, **kwargs):
+        # The function is appended to the fields of the input specification, which is thus created per task.
+        super().__init__(
+            extract_rois,
+            input_spec=SpecInfo(name="Input", fields=[], bases=(ExtractROIsSpec,)),
+            output_spec=self.output_spec,
+            **kwargs,
+        )
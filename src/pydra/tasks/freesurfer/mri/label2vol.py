@@ -94,6 +94,7 @@ from attrs import define, field
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
 from pydra.tasks.freesurfer import specs
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(kw_only=True)
@@ -169,6 +170,8 @@ class Label2Vol(ShellCommandTask):
 
     executable = "mri_label2vol"
 
+    resource_profile = ResourceProfile(cores=1, memory=1024, wall_time=10, scratch=256)
+
     input_spec = SpecInfo(name="Input", bases=(Label2VolSpec, specs.HemisphereSpec, specs.SubjectsDirSpec))
 
     output_spec = SpecInfo(name="Output", bases=(specs.SubjectsDirOutSpec,))
@@ -23,6 +23,7 @@ from attrs import define, field
 
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(kw_only=True)
@@ -111,4 +112,6 @@ class RobustRegister(ShellCommandTask):
 
     executable = "mri_robust_register"
 
+    resource_profile = ResourceProfile(cores=1, memory=4096, wall_time=60, scratch=1024)
+
     input_spec = SpecInfo(name="Input", bases=(RobustRegisterSpec,))
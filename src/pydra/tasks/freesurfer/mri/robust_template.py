@@ -29,6 +29,7 @@ from attrs import define, field
 
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(kw_only=True)
@@ -109,4 +110,15 @@ class RobustTemplate(ShellCommandTask):
 
     executable = "mri_robust_template"
 
+    resource_profile = ResourceProfile(
+        cores=1,
+        memory=2048,
+        wall_time=30,
+        scratch=0,
+        scaling_input="input_volumes",
+        memory_per_item=1536,
+        wall_time_per_item=30,
+        scratch_per_item=1024,
+    )
+
     input_spec = SpecInfo(name="Input", bases=(RobustTemplateSpec,))
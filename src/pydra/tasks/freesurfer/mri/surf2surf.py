@@ -99,6 +99,7 @@ from attrs import define, field
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
 from pydra.tasks.freesurfer import specs
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(kw_only=True)
@@ -259,3 +260,5 @@ class Surf2Surf(ShellCommandTask):
     input_spec = SpecInfo(name="Input", bases=(Surf2SurfSpec, specs.HemisphereSpec, specs.SubjectsDirSpec))
 
     executable = "mri_surf2surf"
+
+    resource_profile = ResourceProfile(cores=1, memory=1024, wall_time=10, scratch=256)
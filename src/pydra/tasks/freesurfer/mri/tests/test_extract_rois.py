@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.io import mgh, volume
+from pydra.tasks.freesurfer.mri.extract_rois import ExtractROIs, extract_rois
+from pydra.tasks.freesurfer.native.binarize import format_count
+
+
+def test_extract_rois(tmp_path):
+    data = np.random.default_rng(0).choice([0, 10, 17, 49, 53], size=(12, 10, 8)).astype(np.int32)
+    affine = np.array([[-1.0, 0.0, 0.0, 6.0], [0.0, 0.0, 1.0, -4.0], [0.0, -1.0, 0.0, 5.0], [0, 0, 0, 1]])
+    mgh.write(tmp_path / "aparc+aseg.mgz", data, mgh.MGHHeader.from_affine(data.shape, np.int32, affine))
+    task = ExtractROIs(
+        segmentation_volume=tmp_path / "aparc+aseg.mgz",
+        match_values=[17, [10, 49], 2],
+        save_as_uchar=True,
+        cache_dir=tmp_path / "cache",
+    )
+
+    result = task()
+
+    groups = [[17], [10, 49], [2]]
+    assert [path.rsplit("/", 1)[1] for path in result.output.output_volumes] == [
+        "aparc+aseg_roi-17.mgz",
+        "aparc+aseg_roi-10+49.mgz",
+        "aparc+aseg_roi-2.mgz",
+    ]
+    assert result.output.voxel_counts == [int(np.isin(data, group).sum()) for group in groups]
+    for path, group in zip(result.output.output_volumes, groups):
+        mask = mgh.read_data(path)
+        assert mask.dtype == np.uint8
+        np.testing.assert_array_equal(mask, np.isin(data, group))
+        np.testing.assert_allclose(volume.read_geometry(path).affine, affine, atol=1e-5)
+    with open(result.output.output_count_file) as f:
+        assert f.read() == "".join(format_count(count, data.size) for count in result.output.voxel_counts)
+
+
+@pytest.mark.parametrize("dtype", [np.int32, np.float32])
+def test_extract_rois_labels(tmp_path, monkeypatch, dtype):
+    # Negative and non-integer labels are matched without the label table.
+    labels = [0, -1, 17, 70000] if dtype == np.int32 else [0, 2.5, 17, 70000]
+    data = np.random.default_rng(0).choice(labels, size=(12, 10, 8)).astype(dtype)
+    mgh.write(tmp_path / "seg.mgz", data, mgh.MGHHeader.from_affine(data.shape, dtype, np.eye(4)))
+    monkeypatch.chdir(tmp_path)
+
+    output_volumes, voxel_counts, _ = extract_rois(tmp_path / "seg.mgz", [labels[1], [17, labels[3]]])
+
+    for path, group in zip(output_volumes, [[labels[1]], [17, labels[3]]]):
+        mask = mgh.read_data(path)
+        assert mask.dtype == np.dtype(">i4")
+        np.testing.assert_array_equal(mask, np.isin(data, group))
+    assert voxel_counts == [int(np.isin(data, [labels[1]]).sum()), int(np.isin(data, [17, labels[3]]).sum())]
@@ -80,6 +80,21 @@ Examples
 >>> task.cmdline
 'mri_vol2vol --mov orig.mgz --targ $FREESURFER_HOME/average/mni305.cor.mgz --o orig-in-mni305.mgz \
 --xfm transforms/talairach.xfm'
+
+7. Resample functional data into template space through a chain of registrations, with a single resampling:
+
+>>> task = Vol2Vol(
+...     moving_volume="func.nii.gz",
+...     target_volume="template.mgz",
+...     output_volume="func-in-template.mgz",
+...     registration_chain=[("func-to-anat.dat", "func.nii.gz", "orig.mgz"), "anat-to-template.lta"],
+... )
+>>> task.cmdline  # doctest: +ELLIPSIS
+'mri_vol2vol --mov func.nii.gz --targ template.mgz --o func-in-template.mgz --lta .../registration_chain.lta'
+
+The registrations of the chain are composed into a single LTA file of the output directory once per run,
+before execution, by the ``pre_run_task`` hook of the task,
+see :func:`~pydra.tasks.freesurfer.native.vol2vol.write_registration_chain`.
 """
 
 __all__ = ["Vol2Vol"]
@@ -89,6 +104,16 @@ from attrs import define, field
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
 from pydra.tasks.freesurfer import specs
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
+from pydra.tasks.freesurfer.native.vol2vol import write_registration_chain
+
+#: Name of the LTA file a chain of registrations is composed into, in the output directory.
+CHAIN_FILE = "registration_chain.lta"
+
+
+def _format_registration_chain(field):
+    # The chain is composed before execution, see write_registration_chain, the command line only referring to it.
+    return f"--lta {field}" if field else ""
 
 
 @define(kw_only=True)
@@ -117,6 +142,29 @@ class Vol2VolSpec(ShellSpec):
 
     xfm_registration_file: str = field(metadata={"help_string": "registration file in XFM format", "argstr": "--xfm"})
 
+    lta_registration_file: str = field(metadata={"help_string": "registration file in LTA format", "argstr": "--lta"})
+
+    registration_chain: list = field(
+        metadata={
+            "help_string": "registration files applied in order, each optionally with its moving and target volumes",
+            "xor": [
+                "registration_file",
+                "fsl_registration_file",
+                "xfm_registration_file",
+                "lta_registration_file",
+            ],
+        }
+    )
+
+    registration_chain_file: str = field(
+        metadata={
+            "help_string": "registration chain composed into a single LTA file",
+            "formatter": _format_registration_chain,
+            "output_file_template": CHAIN_FILE,
+            "requires": ["registration_chain"],
+        }
+    )
+
     resample_to_talairach: bool = field(
         metadata={"help_string": "resample moving volume to Talairach", "argstr": "--tal"}
     )
@@ -150,4 +198,11 @@ class Vol2Vol(ShellCommandTask):
 
     executable = "mri_vol2vol"
 
+    resource_profile = ResourceProfile(cores=1, memory=1024, wall_time=10, scratch=1024)
+
     input_spec = SpecInfo(name="Input", bases=(Vol2VolSpec, specs.SubjectsDirSpec))
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Hooks replacing this one must compose the chain of registrations likewise.
+        self.hooks.pre_run_task = write_registration_chain
@@ -25,6 +25,7 @@ from attrs import define, field
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
 from pydra.tasks.freesurfer import specs
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(slots=False, kw_only=True)
@@ -95,6 +96,8 @@ class AnatomicalStats(ShellCommandTask):
 
     executable = "mris_anatomical_stats"
 
+    resource_profile = ResourceProfile(cores=1, memory=1024, wall_time=15, scratch=0)
+
     input_spec = SpecInfo(name="Input", bases=(AnatomicalStatsSpec,))
 
     output_spec = SpecInfo(name="Output", bases=(specs.SubjectsDirOutSpec,))
@@ -31,6 +31,7 @@ from attrs import define, field
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
 from pydra.tasks.freesurfer import specs
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(slots=False, kw_only=True)
@@ -103,6 +104,8 @@ class CALabel(ShellCommandTask):
 
     executable = "mris_ca_label"
 
+    resource_profile = ResourceProfile(cores=1, memory=2048, wall_time=30, scratch=256)
+
     input_spec = SpecInfo(name="Input", bases=(CALabelSpec,))
 
     output_spec = SpecInfo(name="Output", bases=(specs.SubjectsDirOutSpec,))
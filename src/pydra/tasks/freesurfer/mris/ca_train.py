@@ -27,6 +27,7 @@ from attrs import define, field
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
 from pydra.tasks.freesurfer import specs
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(slots=False, kw_only=True)
@@ -87,6 +88,16 @@ class CATrain(ShellCommandTask):
 
     executable = "mris_ca_train"
 
+    resource_profile = ResourceProfile(
+        cores=1,
+        memory=2048,
+        wall_time=10,
+        scratch=512,
+        scaling_input="subject_ids",
+        memory_per_item=256,
+        wall_time_per_item=10,
+    )
+
     input_spec = SpecInfo(name="Input", bases=(CATrainSpec,))
 
     output_spec = SpecInfo(name="Output", bases=(specs.SubjectsDirOutSpec,))
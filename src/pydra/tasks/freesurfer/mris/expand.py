@@ -29,6 +29,7 @@ from attrs import define, field
 
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(kw_only=True)
@@ -70,3 +71,5 @@ class Expand(ShellCommandTask):
     input_spec = SpecInfo(name="Input", bases=(MIRSExpandSpec,))
 
     executable = "mris_expand"
+
+    resource_profile = ResourceProfile(cores=1, memory=1024, wall_time=30, scratch=256)
@@ -90,6 +90,7 @@ from attrs import define, field
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
 from pydra.tasks.freesurfer import specs
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(kw_only=True)
@@ -164,4 +165,15 @@ class Preproc(ShellCommandTask):
 
     executable = "mris_preproc"
 
+    resource_profile = ResourceProfile(
+        cores=1,
+        memory=1024,
+        wall_time=10,
+        scratch=256,
+        scaling_input="source_subject_ids",
+        memory_per_item=64,
+        wall_time_per_item=1,
+        scratch_per_item=64,
+    )
+
     input_spec = SpecInfo(name="Input", bases=(PreprocSpec, specs.SubjectsDirSpec))
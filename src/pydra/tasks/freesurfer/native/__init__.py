@@ -0,0 +1,33 @@
+"""
+Native Engines
+==============
+
+In-process implementations of simple invocations of FreeSurfer's tools,
+sparing the start-up cost of the binaries and the reading and writing of voxel data they do not need.
+
+Native engines are used by the :class:`~pydra.tasks.freesurfer.engine.environments.InProcess` environment,
+which falls back to the binaries for invocations they do not implement:
+
+>>> from pydra.tasks.freesurfer.engine import InProcess
+>>> from pydra.tasks.freesurfer.mri.vol2vol import Vol2Vol
+>>> task = Vol2Vol(
+...     moving_volume="func.nii.gz",
+...     output_volume="func.new.vox2ras.nii.gz",
+...     registration_file="register.dat",
+...     target_volume="orig.mgz",
+...     no_resampling=True,
+...     environment=InProcess(),
+... )
+
+.. automodule:: pydra.tasks.freesurfer.native.base
+.. automodule:: pydra.tasks.freesurfer.native.binarize
+.. automodule:: pydra.tasks.freesurfer.native.icosahedron
+.. automodule:: pydra.tasks.freesurfer.native.tkregister2
+.. automodule:: pydra.tasks.freesurfer.native.topology
+.. automodule:: pydra.tasks.freesurfer.native.vol2vol
+"""
+
+from pydra.tasks.freesurfer.native import binarize, tkregister2, vol2vol
+from pydra.tasks.freesurfer.native.base import ENGINES, Unsupported, get_engine, register
+
+__all__ = ["ENGINES", "Unsupported", "binarize", "get_engine", "register", "tkregister2", "vol2vol"]
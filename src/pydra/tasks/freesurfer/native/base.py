@@ -0,0 +1,44 @@
+"""
+Native Engines
+==============
+
+Registry of the native engines of task definitions.
+
+An engine is a function taking a task and its thread budget, and returning the output of the task,
+or raising :class:`Unsupported` for invocations it does not implement, which then run FreeSurfer's binaries.
+"""
+
+from __future__ import annotations
+
+__all__ = ["ENGINES", "Unsupported", "get_engine", "register"]
+
+from typing import Callable
+
+from pydra.engine.core import TaskBase
+
+#: Native engines by name of task definition.
+ENGINES: dict[str, Callable[[TaskBase, int], dict]] = {}
+
+
+class Unsupported(Exception):
+    """Raised by native engines for invocations requiring FreeSurfer's binaries."""
+
+
+def register(name: str) -> Callable:
+    """Register a native engine for the task definition of the given name."""
+
+    def decorator(engine: Callable[[TaskBase, int], dict]) -> Callable[[TaskBase, int], dict]:
+        ENGINES[name] = engine
+        return engine
+
+    return decorator
+
+
+def get_engine(task: TaskBase) -> Callable[[TaskBase, int], dict] | None:
+    """Return the native engine of a task, if any."""
+    return ENGINES.get(type(task).__name__)
+
+
+def make_output(stdout: str = "") -> dict:
+    """Build the output of a successful shell task."""
+    return {"return_code": 0, "stdout": stdout, "stderr": ""}
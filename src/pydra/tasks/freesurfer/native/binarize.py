@@ -0,0 +1,188 @@
+"""
+Binarize
+========
+
+Native engine of :class:`~pydra.tasks.freesurfer.mri.binarize.Binarize` for absolute thresholds and match values.
+
+A voxel is a hit if its value lies between the minimum and maximum thresholds, inclusive, or equals a match value,
+and if it lies within the mask, whose values must exceed the mask threshold:
+
+>>> data = np.array([0.0, 2.0, 5.0, 7.0])
+>>> binarize(data, min_value=2, max_value=5)
+array([False,  True,  True, False])
+>>> binarize(data, match_values=[0, 7], mask=np.array([1, 1, 1, 0]))
+array([ True, False, False, False])
+
+Hits take the binarization value and other voxels the substitute value, or the value of the merge volume.
+The output volume is int32, unsigned char with ``--uchar``, or of the type of the merge volume with ``--merge``,
+floating-point merge volumes keeping their values.
+The count file holds the number of hits, the number of voxels and the percentage of hits, formatted as ``%d %d %lf``:
+
+>>> print(format_count(3, 8), end="")
+3 8 37.500000
+
+The output volume and the count file are written as mri_binarize writes them,
+the input volume being decoded once per workflow through :func:`~pydra.tasks.freesurfer.io.cache.cached_read`.
+
+Thresholds relative to the global mean, percentages and false discovery rates, and copies of other volumes
+are left to mri_binarize.
+"""
+
+from __future__ import annotations
+
+__all__ = ["binarize", "format_count", "get_output_dtype", "read_volume", "run_binarize", "write_volume"]
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Sequence
+
+import attrs
+import numpy as np
+
+from pydra.engine.core import TaskBase
+from pydra.engine.helpers_file import template_update
+from pydra.tasks.freesurfer.io import mgh, nifti, volume
+from pydra.tasks.freesurfer.io.cache import cached_read
+from pydra.tasks.freesurfer.native.base import Unsupported, make_output, register
+
+# Options of mri_binarize the native engine does not implement.
+UNSUPPORTED_INPUTS = ("relative_min", "relative_max", "percentage", "false_discovery_rate", "copy_volume")
+
+#: Mask threshold of mri_binarize.
+DEFAULT_MASK_THRESHOLD = 0.5
+
+
+def _get(inputs, name: str, default=None):
+    # Unset inputs are distinguished from zero values, valid thresholds and substitute values.
+    value = getattr(inputs, name)
+    return default if value is attrs.NOTHING or value is None else value
+
+
+def binarize(
+    data: np.ndarray,
+    min_value: float | None = None,
+    max_value: float | None = None,
+    match_values: Sequence[float] | None = None,
+    mask: np.ndarray | None = None,
+    mask_threshold: float = DEFAULT_MASK_THRESHOLD,
+) -> np.ndarray:
+    """Return the hits of the binarization of an array, as a boolean array."""
+    if match_values is not None:
+        hits = np.isin(data, np.asarray(match_values, dtype=np.float64))
+    else:
+        hits = np.ones(data.shape, dtype=bool)
+        if min_value is not None:
+            hits &= data >= min_value
+        if max_value is not None:
+            hits &= data <= max_value
+    if mask is not None:
+        hits &= mask > mask_threshold
+    return hits
+
+
+def read_volume(path: os.PathLike, shape: tuple | None = None) -> np.ndarray:
+    """Read the voxel values of a single-frame volume through the decoded cache, scaled for NIfTI volumes."""
+    data = cached_read(path, volume.read_data)
+    if data.ndim > 3 and data.shape[3] > 1:
+        raise Unsupported("Multi-frame volumes are left to mri_binarize")
+    data = data.reshape(data.shape[:3])
+    if volume.get_format(path) == "nifti":
+        data = nifti.read_header(path).scale(data)
+    if shape is not None and data.shape != shape:
+        raise ValueError(f"Volume of shape {data.shape} does not match input volume of shape {shape}: {path}")
+    return data
+
+
+def write_volume(path: os.PathLike, data: np.ndarray, source: os.PathLike, threads: int | None = None):
+    """Write a volume with the geometry of a source volume."""
+    if volume.get_format(path) == "nifti":
+        nifti.write(path, data, volume.read_geometry(source).affine, threads=threads)
+        return
+    if volume.get_format(source) == "mgh":
+        # The geometry and parameters of the input header are kept, as mri_binarize does.
+        header = mgh.read_header(source)
+        header = mgh.MGHHeader(
+            header.dims[:3] + (1,),
+            data.dtype,
+            dof=header.dof,
+            good_ras=header.good_ras,
+            voxel_size=header.voxel_size,
+            direction_cosines=header.direction_cosines,
+            center=header.center,
+        )
+    else:
+        header = mgh.MGHHeader.from_affine(data.shape, data.dtype, volume.read_geometry(source).affine)
+    mgh.write(path, data, header, threads=threads)
+
+
+def format_count(num_hits: int, num_voxels: int) -> str:
+    """Format the line of a count file: number of hits, number of voxels and percentage of hits."""
+    return "%d %d %lf\n" % (num_hits, num_voxels, 100 * num_hits / num_voxels)
+
+
+def get_output_dtype(merge: np.ndarray | None, save_as_uchar: bool) -> np.dtype:
+    """Return the type of the output volume, given the merge volume if any."""
+    if save_as_uchar:
+        return np.dtype(np.uint8)
+    if merge is None:
+        return np.dtype(np.int32)
+    if merge.dtype.kind == "f":
+        return np.dtype(np.float32)
+    dtype = merge.dtype.newbyteorder("=")
+    if dtype not in (np.uint8, np.int16, np.int32):
+        raise Unsupported(f"Merge volumes of type {dtype} are left to mri_binarize")
+    return dtype
+
+
+def _binarize_slabs(data: np.ndarray, threads: int, **kwargs) -> np.ndarray:
+    # Slabs of slices are binarized concurrently, NumPy releasing the GIL.
+    mask = kwargs.pop("mask", None)
+    hits = np.empty(data.shape, dtype=bool)
+    bounds = np.linspace(0, data.shape[2], max(min(threads, data.shape[2]), 1) + 1).astype(int)
+
+    def run(start: int, stop: int):
+        slab_mask = mask[..., start:stop] if mask is not None else None
+        hits[..., start:stop] = binarize(data[..., start:stop], mask=slab_mask, **kwargs)
+
+    with ThreadPoolExecutor(len(bounds) - 1) as executor:
+        for future in [executor.submit(run, start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]:
+            future.result()
+    return hits
+
+
+@register("Binarize")
+def run_binarize(task: TaskBase, threads: int) -> dict:
+    """Binarize the input volume of a task, and write its output volume and count file."""
+    inputs = task.inputs
+    if any(_get(inputs, name) is not None for name in UNSUPPORTED_INPUTS):
+        raise Unsupported("Options left to mri_binarize")
+    values = {name: _get(inputs, name) for name in ("min_value", "max_value", "match_values")}
+    if all(value is None for value in values.values()):
+        raise Unsupported("Binarization without thresholds or match values is left to mri_binarize")
+    outputs = template_update(inputs, output_dir=Path.cwd())
+    try:
+        data = read_volume(inputs.input_volume)
+        mask = read_volume(inputs.mask_volume, data.shape) if _get(inputs, "mask_volume") else None
+        merge = read_volume(inputs.merge_volume, data.shape) if _get(inputs, "merge_volume") else None
+        hits = _binarize_slabs(
+            data,
+            threads,
+            mask=mask,
+            mask_threshold=_get(inputs, "mask_threshold", DEFAULT_MASK_THRESHOLD),
+            **values,
+        )
+        substitute = merge if merge is not None else _get(inputs, "not_bin_value", 0)
+        output = np.where(hits, _get(inputs, "bin_value", 1), substitute)
+        dtype = get_output_dtype(merge, bool(inputs.save_as_uchar))
+        if not np.array_equal(output.astype(dtype), output):
+            # Values would wrap around or be truncated in the output type.
+            raise Unsupported(f"Output values do not fit in {dtype}, left to mri_binarize")
+        output = output.astype(dtype)
+        write_volume(outputs["output_volume"], output, inputs.input_volume, threads)
+    except ValueError as e:
+        raise Unsupported(str(e)) from e
+    num_hits, num_voxels = int(np.count_nonzero(hits)), hits.size
+    with open(outputs["output_count_file"], "w") as f:
+        f.write(format_count(num_hits, num_voxels))
+    return make_output()
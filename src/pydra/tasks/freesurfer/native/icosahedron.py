@@ -0,0 +1,239 @@
+"""
+Icosahedron
+===========
+
+Icosahedral meshes of orders 0 to 7, the targets of ``mri_surf2surf --trgicoorder``.
+
+Meshes are generated from FreeSurfer's order 0 icosahedron, with a vertex at each pole,
+by subdividing the faces of each order into four and adding a vertex on the sphere at the middle of each edge,
+so that the vertices of an order are the first vertices of the next ones:
+
+>>> vertices, faces = make_icosahedron(2)
+>>> len(vertices), len(faces)
+(162, 320)
+>>> vertices[0]
+array([0., 0., 1.])
+
+Generated meshes have the vertex positions of FreeSurfer's meshes,
+but the order of their faces and of the vertices added by subdivision is not FreeSurfer's:
+per-vertex data on fsaverage or FreeSurfer's icosahedra must be resampled, not indexed, onto them.
+FreeSurfer's own meshes, ``$FREESURFER_HOME/lib/bem/ic<order>.tri``, are read instead when asked for explicitly,
+the source of a mesh never depending on the host, so that per-vertex arrays computed on any host agree:
+
+>>> sphere = get_icosahedron(7, source="freesurfer")  # doctest: +SKIP
+>>> sphere.created_by  # doctest: +SKIP
+'freesurfer-ic7'
+
+Meshes are built once, then cached on disk with their topology as memory-mapped arrays:
+
+>>> sphere = get_icosahedron(7)  # doctest: +SKIP
+>>> sphere.vertices.shape  # doctest: +SKIP
+(163842, 3)
+>>> topology = get_icosahedron_topology(7)  # doctest: +SKIP
+"""
+
+from __future__ import annotations
+
+__all__ = ["IC0_VERTICES", "get_icosahedron", "get_icosahedron_topology", "make_icosahedron", "read_tri"]
+
+import functools
+import itertools
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from pydra.tasks.freesurfer._hashing import get_hasher
+from pydra.tasks.freesurfer.io.surface import Surface
+from pydra.tasks.freesurfer.native.topology import Topology
+
+#: Environment variable overriding the directory icosahedra are cached in.
+ICOSAHEDRON_ENVVAR = "PYDRA_FREESURFER_ICOSAHEDRON_DIR"
+
+#: Version of the cached arrays, bumped whenever their layout or the generated meshes change.
+CACHE_VERSION = 2
+
+#: Sources of meshes: generated by this module, or read from FreeSurfer's installation.
+SOURCES = ("generated", "freesurfer")
+
+#: Highest order of the icosahedra FreeSurfer provides.
+MAX_ORDER = 7
+
+#: Vertices of FreeSurfer's order 0 icosahedron: the north pole, a ring of five vertices above the equator
+#: starting on the x axis, a ring of five vertices below rotated by 36 degrees, and the south pole.
+IC0_VERTICES = np.array(
+    [
+        [0.0, 0.0, 1.0],
+        [0.894427, 0.0, 0.447214],
+        [0.276393, 0.850651, 0.447214],
+        [-0.723607, 0.525731, 0.447214],
+        [-0.723607, -0.525731, 0.447214],
+        [0.276393, -0.850651, 0.447214],
+        [0.723607, 0.525731, -0.447214],
+        [-0.276393, 0.850651, -0.447214],
+        [-0.894427, 0.0, -0.447214],
+        [-0.276393, -0.850651, -0.447214],
+        [0.723607, -0.525731, -0.447214],
+        [0.0, 0.0, -1.0],
+    ]
+)
+
+
+def _make_base() -> tuple[np.ndarray, np.ndarray]:
+    vertices = IC0_VERTICES / np.linalg.norm(IC0_VERTICES, axis=1, keepdims=True)
+    # Faces are the triples of vertices at the shortest distance from one another.
+    distances = np.linalg.norm(vertices[:, None] - vertices[None], axis=2)
+    adjacent = np.isclose(distances, distances[distances > 0].min())
+    faces = np.array(
+        [
+            (i, j, k)
+            for i, j, k in itertools.combinations(range(len(vertices)), 3)
+            if adjacent[i, j] and adjacent[j, k] and adjacent[i, k]
+        ],
+        dtype=np.int32,
+    )
+    # Faces are oriented counterclockwise seen from outside, their normals pointing outward.
+    a, b, c = vertices[faces].transpose(1, 0, 2)
+    inward = np.einsum("ij,ij->i", np.cross(b - a, c - a), a) < 0
+    faces[inward] = faces[inward][:, [0, 2, 1]]
+    return vertices, faces
+
+
+def _subdivide(vertices: np.ndarray, faces: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    num_vertices = len(vertices)
+    # Edges of each face, opposite to its first, second and third vertices in turn.
+    pairs = np.sort(faces[:, [1, 2, 2, 0, 0, 1]].reshape(-1, 2).astype(np.int64), axis=1)
+    keys, inverse = np.unique(pairs[:, 0] * num_vertices + pairs[:, 1], return_inverse=True)
+    midpoints = vertices[keys // num_vertices] + vertices[keys % num_vertices]
+    midpoints /= np.linalg.norm(midpoints, axis=1, keepdims=True)
+    # New vertices follow the existing ones, in the order of their edges.
+    bc, ca, ab = (num_vertices + inverse.reshape(-1, 3).astype(np.int32)).T
+    a, b, c = faces.T
+    subdivided = np.stack(
+        [np.stack(corners, axis=1) for corners in [(a, ab, ca), (b, bc, ab), (c, ca, bc), (ab, bc, ca)]], axis=1
+    )
+    return np.concatenate([vertices, midpoints]), subdivided.reshape(-1, 3)
+
+
+def make_icosahedron(order: int) -> tuple[np.ndarray, np.ndarray]:
+    """Generate the icosahedron of an order, with 10 * 4 ** order + 2 vertices on the unit sphere.
+
+    Returns
+    -------
+    vertices : numpy.ndarray
+        Coordinates of vertices, as a float64 array of shape (N, 3).
+    faces : numpy.ndarray
+        Indices of the vertices of faces, as an int32 array of shape (M, 3), oriented outward.
+    """
+    if not 0 <= order <= MAX_ORDER:
+        raise ValueError(f"Icosahedron order must be between 0 and {MAX_ORDER}, got {order}")
+    vertices, faces = _make_base()
+    for _ in range(order):
+        vertices, faces = _subdivide(vertices, faces)
+    return vertices, faces
+
+
+def read_tri(path: os.PathLike) -> tuple[np.ndarray, np.ndarray]:
+    """Read a mesh in FreeSurfer's ASCII ``.tri`` format, such as ``lib/bem/ic7.tri``.
+
+    The file lists the number of vertices, a line of index and coordinates per vertex,
+    then the number of faces and a line of index and vertices per face, indices starting at 1.
+    Faces are returned with indices starting at 0, in the order of the file.
+    """
+    with open(path) as f:
+        num_vertices = int(f.readline())
+        vertices = np.loadtxt(f, max_rows=num_vertices, ndmin=2)[:, 1:4]
+        num_faces = int(f.readline())
+        faces = np.loadtxt(f, dtype=np.int64, max_rows=num_faces, ndmin=2)[:, 1:4] - 1
+    if len(vertices) != num_vertices or len(faces) != num_faces:
+        raise ValueError(f"Truncated mesh: {path}")
+    return vertices, faces.astype(np.int32)
+
+
+def _find_tri(order: int) -> Path:
+    freesurfer_home = os.getenv("FREESURFER_HOME")
+    if not freesurfer_home:
+        raise FileNotFoundError("FreeSurfer's icosahedra require FREESURFER_HOME to be set")
+    path = Path(freesurfer_home, "lib", "bem", f"ic{order}.tri")
+    if not path.is_file():
+        raise FileNotFoundError(f"FreeSurfer's icosahedron of order {order} is missing: {path}")
+    return path
+
+
+def _get_cache_dir(cache_dir: os.PathLike | None) -> Path:
+    directory = (
+        cache_dir or os.getenv(ICOSAHEDRON_ENVVAR) or Path(tempfile.gettempdir()) / "pydra-freesurfer-icosahedron"
+    )
+    return Path(directory)
+
+
+def _save(order: int, tri: Path | None, directory: Path):
+    staging = directory.parent / f".{directory.name}.{uuid.uuid4().hex}"
+    staging.mkdir(parents=True)
+    try:
+        vertices, faces = read_tri(tri) if tri is not None else make_icosahedron(order)
+        np.save(staging / "vertices.npy", vertices.astype(np.float32))
+        np.save(staging / "faces.npy", faces)
+        Topology.from_faces(faces, len(vertices)).save(staging / "topology")
+        os.rename(staging, directory)
+    except OSError:
+        # Another process saved the same icosahedron first.
+        shutil.rmtree(staging, ignore_errors=True)
+        if not directory.exists():
+            raise
+
+
+def _get_directory(order: int, cache_dir: Path, source: str) -> Path:
+    if not 0 <= order <= MAX_ORDER:
+        raise ValueError(f"Icosahedron order must be between 0 and {MAX_ORDER}, got {order}")
+    if source not in SOURCES:
+        raise ValueError(f"Icosahedron source must be one of {', '.join(SOURCES)}, got {source}")
+    if source == "generated":
+        return _get_cached_directory(order, None, cache_dir / f"v{CACHE_VERSION}-ic{order}")
+    tri = _find_tri(order)
+    # Meshes of FreeSurfer's installations are cached by file version.
+    stat = tri.stat()
+    name, hasher = get_hasher()
+    digest = hasher(f"{tri.resolve()}\0{stat.st_mtime_ns}\0{stat.st_size}".encode()).hexdigest()
+    return _get_cached_directory(order, tri, cache_dir / f"v{CACHE_VERSION}-ic{order}-{name}-{digest}")
+
+
+@functools.lru_cache(maxsize=None)
+def _get_cached_directory(order: int, tri: Path | None, directory: Path) -> Path:
+    if not directory.exists():
+        _save(order, tri, directory)
+    return directory
+
+
+def get_icosahedron(
+    order: int, radius: float = 100.0, cache_dir: os.PathLike | None = None, source: str = "generated"
+) -> Surface:
+    """Return the icosahedron of an order as a spherical surface, built once and cached on disk.
+
+    Parameters
+    ----------
+    order : int
+        Order of the icosahedron, from 0 to 7.
+    radius : float
+        Radius of the sphere, 100 as the spheres of fsaverage.
+    cache_dir : path-like, optional
+        Directory icosahedra are cached in,
+        defaulting to the ``PYDRA_FREESURFER_ICOSAHEDRON_DIR`` environment variable or the temporary directory.
+    source : {"generated", "freesurfer"}
+        Whether the mesh is generated, or read from FreeSurfer's installation, which must then provide it.
+        The source is recorded in the ``created_by`` attribute of the surface.
+    """
+    directory = _get_directory(order, _get_cache_dir(cache_dir), source)
+    vertices = np.load(directory / "vertices.npy", mmap_mode="r")
+    faces = np.load(directory / "faces.npy", mmap_mode="r")
+    return Surface(vertices if radius == 1 else vertices * np.float32(radius), faces, created_by=f"{source}-ic{order}")
+
+
+def get_icosahedron_topology(
+    order: int, cache_dir: os.PathLike | None = None, source: str = "generated"
+) -> Topology:
+    """Return the topology of the icosahedron returned by :func:`get_icosahedron`, built once and cached on disk."""
+    return Topology.load(_get_directory(order, _get_cache_dir(cache_dir), source) / "topology")
@@ -0,0 +1,127 @@
+import shutil
+
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.engine.environments import InProcess, Local
+from pydra.tasks.freesurfer.io import mgh, volume
+from pydra.tasks.freesurfer.mri.binarize import Binarize
+from pydra.tasks.freesurfer.native import Unsupported
+from pydra.tasks.freesurfer.native.binarize import run_binarize
+
+
+@pytest.fixture
+def aseg(tmp_path):
+    data = np.random.default_rng(0).choice([0, 2, 17, 41, 53, 1001, 2035], size=(16, 16, 12)).astype(np.int32)
+    affine = np.array([[-1.0, 0.0, 0.0, 8.0], [0.0, 0.0, 1.0, -6.0], [0.0, -1.0, 0.0, 8.0], [0, 0, 0, 1]])
+    mgh.write(tmp_path / "aseg.mgz", data, mgh.MGHHeader.from_affine(data.shape, np.int32, affine))
+    mask = (np.arange(data.size).reshape(data.shape, order="F") % 2).astype(np.float32)
+    mgh.write(tmp_path / "mask.mgz", mask, mgh.MGHHeader.from_affine(data.shape, np.float32, affine))
+    return tmp_path / "aseg.mgz", data, mask
+
+
+def _run(tmp_path, environment, **kwargs):
+    task = Binarize(environment=environment, cache_dir=tmp_path / environment.__class__.__name__, **kwargs)
+    result = task()
+    assert result.output.return_code == 0
+    with open(result.output.output_count_file) as f:
+        count = f.read()
+    return result.output.output_volume, count
+
+
+def test_thresholds(tmp_path, aseg):
+    path, data, mask = aseg
+
+    output_volume, count = _run(
+        tmp_path,
+        InProcess(slots_dir=tmp_path / "slots"),
+        input_volume=str(path),
+        output_volume="aseg_mask.mgz",
+        min_value=1000,
+        max_value=1999,
+        bin_value=3,
+        mask_volume=str(tmp_path / "mask.mgz"),
+    )
+
+    output = mgh.read_data(output_volume)
+    expected = (data >= 1000) & (data <= 1999) & (mask > 0.5)
+    assert output.dtype == np.dtype(">i4")
+    np.testing.assert_array_equal(output, np.where(expected, 3, 0))
+    assert count == f"{expected.sum()} {data.size} {100 * expected.sum() / data.size:.6f}\n"
+
+
+def test_match_merge(tmp_path, aseg):
+    path, data, _ = aseg
+
+    output_volume, _ = _run(
+        tmp_path,
+        InProcess(slots_dir=tmp_path / "slots"),
+        input_volume=str(path),
+        output_volume="aseg_mask.mgz",
+        match_values=[2, 41],
+        merge_volume=str(path),
+    )
+
+    output = mgh.read_data(output_volume)
+    assert output.dtype == np.dtype(">i4")
+    np.testing.assert_array_equal(output, np.where(np.isin(data, [2, 41]), 1, data))
+    np.testing.assert_allclose(volume.read_geometry(output_volume).affine, volume.read_geometry(path).affine)
+
+
+def test_float_merge(tmp_path, aseg):
+    path, data, mask = aseg
+
+    output_volume, _ = _run(
+        tmp_path,
+        InProcess(slots_dir=tmp_path / "slots"),
+        input_volume=str(path),
+        output_volume="aseg_mask.mgz",
+        match_values=[2, 41],
+        merge_volume=str(tmp_path / "mask.mgz"),
+    )
+
+    output = mgh.read_data(output_volume)
+    assert output.dtype == np.dtype(">f4")
+    np.testing.assert_array_equal(output, np.where(np.isin(data, [2, 41]), 1, mask))
+
+
+def test_uchar_merge_overflow(aseg):
+    path, _, _ = aseg
+    task = Binarize(input_volume=str(path), match_values=[2, 41], merge_volume=str(path), save_as_uchar=True)
+
+    # Labels above 255 would wrap around.
+    with pytest.raises(Unsupported):
+        run_binarize(task, threads=1)
+
+
+def test_unsupported(aseg):
+    path, _, _ = aseg
+
+    with pytest.raises(Unsupported):
+        run_binarize(Binarize(input_volume=str(path), percentage=10), threads=1)
+
+
+@pytest.mark.skipif(shutil.which("mri_binarize") is None, reason="FreeSurfer is not installed")
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"min_value": 1000, "max_value": 1999},
+        {"match_values": [2, 41], "save_as_uchar": True},
+        {"min_value": 0.5},
+        {"match_values": [2, 41], "merge_volume": "mask.mgz"},
+    ],
+)
+def test_binary(tmp_path, aseg, kwargs):
+    path, _, _ = aseg
+    kwargs.update(input_volume=str(path), output_volume="aseg_mask.mgz", mask_volume=str(tmp_path / "mask.mgz"))
+    if "merge_volume" in kwargs:
+        # A floating-point merge volume.
+        kwargs["merge_volume"] = str(tmp_path / kwargs["merge_volume"])
+
+    native_volume, native_count = _run(tmp_path, InProcess(slots_dir=tmp_path / "slots"), **kwargs)
+    binary_volume, binary_count = _run(tmp_path, Local(), **kwargs)
+
+    native, binary = mgh.read_data(native_volume), mgh.read_data(binary_volume)
+    assert native.dtype == binary.dtype
+    np.testing.assert_array_equal(native, binary)
+    assert native_count == binary_count
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.native.icosahedron import (
+    IC0_VERTICES,
+    get_icosahedron,
+    get_icosahedron_topology,
+    make_icosahedron,
+    read_tri,
+)
+
+
+@pytest.mark.parametrize("order", range(4))
+def test_make_icosahedron(order):
+    vertices, faces = make_icosahedron(order)
+
+    assert (len(vertices), len(faces)) == (10 * 4**order + 2, 20 * 4**order)
+    np.testing.assert_allclose(np.linalg.norm(vertices, axis=1), 1)
+    # Faces point outward.
+    a, b, c = vertices[faces].transpose(1, 0, 2)
+    assert (np.einsum("ij,ij->i", np.cross(b - a, c - a), a) > 0).all()
+    # Vertices of lower orders come first.
+    if order:
+        np.testing.assert_array_equal(vertices[: 10 * 4 ** (order - 1) + 2], make_icosahedron(order - 1)[0])
+
+
+def test_make_icosahedron_order():
+    with pytest.raises(ValueError):
+        make_icosahedron(8)
+
+
+def test_cache(tmp_path):
+    sphere = get_icosahedron(3, cache_dir=tmp_path)
+    topology = get_icosahedron_topology(3, cache_dir=tmp_path)
+
+    assert len(list(tmp_path.iterdir())) == 1
+    np.testing.assert_allclose(np.linalg.norm(sphere.vertices, axis=1), 100, rtol=1e-6)
+    assert isinstance(topology.indices, np.memmap)
+    assert topology.euler_number == 2
+    np.testing.assert_array_equal(np.bincount(topology.degrees), [0] * 5 + [12, 630])
+
+
+def test_freesurfer_base():
+    vertices, faces = make_icosahedron(1)
+
+    # Vertices of FreeSurfer's ic0 come first, poles along the z axis.
+    np.testing.assert_allclose(vertices[:12], IC0_VERTICES, atol=1e-6)
+    np.testing.assert_allclose(vertices[[0, 11]], [[0, 0, 1], [0, 0, -1]])
+    # Vertices added by subdivision lie between two neighbors of ic0.
+    edge = 0.5 * (IC0_VERTICES[0] + IC0_VERTICES[1])
+    assert np.isclose(vertices[12:] @ (edge / np.linalg.norm(edge)), 1).any()
+
+
+def test_freesurfer_mesh(tmp_path, monkeypatch):
+    bem = tmp_path / "freesurfer" / "lib" / "bem"
+    bem.mkdir(parents=True)
+    vertices, faces = make_icosahedron(0)
+    with open(bem / "ic0.tri", "w") as f:
+        f.write(f"{len(vertices)}\n")
+        f.writelines(f"{index + 1} {x:f} {y:f} {z:f}\n" for index, (x, y, z) in enumerate(vertices))
+        f.write(f"{len(faces)}\n")
+        # Faces in another order than generated ones.
+        f.writelines(f"{index + 1} {a + 1} {b + 1} {c + 1}\n" for index, (a, b, c) in enumerate(faces[::-1]))
+    monkeypatch.setenv("FREESURFER_HOME", str(tmp_path / "freesurfer"))
+
+    np.testing.assert_array_equal(read_tri(bem / "ic0.tri")[1], faces[::-1])
+    sphere = get_icosahedron(0, radius=1, cache_dir=tmp_path / "cache", source="freesurfer")
+
+    np.testing.assert_array_equal(sphere.faces, faces[::-1])
+    np.testing.assert_allclose(sphere.vertices, vertices, atol=1e-6)
+    assert sphere.created_by == "freesurfer-ic0"
+    # Generated meshes are returned unless FreeSurfer's are asked for, whether FreeSurfer is installed or not.
+    generated = get_icosahedron(0, radius=1, cache_dir=tmp_path / "cache")
+    np.testing.assert_array_equal(generated.faces, faces)
+    assert generated.created_by == "generated-ic0"
+
+
+def test_freesurfer_mesh_missing(tmp_path, monkeypatch):
+    monkeypatch.setenv("FREESURFER_HOME", str(tmp_path))
+
+    with pytest.raises(FileNotFoundError):
+        get_icosahedron(0, cache_dir=tmp_path / "cache", source="freesurfer")
+    with pytest.raises(ValueError):
+        get_icosahedron(0, cache_dir=tmp_path / "cache", source="fsaverage")
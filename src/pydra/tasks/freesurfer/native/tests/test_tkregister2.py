@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.engine.environments import InProcess
+from pydra.tasks.freesurfer.io import mgh, transforms, volume
+from pydra.tasks.freesurfer.native import Unsupported
+from pydra.tasks.freesurfer.native.tkregister2 import register_from_headers, run_tkregister2, write_registrations
+from pydra.tasks.freesurfer.tkregister2 import TkRegister2
+
+
+@pytest.fixture
+def volumes(tmp_path):
+    rawavg = np.array([[0.0, 0.0, 1.2, -80.0], [-0.9, 0.0, 0.0, 110.0], [0.0, -0.9, 0.0, 120.0], [0, 0, 0, 1]])
+    orig = np.array([[-1.0, 0.0, 0.0, 130.0], [0.0, 0.0, 1.0, -120.0], [0.0, -1.0, 0.0, 125.0], [0, 0, 0, 1]])
+    for name, shape, affine in [("rawavg.mgz", (20, 24, 16), rawavg), ("orig.mgz", (32, 32, 32), orig)]:
+        header = mgh.MGHHeader.from_affine(shape, np.uint8, affine)
+        mgh.write(tmp_path / name, np.zeros(shape, np.uint8), header)
+    return tmp_path / "rawavg.mgz", tmp_path / "orig.mgz"
+
+
+def test_register_from_headers(volumes):
+    registration = register_from_headers(*volumes)
+
+    moving, target = map(volume.read_geometry, volumes)
+    # Target tkregister coordinates map to the same scanner coordinates through the registration.
+    voxel = np.array([3.0, 5.0, 7.0, 1.0])
+    np.testing.assert_allclose(
+        moving.affine @ np.linalg.inv(moving.tkr_affine) @ registration.matrix @ target.tkr_affine @ voxel,
+        target.affine @ voxel,
+    )
+    assert registration.subject == "subject-unknown"
+    assert (registration.in_plane_resolution, registration.between_plane_resolution) == pytest.approx((0.9, 1.2))
+
+
+def test_align_volume_centers(volumes):
+    registration = register_from_headers(*volumes, center=True)
+
+    moving, target = map(volume.read_geometry, volumes)
+    center = np.array([16.0, 16.0, 16.0, 1.0])
+    # The center of the target maps to the center of the moving volume.
+    np.testing.assert_allclose(
+        np.linalg.inv(moving.tkr_affine) @ registration.matrix @ target.tkr_affine @ center, [10.0, 12.0, 8.0, 1.0]
+    )
+
+
+def test_task(tmp_path, volumes):
+    task = TkRegister2(
+        moving_volume=volumes[0],
+        target_volume=volumes[1],
+        register_from_headers=True,
+        environment=InProcess(slots_dir=tmp_path / "slots"),
+        cache_dir=tmp_path / "cache",
+    )
+
+    result = task()
+
+    registration = transforms.read_register_dat(result.output.output_registration_file)
+    np.testing.assert_allclose(registration.matrix, register_from_headers(*volumes).matrix, atol=1e-12)
+
+
+def test_batch(tmp_path, volumes):
+    jobs = [(*volumes, tmp_path / f"register-{index}.dat") for index in range(10)]
+
+    registrations = write_registrations(jobs, max_workers=4)
+
+    assert len(registrations) == 10
+    assert len({(tmp_path / f"register-{index}.dat").read_text() for index in range(10)}) == 1
+
+
+def test_unsupported(volumes):
+    with pytest.raises(Unsupported):
+        run_tkregister2(TkRegister2(moving_volume=volumes[0], target_volume=volumes[1]), 1)
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.io import surface
+from pydra.tasks.freesurfer.native.topology import Topology, get_topology
+
+
+@pytest.fixture
+def octahedron():
+    vertices = np.array([[1, 0, 0], [-1, 0, 0], [0, 1, 0], [0, -1, 0], [0, 0, 1], [0, 0, -1]], dtype=np.float32)
+    faces = np.array(
+        [[0, 2, 4], [2, 1, 4], [1, 3, 4], [3, 0, 4], [2, 0, 5], [1, 2, 5], [3, 1, 5], [0, 3, 5]], dtype=np.int32
+    )
+    return surface.Surface(vertices, faces)
+
+
+def test_from_faces(octahedron):
+    topology = Topology.from_faces(octahedron.faces)
+
+    assert (topology.num_vertices, topology.num_edges, topology.num_faces) == (6, 12, 8)
+    assert topology.euler_number == 2
+    np.testing.assert_array_equal(topology.degrees, [4] * 6)
+    for vertex in range(6):
+        expected = sorted({int(v) for face in octahedron.faces if vertex in face for v in face} - {vertex})
+        np.testing.assert_array_equal(topology.neighbors(vertex), expected)
+        np.testing.assert_array_equal(
+            topology.incident_faces(vertex), np.flatnonzero((octahedron.faces == vertex).any(axis=1))
+        )
+
+
+def test_cache(tmp_path, octahedron):
+    surface.write_surface(tmp_path / "lh.white", octahedron)
+    octahedron.vertices = octahedron.vertices * 2
+    surface.write_surface(tmp_path / "lh.pial", octahedron)
+
+    first = get_topology(tmp_path / "lh.white", cache_dir=tmp_path / "cache")
+    second = get_topology(tmp_path / "lh.pial", cache_dir=tmp_path / "cache")
+
+    # Surfaces sharing their faces share their cached topology.
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+    assert isinstance(second.indices, np.memmap)
+    np.testing.assert_array_equal(first.edges, Topology.from_faces(octahedron.faces).edges)
@@ -0,0 +1,135 @@
+import numpy as np
+import pytest
+
+from pydra.tasks.freesurfer.engine.environments import InProcess
+from pydra.tasks.freesurfer.io import mgh, nifti, transforms, volume
+from pydra.tasks.freesurfer.mri.vol2vol import Vol2Vol
+from pydra.tasks.freesurfer.native import Unsupported
+from pydra.tasks.freesurfer.native.vol2vol import run_vol2vol
+
+
+@pytest.fixture
+def subjects_dir(tmp_path):
+    (tmp_path / "sub-01" / "mri").mkdir(parents=True)
+    affine = np.array([[-1.0, 0.0, 0.0, 130.0], [0.0, 0.0, 1.0, -120.0], [0.0, -1.0, 0.0, 125.0], [0, 0, 0, 1]])
+    header = mgh.MGHHeader.from_affine((32, 32, 32), np.uint8, affine)
+    mgh.write(tmp_path / "sub-01" / "mri" / "orig.mgz", np.zeros((32, 32, 32), np.uint8), header)
+    return tmp_path
+
+
+@pytest.fixture
+def moving(tmp_path):
+    data = np.random.default_rng(0).standard_normal((8, 8, 6)).astype(np.float32)
+    nifti.write(tmp_path / "func.nii.gz", data, np.diag([3.0, 3.0, 4.0, 1.0]))
+    matrix = np.eye(4)
+    matrix[:3, 3] = [1.0, -2.0, 3.0]
+    transforms.write_register_dat(tmp_path / "register.dat", transforms.Registration("sub-01", matrix))
+    return data
+
+
+def test_no_resampling(tmp_path, subjects_dir, moving):
+    task = Vol2Vol(
+        moving_volume=str(tmp_path / "func.nii.gz"),
+        output_volume=str(tmp_path / "func.new.nii.gz"),
+        registration_file=str(tmp_path / "register.dat"),
+        target_volume=str(subjects_dir / "sub-01" / "mri" / "orig.mgz"),
+        no_resampling=True,
+        environment=InProcess(slots_dir=tmp_path / "slots"),
+        cache_dir=tmp_path / "cache",
+    )
+
+    result = task()
+
+    assert result.output.return_code == 0
+    target = volume.read_geometry(subjects_dir / "sub-01" / "mri" / "orig.mgz")
+    moving_geometry = volume.read_geometry(tmp_path / "func.nii.gz")
+    registration = transforms.read_register_dat(tmp_path / "register.dat")
+    expected = target.affine @ np.linalg.inv(target.tkr_affine) @ np.linalg.inv(registration.matrix)
+    expected = expected @ moving_geometry.tkr_affine
+    np.testing.assert_allclose(volume.read_geometry(tmp_path / "func.new.nii.gz").affine, expected, atol=1e-4)
+    np.testing.assert_array_equal(nifti.read_data(tmp_path / "func.new.nii.gz"), moving)
+
+
+def test_registered_volume_as_target(tmp_path, subjects_dir, moving):
+    task = Vol2Vol(
+        moving_volume=str(tmp_path / "func.nii.gz"),
+        output_volume=str(tmp_path / "func.new.nii.gz"),
+        registration_file=str(tmp_path / "register.dat"),
+        use_registered_volume_as_target=True,
+        no_resampling=True,
+        subjects_dir=str(subjects_dir),
+    )
+
+    assert run_vol2vol(task, 1)["return_code"] == 0
+    assert (tmp_path / "func.new.nii.gz").exists()
+
+
+@pytest.mark.parametrize(
+    "inputs",
+    [
+        {},
+        {"no_resampling": True, "invert_transform": True},
+        {"no_resampling": True, "output_volume": "func.new.mgz"},
+    ],
+)
+def test_unsupported(tmp_path, subjects_dir, moving, inputs):
+    task = Vol2Vol(
+        moving_volume=str(tmp_path / "func.nii.gz"),
+        output_volume=str(tmp_path / "func.new.nii.gz"),
+        registration_file=str(tmp_path / "register.dat"),
+        use_registered_volume_as_target=True,
+        subjects_dir=str(subjects_dir),
+    )
+    for name, value in inputs.items():
+        setattr(task.inputs, name, value)
+
+    with pytest.raises(Unsupported):
+        run_vol2vol(task, 1)
+
+
+def test_registration_chain(tmp_path, subjects_dir, moving):
+    orig = subjects_dir / "sub-01" / "mri" / "orig.mgz"
+    shift = np.eye(4)
+    shift[:3, 3] = [5.0, 0.0, -5.0]
+    transforms.write_lta(tmp_path / "shift.lta", transforms.LinearTransform(shift))
+    task = Vol2Vol(
+        moving_volume=str(tmp_path / "func.nii.gz"),
+        target_volume=str(orig),
+        output_volume=str(tmp_path / "func.new.nii.gz"),
+        registration_chain=[(str(tmp_path / "register.dat"), str(tmp_path / "func.nii.gz"), str(orig)), str(tmp_path / "shift.lta")],
+        no_resampling=True,
+        environment=InProcess(slots_dir=tmp_path / "slots"),
+        cache_dir=tmp_path / "cache",
+    )
+    task()
+
+    registration = transforms.read_register_dat(tmp_path / "register.dat")
+    first = registration.to_transform(volume.read_geometry(tmp_path / "func.nii.gz"), volume.read_geometry(orig))
+    expected = shift @ first.matrix @ volume.read_geometry(tmp_path / "func.nii.gz").affine
+    np.testing.assert_allclose(volume.read_geometry(tmp_path / "func.new.nii.gz").affine, expected, atol=1e-4)
+    composed = transforms.read_lta(task.output_dir / "registration_chain.lta")
+    np.testing.assert_allclose(composed.matrix, shift @ first.matrix, atol=1e-8)
+
+
+def test_registration_chain_command(tmp_path, subjects_dir, moving):
+    orig = subjects_dir / "sub-01" / "mri" / "orig.mgz"
+    task = Vol2Vol(
+        moving_volume=str(tmp_path / "func.nii.gz"),
+        target_volume=str(orig),
+        output_volume=str(tmp_path / "func-in-orig.nii.gz"),
+        registration_chain=[(str(tmp_path / "register.dat"), str(tmp_path / "func.nii.gz"), str(orig))],
+        cache_dir=tmp_path / "cache",
+    )
+    chain_file = task.output_dir / "registration_chain.lta"
+    task.output_dir.mkdir(parents=True)
+
+    # Rendering the command line reads and writes nothing.
+    assert task.cmdline.endswith(f"--lta {chain_file}")
+    assert not chain_file.exists()
+
+    # The chain is composed by the hook run before execution.
+    task.hooks.pre_run_task(task)
+
+    registration = transforms.read_register_dat(tmp_path / "register.dat")
+    expected = registration.to_transform(volume.read_geometry(tmp_path / "func.nii.gz"), volume.read_geometry(orig))
+    np.testing.assert_allclose(transforms.read_lta(chain_file).matrix, expected.matrix, atol=1e-8)
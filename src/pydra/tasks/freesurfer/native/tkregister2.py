@@ -0,0 +1,124 @@
+"""
+TkRegister2
+===========
+
+Native engine of :class:`~pydra.tasks.freesurfer.tkregister2.TkRegister2` for registrations computed from headers.
+
+With ``--regheader``, tkregister2 computes the registration mapping the scanner coordinates of both volumes,
+from the tkregister RAS coordinates of the target volume to those of the moving volume:
+
+.. math::
+
+    R = K_{moving} T_{moving}^{-1} T_{target} K_{target}^{-1}
+
+where :math:`T` and :math:`K` are the scanner and tkregister voxel to RAS transforms of a volume.
+With ``--regheader-center``, the centers of both volumes are aligned as well.
+Only the headers of both volumes are read, and the registration is written as tkregister2 writes it.
+
+Registrations of many pairs of volumes are computed in a single call, reading headers concurrently:
+
+>>> write_registrations(
+...     [(f"{subject}/mri/rawavg.mgz", f"{subject}/mri/orig.mgz", f"{subject}/register.dat") for subject in subjects],
+... )  # doctest: +SKIP
+"""
+
+from __future__ import annotations
+
+__all__ = ["register_from_headers", "run_tkregister2", "write_registrations"]
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from pydra.engine.core import TaskBase
+from pydra.engine.helpers_file import template_update
+from pydra.tasks.freesurfer.io import transforms, volume
+from pydra.tasks.freesurfer.native.base import Unsupported, make_output, register
+
+#: Subject written to registrations when none is given, as tkregister2 does.
+UNKNOWN_SUBJECT = "subject-unknown"
+
+
+def _centered(geometry: volume.Geometry) -> np.ndarray:
+    # Scanner transform of a volume translated so that its center lies at the origin.
+    affine = geometry.affine.copy()
+    affine[:3, 3] -= geometry.center
+    return affine
+
+
+def register_from_headers(
+    moving_volume: os.PathLike,
+    target_volume: os.PathLike,
+    center: bool = False,
+    subject: str = UNKNOWN_SUBJECT,
+) -> transforms.Registration:
+    """Compute the registration between two volumes from their headers.
+
+    Parameters
+    ----------
+    moving_volume, target_volume : path-like
+        Volumes to register.
+    center : bool
+        Align the centers of the volumes, as ``--regheader-center`` does.
+    subject : str
+        Subject written to the registration.
+    """
+    moving, target = volume.read_geometry(moving_volume), volume.read_geometry(target_volume)
+    if center:
+        moving_affine, target_affine = _centered(moving), _centered(target)
+    else:
+        moving_affine, target_affine = moving.affine, target.affine
+    matrix = moving.tkr_affine @ np.linalg.inv(moving_affine) @ target_affine @ np.linalg.inv(target.tkr_affine)
+    return transforms.Registration(
+        subject,
+        matrix,
+        in_plane_resolution=moving.voxel_size[0],
+        between_plane_resolution=moving.voxel_size[2],
+    )
+
+
+def write_registrations(
+    jobs: Iterable[tuple[os.PathLike, os.PathLike, os.PathLike]],
+    center: bool = False,
+    max_workers: int | None = None,
+) -> list[transforms.Registration]:
+    """Compute registrations from headers and write them, for many pairs of volumes at once.
+
+    Parameters
+    ----------
+    jobs : iterable of tuple
+        Moving volume, target volume and output registration file of each registration.
+    center : bool
+        Align the centers of the volumes, as ``--regheader-center`` does.
+    max_workers : int, optional
+        Maximum number of registrations computed concurrently.
+    """
+
+    def run(job):
+        moving_volume, target_volume, output_file = job
+        registration = register_from_headers(moving_volume, target_volume, center=center)
+        transforms.write_register_dat(output_file, registration)
+        return registration
+
+    with ThreadPoolExecutor(max_workers) as executor:
+        return list(executor.map(run, jobs))
+
+
+@register("TkRegister2")
+def run_tkregister2(task: TaskBase, threads: int) -> dict:
+    """Compute and write the registration of a task from the headers of its volumes."""
+    inputs = task.inputs
+    if not (inputs.register_from_headers or inputs.align_volume_centers):
+        raise Unsupported("Interactive and optimized registrations are left to tkregister2")
+    output_file = template_update(inputs, output_dir=Path.cwd())["output_registration_file"]
+    try:
+        registration = register_from_headers(
+            inputs.moving_volume, inputs.target_volume, center=bool(inputs.align_volume_centers)
+        )
+    except ValueError as e:
+        raise Unsupported(str(e)) from e
+    transforms.write_register_dat(output_file, registration)
+    return make_output()
@@ -0,0 +1,187 @@
+"""
+Topology
+========
+
+Vertex adjacency of triangle meshes, for native surface computations.
+
+A :class:`Topology` holds, in compressed sparse row form, the neighbors of each vertex and the faces incident to it,
+along with the list of unique edges, all built from faces with vectorized operations:
+
+>>> faces = np.array([[0, 1, 2], [0, 2, 3], [0, 3, 1], [1, 3, 2]])
+>>> topology = Topology.from_faces(faces)
+>>> topology.neighbors(0)
+array([1, 2, 3], dtype=int32)
+>>> topology.euler_number
+2
+
+The topology of a surface file is built once, then cached on disk as memory-mapped arrays
+keyed by the hash of its faces, so that every surface sharing the same mesh,
+such as the white, pial and spherical surfaces of a subject or all fsaverage surfaces, loads it instantly:
+
+>>> topology = get_topology("lh.white")  # doctest: +SKIP
+"""
+
+from __future__ import annotations
+
+__all__ = ["Topology", "get_topology"]
+
+import functools
+import os
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+
+import attrs
+import numpy as np
+from attrs import define
+
+from pydra.tasks.freesurfer._hashing import get_hasher
+from pydra.tasks.freesurfer.io.surface import read_surface
+
+#: Environment variable overriding the directory topologies are cached in.
+TOPOLOGY_ENVVAR = "PYDRA_FREESURFER_TOPOLOGY_DIR"
+
+#: Version of the cached arrays, bumped whenever their layout changes.
+CACHE_VERSION = 1
+
+
+def _to_csr(rows: np.ndarray, columns: np.ndarray, num_rows: int) -> tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(rows, kind="stable")
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+    return indptr, columns[order].astype(np.int32)
+
+
+@define(frozen=True)
+class Topology:
+    """Topology of a triangle mesh.
+
+    Attributes
+    ----------
+    num_vertices : int
+        Number of vertices.
+    faces : numpy.ndarray
+        Vertices of each face, as an int32 array of shape (M, 3).
+    indptr, indices : numpy.ndarray
+        Neighbors of each vertex in compressed sparse row form, those of vertex ``v`` being
+        ``indices[indptr[v]:indptr[v + 1]]``, sorted.
+    face_indptr, face_indices : numpy.ndarray
+        Faces incident to each vertex in compressed sparse row form, sorted.
+    edges : numpy.ndarray
+        Unique edges, as an int32 array of shape (E, 2) of sorted pairs of vertices.
+    """
+
+    num_vertices: int
+
+    faces: np.ndarray = attrs.field(eq=False)
+
+    indptr: np.ndarray = attrs.field(eq=False)
+
+    indices: np.ndarray = attrs.field(eq=False)
+
+    face_indptr: np.ndarray = attrs.field(eq=False)
+
+    face_indices: np.ndarray = attrs.field(eq=False)
+
+    edges: np.ndarray = attrs.field(eq=False)
+
+    @classmethod
+    def from_faces(cls, faces: np.ndarray, num_vertices: int | None = None) -> Topology:
+        """Build the topology of a mesh from its faces."""
+        faces = np.asarray(faces, dtype=np.int32).reshape(-1, 3)
+        if num_vertices is None:
+            num_vertices = int(faces.max()) + 1 if len(faces) else 0
+        # Edges are encoded as single integers to be deduplicated with a one-dimensional sort.
+        pairs = np.sort(faces[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2).astype(np.int64), axis=1)
+        keys = np.unique(pairs[:, 0] * num_vertices + pairs[:, 1])
+        edges = np.stack([keys // num_vertices, keys % num_vertices], axis=1).astype(np.int32)
+        # Edges in both directions, sorted by key so that the neighbors of each vertex are sorted.
+        both = np.sort(np.concatenate([keys, (keys % num_vertices) * num_vertices + keys // num_vertices]))
+        indptr, indices = _to_csr(both // num_vertices, both % num_vertices, num_vertices)
+        face_indptr, face_indices = _to_csr(
+            faces.ravel(), np.repeat(np.arange(len(faces), dtype=np.int32), 3), num_vertices
+        )
+        return cls(num_vertices, faces, indptr, indices, face_indptr, face_indices, edges)
+
+    @property
+    def num_faces(self) -> int:
+        return len(self.faces)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.edges)
+
+    @property
+    def degrees(self) -> np.ndarray:
+        """Number of neighbors of each vertex."""
+        return np.diff(self.indptr)
+
+    @property
+    def euler_number(self) -> int:
+        """Euler characteristic of the mesh, 2 for a closed surface of genus 0."""
+        return self.num_vertices - self.num_edges + self.num_faces
+
+    def neighbors(self, vertex: int) -> np.ndarray:
+        """Return the neighbors of a vertex."""
+        return self.indices[self.indptr[vertex] : self.indptr[vertex + 1]]
+
+    def incident_faces(self, vertex: int) -> np.ndarray:
+        """Return the faces incident to a vertex."""
+        return self.face_indices[self.face_indptr[vertex] : self.face_indptr[vertex + 1]]
+
+    def save(self, directory: os.PathLike):
+        """Save the arrays of the topology to a directory, atomically."""
+        directory = Path(directory)
+        staging = directory.parent / f".{directory.name}.{uuid.uuid4().hex}"
+        staging.mkdir(parents=True)
+        try:
+            for field in attrs.fields(type(self))[1:]:
+                np.save(staging / f"{field.name}.npy", getattr(self, field.name))
+            os.rename(staging, directory)
+        except OSError:
+            # Another process saved the same topology first.
+            shutil.rmtree(staging, ignore_errors=True)
+            if not directory.exists():
+                raise
+
+    @classmethod
+    def load(cls, directory: os.PathLike) -> Topology:
+        """Load a saved topology, memory-mapping its arrays read-only."""
+        directory = Path(directory)
+        arrays = {
+            field.name: np.load(directory / f"{field.name}.npy", mmap_mode="r")
+            for field in attrs.fields(cls)[1:]
+        }
+        return cls(len(arrays["indptr"]) - 1, **arrays)
+
+
+def _get_cache_dir(cache_dir: os.PathLike | None) -> Path:
+    directory = cache_dir or os.getenv(TOPOLOGY_ENVVAR) or Path(tempfile.gettempdir()) / "pydra-freesurfer-topology"
+    return Path(directory)
+
+
+@functools.lru_cache(maxsize=16)
+def _load(directory: Path) -> Topology:
+    return Topology.load(directory)
+
+
+def get_topology(path: os.PathLike, cache_dir: os.PathLike | None = None) -> Topology:
+    """Return the topology of a surface file, built once and cached on disk.
+
+    Parameters
+    ----------
+    path : path-like
+        Triangle surface.
+    cache_dir : path-like, optional
+        Directory topologies are cached in,
+        defaulting to the ``PYDRA_FREESURFER_TOPOLOGY_DIR`` environment variable or the temporary directory.
+    """
+    surface = read_surface(path, mmap=True)
+    name, hasher = get_hasher()
+    digest = hasher(np.ascontiguousarray(surface.faces).tobytes())
+    digest.update(str(surface.num_vertices).encode())
+    directory = _get_cache_dir(cache_dir) / f"v{CACHE_VERSION}-{name}-{digest.hexdigest()}"
+    if not directory.exists():
+        Topology.from_faces(surface.faces, surface.num_vertices).save(directory)
+    return _load(directory)
@@ -0,0 +1,110 @@
+"""
+Vol2Vol
+=======
+
+Native engine of :class:`~pydra.tasks.freesurfer.mri.vol2vol.Vol2Vol` for invocations without resampling.
+
+With ``--no-resample``, mri_vol2vol only changes the voxel to RAS transform of the moving volume
+so that it lands where the registration maps it in the target space:
+
+.. math::
+
+    V = T_{target} K_{target}^{-1} R^{-1} K_{moving}
+
+where :math:`T` and :math:`K` are the scanner and tkregister voxel to RAS transforms of a volume,
+and :math:`R` the registration matrix.
+The new transform is computed from the headers of both volumes,
+then written with :func:`~pydra.tasks.freesurfer.io.volume.rewrite_affine`, leaving voxel data untouched.
+Chains of registrations are composed once per run before execution, by :func:`write_registration_chain`,
+into the LTA file of the output directory that mri_vol2vol is given, which the native engine reads likewise.
+
+Other registration files, inverted transforms and conversions between formats are left to mri_vol2vol.
+"""
+
+from __future__ import annotations
+
+__all__ = ["get_vox2ras", "run_vol2vol", "write_registration_chain"]
+
+import os
+
+import numpy as np
+
+from pydra.engine.core import TaskBase
+from pydra.engine.helpers_file import template_update
+from pydra.tasks.freesurfer.io import transforms, volume
+from pydra.tasks.freesurfer.native.base import Unsupported, make_output, register
+
+# Options of mri_vol2vol the native engine does not implement.
+UNSUPPORTED_INPUTS = (
+    "fsl_registration_file",
+    "xfm_registration_file",
+    "lta_registration_file",
+    "resample_to_talairach",
+    "invert_transform",
+)
+
+
+def get_vox2ras(moving: volume.Geometry, target: volume.Geometry, registration: np.ndarray) -> np.ndarray:
+    """Return the voxel to RAS transform of a moving volume registered to a target volume."""
+    return target.affine @ np.linalg.inv(target.tkr_affine) @ np.linalg.inv(registration) @ moving.tkr_affine
+
+
+def write_registration_chain(task: TaskBase) -> str | None:
+    """Compose the chain of registrations of a Vol2Vol task into its LTA file, in the output directory.
+
+    Runs once per execution, before mri_vol2vol or the native engine, as the ``pre_run_task`` hook of the task.
+    Returns the path of the LTA file, or None if the task has no chain of registrations.
+    """
+    inputs = task.inputs
+    if not inputs.registration_chain:
+        return None
+    path = template_update(inputs, output_dir=task.output_dir)["registration_chain_file"]
+    target_volume = os.path.expandvars(inputs.target_volume) if inputs.target_volume else None
+    transform = transforms.read_chain(inputs.registration_chain, source=inputs.moving_volume, destination=target_volume)
+    transform.source_file = os.path.abspath(inputs.moving_volume)
+    transforms.write_lta(path, transform)
+    return path
+
+
+def _get_target(inputs, registration: transforms.Registration) -> str:
+    if inputs.use_registered_volume_as_target:
+        subjects_dir = inputs.subjects_dir or os.getenv("SUBJECTS_DIR")
+        if not subjects_dir:
+            raise Unsupported("Subjects directory is unknown")
+        return os.path.join(subjects_dir, registration.subject, "mri", "orig.mgz")
+    if not inputs.target_volume:
+        raise Unsupported("Target volume is unknown")
+    return os.path.expandvars(inputs.target_volume)
+
+
+def _get_vox2ras(inputs, moving: volume.Geometry, chain_file: str | None) -> np.ndarray:
+    if chain_file is not None:
+        return transforms.read_lta(chain_file).matrix @ moving.affine
+    if not inputs.registration_file or not os.fspath(inputs.registration_file).endswith(".dat"):
+        raise Unsupported("Only register.dat files and chains of registrations are supported")
+    registration = transforms.read_register_dat(inputs.registration_file)
+    target = volume.read_geometry(_get_target(inputs, registration))
+    return get_vox2ras(moving, target, registration.matrix)
+
+
+@register("Vol2Vol")
+def run_vol2vol(task: TaskBase, threads: int) -> dict:
+    """Change the voxel to RAS transform of the moving volume of a task, without resampling."""
+    inputs = task.inputs
+    if not inputs.no_resampling or any(getattr(inputs, name) for name in UNSUPPORTED_INPUTS):
+        raise Unsupported("Resampling is left to mri_vol2vol")
+    moving_volume, output_volume = os.fspath(inputs.moving_volume), os.fspath(inputs.output_volume)
+    chain_file = None
+    if inputs.registration_chain:
+        # The chain is composed before execution, unless the hook of the task was replaced.
+        chain_file = template_update(inputs, output_dir=task.output_dir)["registration_chain_file"]
+        if not os.path.exists(chain_file):
+            chain_file = write_registration_chain(task)
+    try:
+        if volume.get_format(moving_volume) != volume.get_format(output_volume):
+            raise Unsupported("Conversions between formats are left to mri_vol2vol")
+        vox2ras = _get_vox2ras(inputs, volume.read_geometry(moving_volume), chain_file)
+    except ValueError as e:
+        raise Unsupported(str(e)) from e
+    volume.rewrite_affine(moving_volume, output_volume, vox2ras, threads=threads)
+    return make_output()
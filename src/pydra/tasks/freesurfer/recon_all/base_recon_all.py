@@ -13,6 +13,7 @@ from attrs import define, field
 
 from pydra.engine.specs import ShellOutSpec, ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 from pydra.tasks.freesurfer.recon_all import specs
 
 
@@ -46,6 +47,17 @@ class BaseReconAll(ShellCommandTask):
 
     executable = "recon-all"
 
+    resource_profile = ResourceProfile(
+        cores=1,
+        memory=8192,
+        wall_time=240,
+        scratch=4096,
+        threads_input="num_threads",
+        scaling_input="base_timepoint_ids",
+        memory_per_item=1024,
+        wall_time_per_item=120,
+    )
+
     input_spec = SpecInfo(name="Input", bases=(BaseReconAllSpec, specs.ReconAllBaseSpec))
 
     output_spec = SpecInfo(name="Output", bases=(BaseReconAllOutSpec, specs.ReconAllBaseOutSpec))
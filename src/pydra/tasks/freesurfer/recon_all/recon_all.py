@@ -14,6 +14,7 @@ from attrs import define, field
 
 from pydra.engine.specs import ShellOutSpec, ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 from pydra.tasks.freesurfer.recon_all import specs
 
 
@@ -46,6 +47,8 @@ class ReconAll(ShellCommandTask):
 
     executable = "recon-all"
 
+    resource_profile = ResourceProfile(cores=1, memory=8192, wall_time=1440, scratch=4096, threads_input="num_threads")
+
     input_spec = SpecInfo(name="Input", bases=(ReconAllSpec, specs.ReconAllBaseSpec))
 
     output_spec = SpecInfo(name="Output", bases=(ReconAllOutSpec, specs.ReconAllBaseOutSpec))
@@ -23,6 +23,7 @@ from attrs import define, field
 
 from pydra.engine.specs import ShellSpec, SpecInfo
 from pydra.engine.task import ShellCommandTask
+from pydra.tasks.freesurfer.engine.resources import ResourceProfile
 
 
 @define(kw_only=True)
@@ -56,4 +57,6 @@ class TkRegister2(ShellCommandTask):
 
     executable = "tkregister2 --noedit"
 
+    resource_profile = ResourceProfile(cores=1, memory=512, wall_time=5, scratch=0)
+
     input_spec = SpecInfo(name="Input", bases=(TkRegister2Spec,))